@@ -5,8 +5,9 @@ set -e
 export PYTHONPATH=$PYTHONPATH:/app
 
 echo "🚀 Démarrage de l'API FastAPI..."
-# On utilise src.database au lieu de src.data
-python -m uvicorn src.api.main:app --host 0.0.0.0 --port 8000 &
+# Workers uvicorn forkés depuis un parent superviseur
+# (API_WORKERS, API_PRELOAD : cf. .env ; un seul worker : pas de préchargement)
+python -m src.api.serve &
 
 # Attendre que l'API soit prête
 sleep 10
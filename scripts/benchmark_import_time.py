@@ -0,0 +1,162 @@
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+# Mesure du démarrage à froid (import des modules) avec `python -X importtime`.
+# Usage : python scripts/benchmark_import_time.py [--check]
+#   --check : code de sortie 1 si un module dépasse son budget ou charge une
+#             dépendance lourde interdite (régression de cold start).
+
+ROOT = Path(__file__).resolve().parent.parent
+REPORT_PATH = "delivery/proof/import_time.txt"
+
+# Modules mesurés, budget d'import (ms) et dépendances lourdes qui ne doivent
+# pas être chargées à l'import (elles le sont au premier usage)
+TARGETS = {
+    "src.config": {"budget_ms": 50, "forbidden": ("pandas", "numpy")},
+    "src.model.loader": {
+        "budget_ms": 300,
+        "forbidden": ("pandas", "joblib", "onnxruntime", "shap", "sklearn"),
+    },
+    "src.model.monitoring": {"budget_ms": 800, "forbidden": ("evidently",)},
+    "src.api.main": {
+        "budget_ms": 1000,
+        "forbidden": ("pandas", "joblib", "onnxruntime", "shap", "sklearn"),
+    },
+}
+HEAVY_PACKAGES = (
+    "pandas",
+    "joblib",
+    "onnxruntime",
+    "shap",
+    "sklearn",
+    "lightgbm",
+    "numba",
+    "evidently",
+    "streamlit",
+    "matplotlib",
+)
+TOP_PACKAGES = 10
+N_RUNS = 3
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def parse_importtime(stderr):
+    """Lignes `-X importtime` -> liste de (module, self_us, cumulative_us, niveau)."""
+    rows = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows
+
+
+def package_breakdown(rows):
+    """Temps propre cumulé par paquet de premier niveau (ms), décroissant."""
+    totals = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        totals[name.split(".")[0]] += self_us
+    return sorted(
+        ((package, us / 1000) for package, us in totals.items()),
+        key=lambda item: item[1],
+        reverse=True,
+    )
+
+
+def measure_import(module):
+    """Import de `module` dans un interpréteur neuf (meilleur de N_RUNS)."""
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    best = None
+    for _ in range(N_RUNS):
+        start = time.perf_counter()
+        try:
+            result = subprocess.run(
+                [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                cwd=ROOT,
+                env=env,
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(f"Import de {module} impossible :\n{e.stderr}") from e
+        wall_ms = (time.perf_counter() - start) * 1000
+        rows = parse_importtime(result.stderr)
+        import_ms = next((cum / 1000 for name, _, cum, _ in rows if name == module), 0)
+        if best is None or import_ms < best["import_ms"]:
+            loaded = {name.split(".")[0] for name, _, _, _ in rows}
+            best = {
+                "module": module,
+                "import_ms": import_ms,
+                "wall_ms": wall_ms,
+                "packages": package_breakdown(rows),
+                "heavy": sorted(loaded.intersection(HEAVY_PACKAGES)),
+            }
+    return best
+
+
+def check_budget(result, budget_ms, forbidden):
+    """Liste des problèmes (budget dépassé, dépendance lourde chargée)."""
+    problems = []
+    if result["import_ms"] > budget_ms:
+        problems.append(
+            f"{result['module']} : {result['import_ms']:.0f} ms > budget {budget_ms} ms"
+        )
+    for package in sorted(set(forbidden).intersection(result["heavy"])):
+        problems.append(f"{result['module']} : {package} importé au chargement")
+    return problems
+
+
+def format_report(results):
+    lines = [
+        "BENCHMARK REPORT: IMPORT TIME (COLD START)",
+        "==========================================",
+        f"Python {sys.version.split()[0]}, meilleur de {N_RUNS} interpréteurs neufs",
+        "",
+    ]
+    for result in results:
+        lines.append(
+            f"{result['module']}: import {result['import_ms']:.1f} ms "
+            f"(processus complet {result['wall_ms']:.0f} ms)"
+        )
+        lines.append(
+            "  Dépendances lourdes chargées : "
+            + (", ".join(result["heavy"]) or "aucune")
+        )
+        for package, ms in result["packages"][:TOP_PACKAGES]:
+            lines.append(f"  {package:<30} {ms:8.1f} ms")
+        lines.append("")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    check = "--check" in sys.argv[1:]
+
+    results = [measure_import(module) for module in TARGETS]
+    report = format_report(results)
+    print(report)
+
+    report_path = ROOT / REPORT_PATH
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    report_path.write_text(report + "\n", encoding="utf-8")
+    print(f"Rapport généré : {REPORT_PATH}")
+
+    problems = [
+        problem
+        for result in results
+        for problem in check_budget(
+            result,
+            TARGETS[result["module"]]["budget_ms"],
+            TARGETS[result["module"]]["forbidden"],
+        )
+    ]
+    for problem in problems:
+        print(f"Régression : {problem}")
+    if check and problems:
+        sys.exit(1)
@@ -22,7 +22,7 @@ def run_benchmark():
     # 2. Inférence Standard (Joblib) - On désactive ONNX temporairement pour le test
     orig_session = loader.onnx_session
     loader.onnx_session = None
-    loader.predict_proba.cache_clear()
+    loader.cache.clear()
 
     start = time.time()
     loader.predict_proba(client_id)
@@ -31,21 +31,39 @@ def run_benchmark():
 
     # 3. Inférence ONNX
     loader.onnx_session = orig_session
-    loader.predict_proba.cache_clear()
+    loader.cache.clear()
 
     start = time.time()
     loader.predict_proba(client_id)
     onnx_time = time.time() - start
     print(f"Inférence ONNX (Premier appel) : {onnx_time*1000:.2f}ms")
 
-    # 4. Inférence avec Cache LRU
+    # 3 bis. Forêt compilée (numba) : compilation hors mesure
+    orig_backend = loader.scoring_backend
+    start = time.time()
+    scorer = loader.get_tree_scorer()
+    numba_build_time = time.time() - start
+    loader.scoring_backend = "numba"
+    loader.cache.clear()
+
+    start = time.time()
+    loader.predict_proba(client_id)
+    numba_time = time.time() - start
+    print(
+        f"Inférence Numba (Premier appel) : {numba_time*1000:.2f}ms "
+        f"(construction + compilation : {numba_build_time:.2f}s, "
+        f"numba={scorer.compiled if scorer else None})"
+    )
+    loader.scoring_backend = orig_backend
+
+    # 4. Inférence avec cache des résultats
     start = time.time()
     loader.predict_proba(client_id)
     cached_time = time.time() - start
     print(f"Inférence Cached (Second appel) : {cached_time*1000:.4f}ms")
 
     # 5. Calcul SHAP
-    loader.get_shap_values_cached.cache_clear()
+    loader.cache.clear()
     start = time.time()
     loader.get_shap_values_cached(client_id)
     shap_time = time.time() - start
@@ -56,6 +74,8 @@ def run_benchmark():
     shap_cached_time = time.time() - start
     print(f"Calcul SHAP (Cached) : {shap_cached_time*1000:.4f}ms")
 
+    cache = loader.cache.stats()
+
     # Création du rapport
     report = f"""# 📊 Rapport d'Optimisation & Performance
 
@@ -65,19 +85,21 @@ def run_benchmark():
 | **Chargement** | Cold Start | {load_time:.2f}s | Baseline |
 | **Inférence** | Joblib | {joblib_time*1000:.2f}ms | Baseline |
 | **Inférence** | ONNX | {onnx_time*1000:.2f}ms | {((joblib_time/onnx_time)-1)*100:.0f}% plus rapide |
+| **Inférence** | Numba (forêt compilée) | {numba_time*1000:.2f}ms | {((joblib_time/numba_time)-1)*100:.0f}% plus rapide |
 | **Inférence** | **Cached** | **{cached_time*1000:.4f}ms** | **~{joblib_time/cached_time:,.0f}x** plus rapide |
 | **SHAP** | Standard | {shap_time*1000:.2f}ms | Baseline |
 | **SHAP** | **Cached** | **{shap_cached_time*1000:.4f}ms** | **~{shap_time/shap_cached_time:,.0f}x** plus rapide |
 
 ## 🚀 Analyse Technique
 - **ONNX Runtime** : Standardise l'inférence et réduit la latence CPU. Très utile pour la scalabilité.
-- **Cache LRU** : Élimine totalement le coût de calcul pour les requêtes répétées (ex: dashboard rafraîchi par l'utilisateur). C'est l'optimisation la plus impactante pour l'UX.
-- **Inférence pure** : Réduite de {joblib_time*1000:.1f}ms à {onnx_time*1000:.1f}ms.
+- **Cache des résultats** : Élimine totalement le coût de calcul pour les requêtes répétées (ex: dashboard rafraîchi par l'utilisateur). C'est l'optimisation la plus impactante pour l'UX.
+- **Forêt compilée (numba)** : Arbres aplatis en tableaux et parcourus par une boucle compilée, sans surcoût d'appel ONNX Runtime (`SCORING_BACKEND=numba`).
+- **Inférence pure** : Réduite de {joblib_time*1000:.1f}ms à {min(onnx_time, numba_time)*1000:.1f}ms.
 
 ## 🛠️ Configuration d'Optimisation
-- **Format** : ONNX Opset 12
+- **Format** : ONNX (sortie tenseur sans ZipMap, lot dynamique)
 - **Moteur** : ONNX Runtime CPU (optimisé osx-64/linux-64)
-- **Cache** : LRU (Least Recently Used) - Taille 128 entrées
+- **Cache** : LRU {cache['max_entries']} entrées / {cache['max_bytes'] / 1024**2:.0f} Mo, TTL {cache['ttl_seconds']:.0f}s (hit rate {cache['hit_rate']:.0%})
 """
 
     with open("delivery/PERFORMANCE_REPORT.md", "w") as f:
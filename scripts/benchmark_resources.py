@@ -5,11 +5,24 @@ import numpy as np
 import sqlite3
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
 # Add project root to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from src.model.loader import loader  # noqa: E402
+from src.model.loader import loader
+from src.model.onnx_sessions import create_onnx_session
+
+# ONNX Runtime settings swept by benchmark_session_configs
+# (keys: see src.model.onnx_sessions.session_config)
+SESSION_CONFIGS = {
+    "default": {},
+    "1 thread": {"intra_op_threads": 1},
+    "1 thread, no arena": {"intra_op_threads": 1, "mem_arena": False},
+    "1 thread, basic opt": {"intra_op_threads": 1, "graph_optimization": "basic"},
+    "all cores, parallel": {"execution_mode": "parallel"},
+    "pool 4 x 1 thread": {"intra_op_threads": 1, "pool_size": 4},
+}
 
 
 def measure_resources():
@@ -121,6 +134,57 @@ def benchmark_inference(model_type="onnx", n_iterations=1000, batch_size=1):
     return results
 
 
+def benchmark_session_configs(
+    configs=SESSION_CONFIGS,
+    onnx_path="src/model/model.onnx",
+    n_iterations=500,
+    batch_size=1,
+    concurrency=4,
+):
+    """Latency (sequential) and throughput (`concurrency` threads) per config."""
+    rng = np.random.default_rng(0)
+    results = []
+    for name, overrides in configs.items():
+        start_load = time.time()
+        sess = create_onnx_session(onnx_path, **overrides)
+        load_time = time.time() - start_load
+        input_name = sess.get_inputs()[0].name
+        n_features = sess.get_inputs()[0].shape[1]
+        X = rng.normal(size=(batch_size, n_features)).astype(np.float32)
+
+        # Bind this config's session and batch when the function is defined
+        def run_once(sess=sess, input_name=input_name, X=X):
+            t0 = time.perf_counter()
+            sess.run(None, {input_name: X})
+            return (time.perf_counter() - t0) * 1000
+
+        for _ in range(10):
+            run_once()
+        latencies = [run_once() for _ in range(n_iterations)]
+
+        start_bench = time.time()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(lambda _: run_once(), range(n_iterations)))
+        concurrent_time = time.time() - start_bench
+
+        results.append(
+            {
+                "config": name,
+                "load_s": load_time,
+                "avg_latency_ms": np.mean(latencies),
+                "p95_latency_ms": np.percentile(latencies, 95),
+                "throughput_req_sec": n_iterations * batch_size / concurrent_time,
+            }
+        )
+        print(
+            f"{name:<22} load {load_time:.2f}s | "
+            f"avg {results[-1]['avg_latency_ms']:.3f} ms | "
+            f"p95 {results[-1]['p95_latency_ms']:.3f} ms | "
+            f"{results[-1]['throughput_req_sec']:.0f} req/s ({concurrency} threads)"
+        )
+    return results
+
+
 if __name__ == "__main__":
     # Benchmark ONNX
     results_onnx = benchmark_inference("onnx", n_iterations=1000)
@@ -158,4 +222,21 @@ if __name__ == "__main__":
             "Note: GPU usage is 0% as inference runs on CPU (optimized for low-cost env).\n"
         )
 
+    # ONNX Runtime settings sweep (single row, then batches of 100)
+    print("\n" + "=" * 30 + "\n")
+    sweeps = {
+        batch: benchmark_session_configs(batch_size=batch, n_iterations=n)
+        for batch, n in ((1, 1000), (100, 100))
+    }
+    with open(report_path, "a") as f:
+        f.write("\nONNX RUNTIME SESSION SETTINGS (4 concurrent threads)\n")
+        for batch, results in sweeps.items():
+            f.write(f"\nBatch size {batch}:\n")
+            f.writelines(
+                f"{r['config']:<22} avg {r['avg_latency_ms']:.3f} ms | "
+                f"p95 {r['p95_latency_ms']:.3f} ms | "
+                f"{r['throughput_req_sec']:.0f} rows/sec\n"
+                for r in results
+            )
+
     print(f"\nReport written to {report_path}")
@@ -0,0 +1,202 @@
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import psutil
+import requests
+
+# Ajouter le chemin racine pour les imports
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.config import resolve_db_path
+
+# Mémoire par worker et débit agrégé du mode multi-workers (src/api/serve.py),
+# avec et sans préchargement des artefacts dans le parent.
+# Usage : python scripts/benchmark_workers.py [explain] [durée_s] [concurrence]
+
+ROOT = Path(__file__).resolve().parent.parent
+REPORT_PATH = "delivery/proof/workers_benchmark.txt"
+WORKER_COUNTS = (1, 2, 4, 8)
+PORT = 8765
+N_CLIENTS = 1000
+READY_TIMEOUT_S = 120
+
+
+def sample_client_ids(db_path, n=N_CLIENTS):
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute("SELECT SK_ID_CURR FROM clients LIMIT ?", (n,))
+        return [r[0] for r in rows]
+    finally:
+        conn.close()
+
+
+def start_server(workers, preload):
+    env = dict(os.environ, PYTHONPATH=str(ROOT), API_PRELOAD="1" if preload else "0")
+    return subprocess.Popen(
+        [sys.executable, "-m", "src.api.serve", str(workers), str(PORT)],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def wait_ready(base_url, workers):
+    """Attend des réponses 200 de /readyz en série (réparties sur les workers)."""
+    deadline = time.time() + READY_TIMEOUT_S
+    consecutive = 0
+    while consecutive < 4 * workers:
+        if time.time() > deadline:
+            raise TimeoutError(f"{workers} worker(s) non prêts")
+        try:
+            ok = requests.get(f"{base_url}/readyz", timeout=2).status_code == 200
+        except requests.RequestException:
+            ok = False
+        consecutive = consecutive + 1 if ok else 0
+        if not ok:
+            time.sleep(0.2)
+
+
+def memory_usage(server):
+    """RSS, PSS et USS (Mo) du parent et de chaque worker.
+
+    RSS compte les pages partagées dans chaque processus ; PSS les répartit
+    entre les processus qui les partagent ; USS est la mémoire propre.
+    """
+
+    def info(process):
+        m = process.memory_full_info()
+        return {
+            "rss": m.rss / 1024**2,
+            "pss": getattr(m, "pss", m.rss) / 1024**2,
+            "uss": m.uss / 1024**2,
+        }
+
+    parent = psutil.Process(server.pid)
+    return info(parent), [info(child) for child in parent.children()]
+
+
+def run_load(base_url, client_ids, explain, duration, concurrency):
+    """Requêtes /predict en boucle depuis `concurrency` threads."""
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.time() + duration
+
+    def client(offset):
+        session = requests.Session()
+        local, i = [], offset
+        while time.time() < stop_at:
+            client_id = client_ids[i % len(client_ids)]
+            i += concurrency
+            start = time.perf_counter()
+            try:
+                response = session.get(
+                    f"{base_url}/predict/{client_id}?explain={explain}", timeout=30
+                )
+                ok = response.status_code == 200
+            except requests.RequestException:
+                ok = False
+            if ok:
+                local.append(time.perf_counter() - start)
+            else:
+                with lock:
+                    errors[0] += 1
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(k,)) for k in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    latencies = np.array(latencies) * 1000
+    return {
+        "throughput": len(latencies) / duration,
+        "p50_ms": float(np.percentile(latencies, 50)) if len(latencies) else 0.0,
+        "p95_ms": float(np.percentile(latencies, 95)) if len(latencies) else 0.0,
+        "errors": errors[0],
+    }
+
+
+def benchmark(workers, preload, client_ids, explain, duration, concurrency):
+    base_url = f"http://127.0.0.1:{PORT}"
+    server = start_server(workers, preload)
+    try:
+        start = time.time()
+        wait_ready(base_url, workers)
+        ready_s = time.time() - start
+        # Mémoire après une première passe (caches et pages de travail en place)
+        run_load(base_url, client_ids, explain, 2, concurrency)
+        load = run_load(base_url, client_ids, explain, duration, concurrency)
+        parent, children = memory_usage(server)
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+    return {
+        "workers": workers,
+        "preload": preload,
+        "ready_s": ready_s,
+        "parent": parent,
+        "children": children,
+        **load,
+    }
+
+
+def format_result(r):
+    children = r["children"] or [{"rss": 0.0, "pss": 0.0, "uss": 0.0}]
+    avg = {k: np.mean([c[k] for c in children]) for k in ("rss", "pss", "uss")}
+    total_pss = r["parent"]["pss"] + sum(c["pss"] for c in r["children"])
+    return (
+        f"{r['workers']:>2} | {'oui' if r['preload'] else 'non':>5} | "
+        f"{avg['rss']:7.0f} | {avg['pss']:7.0f} | {avg['uss']:7.0f} | "
+        f"{total_pss:9.0f} | {r['throughput']:8.1f} | {r['p50_ms']:7.1f} | "
+        f"{r['p95_ms']:7.1f} | {r['errors']:>4} | {r['ready_s']:5.1f}"
+    )
+
+
+if __name__ == "__main__":
+    EXPLAIN = sys.argv[1] if len(sys.argv) > 1 else "exact"
+    DURATION = float(sys.argv[2]) if len(sys.argv) > 2 else 10.0
+    CONCURRENCY = int(sys.argv[3]) if len(sys.argv) > 3 else 16
+
+    db_path = resolve_db_path()
+    if not os.path.exists(db_path):
+        print(f"Erreur : La base {db_path} n'existe pas.")
+        sys.exit(1)
+    client_ids = sample_client_ids(db_path)
+
+    header = (
+        "Workers | Préchargement | RSS/worker | PSS/worker | USS/worker | "
+        "PSS total | req/s | p50 ms | p95 ms | erreurs | prêt (s)"
+    )
+    lines = [
+        "BENCHMARK REPORT: MULTI-WORKER SERVING (src/api/serve.py)",
+        "=========================================================",
+        (
+            f"{os.cpu_count()} CPU, explain={EXPLAIN}, {DURATION:.0f}s par mesure, "
+            f"{CONCURRENCY} clients concurrents, mémoire en Mo"
+        ),
+        "",
+        header,
+    ]
+    print("\n".join(lines))
+    for workers in WORKER_COUNTS:
+        for preload in (True, False):
+            result = benchmark(
+                workers, preload, client_ids, EXPLAIN, DURATION, CONCURRENCY
+            )
+            lines.append(format_result(result))
+            print(lines[-1])
+
+    report_path = ROOT / REPORT_PATH
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    report_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    print(f"Rapport généré : {REPORT_PATH}")
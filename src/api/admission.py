@@ -0,0 +1,201 @@
+import asyncio
+import logging
+import os
+import threading
+from collections import deque
+from contextlib import asynccontextmanager
+
+logger = logging.getLogger("credit-scoring-api")
+
+# Configuration (surchargeable par variables d'environnement)
+# Requêtes /predict traitées simultanément par worker (0 = contrôle désactivé)
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "0"))
+# Requêtes en attente d'une place, par file de priorité
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "64"))
+# Attente maximale d'une place avant rejet (millisecondes)
+ADMISSION_QUEUE_TIMEOUT_MS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_MS", "2000"))
+# Part des places accessibles aux requêtes de masse (bulk)
+ADMISSION_BULK_SHARE = float(os.getenv("ADMISSION_BULK_SHARE", "0.5"))
+# Charge (requêtes en cours + en attente, rapportées aux places) à partir de
+# laquelle les requêtes admises sont servies sans SHAP (0 = jamais)
+ADMISSION_DEGRADE_AT = float(os.getenv("ADMISSION_DEGRADE_AT", "0"))
+# Valeur de l'en-tête Retry-After des réponses 503 (secondes)
+ADMISSION_RETRY_AFTER_S = int(os.getenv("ADMISSION_RETRY_AFTER_S", "1"))
+
+# En-tête choisissant la file de priorité d'une requête
+PRIORITY_HEADER = "X-Priority"
+INTERACTIVE = "interactive"
+BULK = "bulk"
+LANES = (INTERACTIVE, BULK)
+
+
+class Overloaded(Exception):
+    """Requête rejetée : places et file d'attente saturées (HTTP 503)."""
+
+    def __init__(self, lane, retry_after):
+        super().__init__(f"API saturée (file {lane})")
+        self.lane = lane
+        self.retry_after = retry_after
+
+
+class Ticket:
+    """Place obtenue par une requête admise."""
+
+    def __init__(self, lane, degraded=False):
+        self.lane = lane
+        # Servir sans SHAP (score seul) : l'API est sous pression
+        self.degraded = degraded
+
+
+class AdmissionController:
+    """
+    Contrôle d'admission des requêtes de scoring, par file de priorité.
+
+    Au plus `max_in_flight` requêtes sont traitées à la fois ; les suivantes
+    attendent dans la file de leur priorité (`interactive` : dashboard,
+    `bulk` : traitements de masse) jusqu'à `max_queue` requêtes et
+    `queue_timeout_ms`, puis sont rejetées (503 + Retry-After) au lieu de
+    s'accumuler dans uvicorn. Une place libérée revient d'abord à la file
+    interactive ; les requêtes bulk n'occupent jamais plus de `bulk_share`
+    des places. Au-delà de `degrade_at`, les requêtes admises sont servies
+    sans SHAP. Les compteurs sont exposés par /health.
+
+    Les files sont propres à la boucle d'événements (un worker uvicorn).
+    """
+
+    def __init__(
+        self,
+        max_in_flight=ADMISSION_MAX_IN_FLIGHT,
+        max_queue=ADMISSION_MAX_QUEUE,
+        queue_timeout_ms=ADMISSION_QUEUE_TIMEOUT_MS,
+        bulk_share=ADMISSION_BULK_SHARE,
+        degrade_at=ADMISSION_DEGRADE_AT,
+        retry_after_s=ADMISSION_RETRY_AFTER_S,
+    ):
+        self.max_in_flight = max(0, int(max_in_flight))
+        self.max_queue = max(0, int(max_queue))
+        self.queue_timeout = queue_timeout_ms / 1000
+        self.bulk_limit = max(1, int(self.max_in_flight * bulk_share))
+        self.degrade_at = degrade_at
+        self.retry_after = max(0, int(retry_after_s))
+        self._in_flight = {lane: 0 for lane in LANES}
+        self._waiters = {lane: deque() for lane in LANES}
+        self._lock = threading.Lock()
+        self.counters = {
+            lane: {"admitted": 0, "queued": 0, "degraded": 0, "shed": 0}
+            for lane in LANES
+        }
+
+    @property
+    def enabled(self):
+        return self.max_in_flight > 0
+
+    @staticmethod
+    def lane(priority, default=INTERACTIVE):
+        """File d'une requête d'après son en-tête de priorité."""
+        priority = (priority or "").strip().lower()
+        return priority if priority in LANES else default
+
+    @property
+    def pressure(self):
+        """Requêtes en cours et en attente, rapportées au nombre de places."""
+        if not self.enabled:
+            return 0.0
+        busy = sum(self._in_flight.values())
+        waiting = sum(len(waiters) for waiters in self._waiters.values())
+        return (busy + waiting) / self.max_in_flight
+
+    def _has_slot(self, lane):
+        if sum(self._in_flight.values()) >= self.max_in_flight:
+            return False
+        return lane != BULK or self._in_flight[BULK] < self.bulk_limit
+
+    def _count(self, lane, counter):
+        with self._lock:
+            self.counters[lane][counter] += 1
+
+    def _shed(self, lane):
+        self._count(lane, "shed")
+        raise Overloaded(lane, self.retry_after)
+
+    async def acquire(self, lane=INTERACTIVE):
+        """Attend une place pour `lane` ; lève Overloaded si saturé."""
+        if not self.enabled:
+            return Ticket(lane)
+        degraded = 0 < self.degrade_at <= self.pressure
+        # Pas de dépassement : une place libre revient d'abord aux requêtes
+        # déjà en attente dans la même file
+        if self._has_slot(lane) and not self._waiters[lane]:
+            self._in_flight[lane] += 1
+        else:
+            await self._wait(lane)
+        self._count(lane, "admitted")
+        if degraded:
+            self._count(lane, "degraded")
+        return Ticket(lane, degraded)
+
+    async def _wait(self, lane):
+        waiters = self._waiters[lane]
+        if len(waiters) >= self.max_queue:
+            self._shed(lane)
+        future = asyncio.get_running_loop().create_future()
+        waiters.append(future)
+        self._count(lane, "queued")
+        try:
+            done, _ = await asyncio.wait([future], timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            # Client parti : place rendue si elle venait d'être attribuée
+            if future.done():
+                self.release(lane)
+            else:
+                waiters.remove(future)
+            raise
+        if not done:
+            # Aucune place à temps (la place est attribuée par release(),
+            # qui retire l'attente de la file : pas de course possible)
+            waiters.remove(future)
+            future.cancel()
+            self._shed(lane)
+
+    def release(self, lane):
+        """Libère la place de `lane` et la donne à la prochaine requête en
+        attente (file interactive d'abord)."""
+        self._in_flight[lane] -= 1
+        for candidate in LANES:
+            waiters = self._waiters[candidate]
+            while waiters and self._has_slot(candidate):
+                future = waiters.popleft()
+                if future.done():
+                    continue
+                self._in_flight[candidate] += 1
+                future.set_result(None)
+
+    @asynccontextmanager
+    async def admit(self, lane=INTERACTIVE):
+        """`async with controller.admit(lane) as ticket:` (place rendue à la sortie)."""
+        ticket = await self.acquire(lane)
+        try:
+            yield ticket
+        finally:
+            if self.enabled:
+                self.release(lane)
+
+    def stats(self):
+        """Compteurs et occupation par file (pour le monitoring)."""
+        with self._lock:
+            lanes = {
+                lane: {
+                    **self.counters[lane],
+                    "in_flight": self._in_flight[lane],
+                    "waiting": len(self._waiters[lane]),
+                }
+                for lane in LANES
+            }
+        return {
+            "enabled": self.enabled,
+            "max_in_flight": self.max_in_flight,
+            "bulk_limit": self.bulk_limit,
+            "max_queue": self.max_queue,
+            "pressure": round(self.pressure, 3),
+            "lanes": lanes,
+        }
@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import os
+import threading
+from collections import Counter
+
+from src.api.executors import run_compute
+
+logger = logging.getLogger("credit-scoring-api")
+
+# Configuration (surchargeable par variables d'environnement)
+# Fenêtre de regroupement en millisecondes (0 = micro-batching désactivé)
+MICROBATCH_WINDOW_MS = float(os.getenv("MICROBATCH_WINDOW_MS", "0"))
+MICROBATCH_MAX_SIZE = int(os.getenv("MICROBATCH_MAX_SIZE", "32"))
+
+
+class MicroBatcher:
+    """
+    Regroupe les requêtes unitaires concurrentes en un seul appel batch.
+
+    Les éléments soumis pendant `window_ms` millisecondes (ou jusqu'à
+    `max_batch_size` éléments) sont passés ensemble à `batch_fn`, exécutée
+    dans le pool de calcul ; chaque appelant reçoit ensuite son propre
+    résultat. `batch_fn` reçoit une liste d'éléments et doit retourner une
+    liste de résultats de même longueur et dans le même ordre.
+    """
+
+    def __init__(
+        self,
+        batch_fn,
+        window_ms=MICROBATCH_WINDOW_MS,
+        max_batch_size=MICROBATCH_MAX_SIZE,
+    ):
+        self.batch_fn = batch_fn
+        self.window = window_ms / 1000
+        self.max_batch_size = max(1, max_batch_size)
+        self._pending = []
+        self._timer = None
+        # Lots en cours (référence forte : la boucle ne garde qu'une
+        # référence faible aux tâches)
+        self._tasks = set()
+        self._lock = threading.Lock()
+        self.batch_sizes = Counter()
+        self.n_items = 0
+        self.n_batches = 0
+
+    @property
+    def enabled(self):
+        return self.window > 0
+
+    async def submit(self, item):
+        """Soumet un élément et attend le résultat de son lot."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._task_done)
+
+    def _task_done(self, task):
+        self._tasks.discard(task)
+        # Erreur déjà transmise aux appelants : marquée comme lue
+        if not task.cancelled():
+            task.exception()
+
+    async def _run(self, batch):
+        items = [item for item, _ in batch]
+        with self._lock:
+            self.batch_sizes[len(batch)] += 1
+            self.n_items += len(batch)
+            self.n_batches += 1
+
+        try:
+            results = await run_compute(self.batch_fn, items)
+        except asyncio.CancelledError:
+            for _, future in batch:
+                future.cancel()
+            raise
+        except Exception as e:
+            logger.error(f"Erreur micro-batch ({len(batch)} éléments) : {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            raise
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self):
+        """Réglages et histogramme des tailles de lots (pour le monitoring)."""
+        with self._lock:
+            histogram = {str(size): n for size, n in sorted(self.batch_sizes.items())}
+            n_items, n_batches = self.n_items, self.n_batches
+        return {
+            "enabled": self.enabled,
+            "window_ms": self.window * 1000,
+            "max_batch_size": self.max_batch_size,
+            "batches": n_batches,
+            "items": n_items,
+            "avg_batch_size": n_items / n_batches if n_batches else 0.0,
+            "batch_size_histogram": histogram,
+        }
@@ -2,14 +2,13 @@ import streamlit as st
 import requests
 import matplotlib.pyplot as plt
 import os
-import shap
 import numpy as np
 import plotly.express as px
 import pandas as pd
 import sqlite3
 
 from src.model.monitoring import generate_drift_report
-from src.model.loader import loader
+from src.config import resolve_db_path
 
 
 def get_cached_drift_report(db_path, report_path):
@@ -99,6 +98,9 @@ with tab_scoring:
                         values = list(shap_vals_dict.values())
 
                         # Création de l'objet Explanation conforme à l'API SHAP
+                        # (shap n'est importé qu'à l'affichage du graphique)
+                        import shap
+
                         exp = shap.Explanation(
                             values=np.array(values),
                             base_values=base_val,
@@ -137,7 +139,7 @@ with tab_monitoring:
     # --- NOUVELLE SECTION : STATISTIQUES DE PRODUCTION ---
     st.subheader("📈 Statistiques de Production (Temps Réel)")
 
-    DB_PATH = loader.db_path
+    DB_PATH = resolve_db_path()
 
     try:
         conn = sqlite3.connect(DB_PATH)
@@ -204,7 +206,7 @@ with tab_monitoring:
         "Analyse de la dérive des données entre l'entraînement (Reference) et la production (Current)."
     )
 
-    DB_PATH = loader.db_path
+    DB_PATH = resolve_db_path()
     REPORT_PATH = "data/drift_report.html"
 
     if st.button("🔄 Générer le rapport de dérive"):
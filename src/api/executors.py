@@ -0,0 +1,63 @@
+import asyncio
+import functools
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger("credit-scoring-api")
+
+# Taille des pools (surchargeable par variables d'environnement)
+# - DB : lectures SQLite, majoritairement en attente d'I/O
+# - Modèle : ONNX / SHAP, limité par le nombre de coeurs
+DB_POOL_SIZE = int(os.getenv("API_DB_WORKERS", "8"))
+MODEL_POOL_SIZE = int(os.getenv("API_MODEL_WORKERS", str(os.cpu_count() or 1)))
+
+_db_executor = None
+_model_executor = None
+
+
+def get_db_executor():
+    """Pool de threads dédié aux accès base de données (créé à la demande)."""
+    global _db_executor
+    if _db_executor is None:
+        _db_executor = ThreadPoolExecutor(
+            max_workers=DB_POOL_SIZE, thread_name_prefix="db-io"
+        )
+    return _db_executor
+
+
+def get_model_executor():
+    """Pool de threads dédié au calcul (inférence, SHAP), créé à la demande."""
+    global _model_executor
+    if _model_executor is None:
+        _model_executor = ThreadPoolExecutor(
+            max_workers=MODEL_POOL_SIZE, thread_name_prefix="model"
+        )
+    return _model_executor
+
+
+async def run_io(func, *args, **kwargs):
+    """Exécute une fonction bloquante d'I/O hors de la boucle d'événements."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_db_executor(), functools.partial(func, *args, **kwargs)
+    )
+
+
+async def run_compute(func, *args, **kwargs):
+    """Exécute un calcul CPU (modèle, SHAP) hors de la boucle d'événements."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_model_executor(), functools.partial(func, *args, **kwargs)
+    )
+
+
+def shutdown_executors(wait=True):
+    """Arrête les pools (ils seront recréés au prochain usage)."""
+    global _db_executor, _model_executor
+    for executor in (_db_executor, _model_executor):
+        if executor is not None:
+            executor.shutdown(wait=wait)
+    _db_executor = None
+    _model_executor = None
+    logger.info("Pools d'exécution arrêtés.")
@@ -1,10 +1,37 @@
-from fastapi import FastAPI, HTTPException, Request
-from pydantic import BaseModel
-from src.model.loader import loader
-from src.database.db_utils import init_logs_db, log_prediction
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, Field
+from src.model.loader import loader, SHAP_TOP_K
+from src.database.db_utils import init_logs_db
+from src.database.log_writer import log_writer
+from src.api.executors import run_io, run_compute, shutdown_executors
+from src.api.batching import MicroBatcher
+from src.api.singleflight import SingleFlight
+from src.api.admission import (
+    BULK,
+    INTERACTIVE,
+    PRIORITY_HEADER,
+    AdmissionController,
+    Overloaded,
+    Ticket,
+)
+from src.api.timing import SERVER_TIMING_LOG, stage_timer
+from src.metrics import (
+    CONTENT_TYPE,
+    REGISTRY,
+    Collected,
+    counter,
+    histogram,
+    process_resident_memory_bytes,
+)
+from src.api.warmup import DISABLED, FAILED, PENDING, READY, Warmup
+from src.model.explainers import EXPLAIN_NONE
+from enum import Enum
+from typing import Annotated
 import os
 import logging
 import time
+import numpy as np
 
 # Configuration du logging
 logging.basicConfig(
@@ -17,6 +44,52 @@ logger = logging.getLogger("credit-scoring-api")
 app = FastAPI(title="Credit Scoring API", version="1.0.0")
 
 
+def score_and_explain_items(items):
+    """Lot du micro-batcher : éléments `(client, mode, top_k)`, un appel par
+    couple (mode, top_k).
+
+    Returns:
+        list[tuple]: (score, explication, durées des étapes score/shap du
+        lot) par élément.
+    """
+    results = [None] * len(items)
+    for group in dict.fromkeys(item[1:] for item in items):
+        mode, top_k = group
+        positions = [i for i, item in enumerate(items) if item[1:] == group]
+        durations = {}
+        batch = loader.score_and_explain_batch(
+            [items[i][0] for i in positions],
+            top_k=top_k,
+            mode=mode,
+            durations=durations,
+        )
+        for i, (score, explanation) in zip(positions, batch):
+            results[i] = (score, explanation, durations)
+    return results
+
+
+# Micro-batching des requêtes /predict concurrentes (MICROBATCH_WINDOW_MS > 0)
+micro_batcher = MicroBatcher(score_and_explain_items)
+
+# Déduplication des calculs en cours (client, version du modèle, mode SHAP, top-k)
+single_flight = SingleFlight()
+
+# Contrôle d'admission par file de priorité (ADMISSION_MAX_IN_FLIGHT > 0)
+admission = AdmissionController()
+
+# Préchauffage des artefacts hors du chemin des requêtes (cf. /readyz)
+warmup = Warmup()
+
+# Composants exigés par /readyz (les autres sont seulement rapportés)
+READINESS_COMPONENTS = [
+    name.strip()
+    for name in os.getenv(
+        "READINESS_COMPONENTS", "scoring,explainer,feature_store,log_writer"
+    ).split(",")
+    if name.strip()
+]
+
+
 def clean_feature_names(df):
     """Nettoyage des noms de features (standard Projet 6)"""
     df.columns = [
@@ -25,26 +98,144 @@ def clean_feature_names(df):
     return df
 
 
+def unless_loaded(attribute, load):
+    """Étape de préchauffage sautée si l'artefact est déjà chargé (préchargé
+    par le processus parent avant le fork des workers, cf. src/api/serve.py)."""
+
+    def step():
+        value = getattr(loader, attribute)
+        return value if value is not None else load()
+
+    return step
+
+
+def warmup_steps():
+    """Étapes du préchauffage, dans l'ordre.
+
+    Les stores sont chargés après le modèle Joblib : ils sont alignés sur
+    ses noms de features.
+    """
+    return [
+        ("persistent_cache", loader.load_persistent_cache),
+        ("explainer", loader.load_explainer),
+        ("feature_store", unless_loaded("feature_store", loader.load_feature_store)),
+        ("shap_store", unless_loaded("shap_store", loader.load_shap_store)),
+        (
+            "cascade",
+            unless_loaded(
+                "cascade", lambda: loader.load_cascade(threshold=DECISION_THRESHOLD)
+            ),
+        ),
+        ("warm_up", loader.warm_up),
+        # Processus SHAP (SHAP_WORKERS > 0) : chacun recharge model.joblib
+        ("explain_pool", loader.start_explain_pool),
+    ]
+
+
 @app.on_event("startup")
 async def startup_event():
     logger.info("Démarrage de l'API - Initialisation des ressources...")
     init_logs_db(loader.db_path)
-    # Préchauffage : charge le modèle et initialise SHAP TreeExplainer
-    loader.load_artifacts()
-    logger.info("Ressources initialisées avec succès.")
+    # Writer de logs en arrière-plan (hors du chemin critique des requêtes)
+    log_writer.start(loader.db_path)
+    # Chemin du score d'abord : session ONNX (ou modèle Joblib s'il score)
+    loader.load_artifacts(score_only=True)
+    # Explainers, cache persistant, stores, cascade et premières inférences
+    # en arrière-plan (WARMUP_IN_BACKGROUND=0 : avant d'accepter du trafic)
+    warmup.start(warmup_steps())
+    logger.info("Chemin de scoring initialisé, préchauffage lancé.")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    logger.info("Arrêt de l'API - Vidage des logs de prédiction...")
+    warmup.stop()
+    loader.close_explain_pool()
+    log_writer.stop()
+    loader.close_persistent_cache()
+    shutdown_executors()
+
+
+# Métriques des requêtes HTTP (GET /metrics), par modèle de route
+HTTP_REQUESTS = counter(
+    "credit_api_requests_total",
+    "Requêtes HTTP traitées, par méthode, route et code de statut.",
+    ("method", "route", "status"),
+)
+HTTP_REQUEST_SECONDS = histogram(
+    "credit_api_request_duration_seconds",
+    "Durée de traitement des requêtes HTTP, par méthode et route.",
+    ("method", "route"),
+)
 
 
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
     start_time = time.time()
+    # Durées par étape (agrégats ; en-tête Server-Timing si SERVER_TIMING=1)
+    timings = stage_timer.begin()
     response = await call_next(request)
     duration = time.time() - start_time
+    route = request.scope.get("route")
+    # Modèle de route (et non chemin brut) : cardinalité bornée
+    route_path = route.path if route is not None else "unmatched"
+    HTTP_REQUESTS.inc(request.method, route_path, response.status_code)
+    HTTP_REQUEST_SECONDS.observe(duration, request.method, route_path)
+    if timings is not None and route is not None:
+        server_timing = stage_timer.end(timings, route_path)
+        if server_timing is not None:
+            response.headers["Server-Timing"] = server_timing
     logger.info(
         f"Method: {request.method} Path: {request.url.path} Duration: {duration:.4f}s Status: {response.status_code}"
     )
     return response
 
 
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    """API saturée : 503 immédiat, le client réessaie après Retry-After."""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+def admitted(default_lane):
+    """Dépendance : place obtenue auprès du contrôle d'admission, dans la file
+    de l'en-tête X-Priority (`interactive` ou `bulk`, sinon `default_lane`),
+    rendue à la fin de la requête."""
+
+    async def dependency(request: Request):
+        lane = admission.lane(request.headers.get(PRIORITY_HEADER), default_lane)
+        with stage_timer.stage("admission"):
+            ticket = await admission.acquire(lane)
+        try:
+            yield ticket
+        finally:
+            if admission.enabled:
+                admission.release(lane)
+
+    return dependency
+
+
+# Paramètre de route : place dans la file interactive (défaut) ou bulk
+InteractiveTicket = Annotated[Ticket, Depends(admitted(INTERACTIVE))]
+BulkTicket = Annotated[Ticket, Depends(admitted(BULK))]
+
+
+# Nombre de features SHAP renvoyées au dashboard par défaut (variable SHAP_TOP_K)
+TOP_SHAP_FEATURES = SHAP_TOP_K
+
+
+class ExplainMode(str, Enum):
+    """Niveau d'explication : aucun (score seul), approché (Saabas) ou exact."""
+
+    none = "none"
+    fast = "fast"
+    exact = "exact"
+
+
 class PredictionResponse(BaseModel):
     client_id: int
     score: float
@@ -52,100 +243,465 @@ class PredictionResponse(BaseModel):
     threshold: float
     shap_values: dict[str, float]
     base_value: float
+    explain: ExplainMode = ExplainMode.exact
+    # Score issu des premiers arbres seulement (cascade, explain=none)
+    early_exit: bool = False
+    # Servi sans SHAP par le contrôle d'admission (API sous pression)
+    degraded: bool = False
+
+
+class BatchPredictionRequest(BaseModel):
+    client_ids: list[int] = Field(..., min_length=1, max_length=10000)
+    explain: ExplainMode = ExplainMode.exact
+    top_k: int = Field(TOP_SHAP_FEATURES, ge=1)
+
+
+class BatchPredictionError(BaseModel):
+    client_id: int
+    detail: str
+
+
+class BatchPredictionResponse(BaseModel):
+    predictions: list[PredictionResponse]
+    errors: list[BatchPredictionError]
 
 
 # Seuil par défaut (issu du Projet 6)
 DEFAULT_THRESHOLD = 0.49
 
+# Seuil de décision (Standard Projet 7)
+DECISION_THRESHOLD = 0.5
+
+
+def component_status():
+    """État de chaque composant, lu sans rien charger ni calculer.
+
+    `ready`, `disabled` (non configuré, ex. pas de feature store : lecture
+    SQLite), `pending`/`running` (préchauffage en cours) ou `failed`.
+    """
+    loaded = loader.readiness()
+
+    def status(component, step):
+        if loaded[component]:
+            return READY
+        return warmup.status(step) or PENDING
+
+    return {
+        "scoring": READY if loaded["onnx"] or loaded["model"] else FAILED,
+        "onnx": READY if loaded["onnx"] else DISABLED,
+        "explainer": status("explainer", "explainer"),
+        "fast_explainer": status("fast_explainer", "warm_up"),
+        "feature_store": status("feature_store", "feature_store"),
+        "shap_store": status("shap_store", "shap_store"),
+        "cascade": status("cascade", "cascade"),
+        "persistent_cache": status("persistent_cache", "persistent_cache"),
+        "explain_pool": status("explain_pool", "explain_pool"),
+        "log_writer": READY if log_writer.running else FAILED,
+    }
+
+
+def component_metrics():
+    """Métriques lues au scrape dans les compteurs des composants."""
+    cache_requests = Collected(
+        "counter",
+        "credit_cache_requests_total",
+        "Lectures des caches de prédiction et d'explications SHAP.",
+    )
+    for kind, counts in loader.cache.stats()["by_kind"].items():
+        cache_requests.add(counts["hits"], cache="memory", kind=kind, result="hit")
+        cache_requests.add(counts["misses"], cache="memory", kind=kind, result="miss")
+    for cache, component in (
+        ("disk", loader.persistent_cache),
+        ("shap_store", loader.shap_store),
+    ):
+        if component is not None:
+            stats = component.stats()
+            cache_requests.add(stats["hits"], cache=cache, kind="all", result="hit")
+            cache_requests.add(stats["misses"], cache=cache, kind="all", result="miss")
+
+    writer = log_writer.stats()
+    log_queue = Collected(
+        "gauge",
+        "credit_log_writer_queue_depth",
+        "Logs de prédiction en attente d'écriture.",
+    ).add(writer["queue_depth"])
+    log_running = Collected(
+        "gauge",
+        "credit_log_writer_running",
+        "1 si le thread d'écriture des logs tourne (0 : base inutilisable ou "
+        "writer arrêté, cf. /health).",
+    ).add(int(writer["running"]))
+    log_rows = Collected(
+        "counter",
+        "credit_log_writer_rows_total",
+        "Logs de prédiction par issue (queued, dropped, written, failed).",
+    )
+    for outcome in ("queued", "dropped", "written", "failed"):
+        log_rows.add(writer[outcome], outcome=outcome)
+
+    admission_stats = admission.stats()
+    admission_requests = Collected(
+        "counter",
+        "credit_admission_requests_total",
+        "Décisions du contrôle d'admission, par file de priorité.",
+    )
+    admission_in_flight = Collected(
+        "gauge",
+        "credit_admission_in_flight",
+        "Requêtes admises en cours de traitement, par file de priorité.",
+    )
+    for lane, counts in admission_stats["lanes"].items():
+        for outcome in ("admitted", "queued", "degraded", "shed"):
+            admission_requests.add(counts[outcome], lane=lane, outcome=outcome)
+        admission_in_flight.add(counts["in_flight"], lane=lane)
+
+    stages = Collected(
+        "histogram",
+        "credit_api_stage_duration_seconds",
+        "Durée des étapes des requêtes, par route et étape.",
+    )
+    for (route, stage), stat in stage_timer.snapshot().items():
+        stages.add_histogram(
+            stage_timer.buckets, stat["buckets"], stat["sum"], route=route, stage=stage
+        )
+
+    rss = Collected(
+        "gauge",
+        "process_resident_memory_bytes",
+        "Mémoire résidente du processus (octets).",
+    ).add(process_resident_memory_bytes())
+
+    return [
+        cache_requests,
+        log_queue,
+        log_running,
+        log_rows,
+        admission_requests,
+        admission_in_flight,
+        stages,
+        rss,
+    ]
+
+
+REGISTRY.add_collector(component_metrics)
+
+
+@app.get("/metrics")
+def metrics():
+    """Métriques au format texte de Prometheus (propres au worker)."""
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+@app.get("/livez")
+def liveness():
+    """Le processus répond (aucune vérification des composants)."""
+    return {"status": "alive"}
+
+
+@app.get("/readyz")
+def readiness():
+    """Prêt à recevoir du trafic : 200 si les composants exigés
+    (READINESS_COMPONENTS) sont prêts ou désactivés, 503 sinon."""
+    components = component_status()
+    ready = all(
+        components.get(name) in (READY, DISABLED) for name in READINESS_COMPONENTS
+    )
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "ready": ready,
+            "required": READINESS_COMPONENTS,
+            "components": components,
+        },
+    )
+
 
 @app.get("/health")
 def health_check():
-    model = loader.load_artifacts()
-    db_exists = os.path.exists("data/database.sqlite")
+    """État détaillé et compteurs (sans chargement d'artefacts)."""
+    loaded = loader.readiness()
     return {
         "status": "healthy",
-        "model_loaded": model is not None,
-        "database_available": db_exists,
+        "model_loaded": loaded["onnx"] or loaded["model"],
+        "database_available": os.path.exists(loader.db_path),
+        "components": component_status(),
+        "warmup": warmup.stats(),
+        "feature_store": (
+            loader.feature_store.memory_footprint()
+            if loader.feature_store is not None
+            else None
+        ),
+        "shap_store": (
+            loader.shap_store.stats() if loader.shap_store is not None else None
+        ),
+        "cascade": loader.cascade.stats() if loader.cascade is not None else None,
+        "log_writer": log_writer.stats(),
+        "admission": admission.stats(),
+        "stage_timing": stage_timer.stats(),
+        "micro_batching": micro_batcher.stats(),
+        "single_flight": single_flight.stats(),
+        "cache": loader.cache.stats(),
+        "persistent_cache": (
+            loader.persistent_cache.stats()
+            if loader.persistent_cache is not None
+            else None
+        ),
+        "explain_pool": (
+            loader.explain_pool.stats() if loader.explain_pool is not None else None
+        ),
     }
 
 
+async def score_and_explain(
+    client_id, client, mode=ExplainMode.exact.value, top_k=TOP_SHAP_FEATURES
+):
+    """Score + explication SHAP compacte d'un client.
+
+    Returns:
+        tuple: (score, explanation, early_exit).
+    """
+    if mode == EXPLAIN_NONE and loader.cascade is not None:
+        # Score seul : cascade, arrêt anticipé pour les clients loin du seuil
+        with stage_timer.stage("score"):
+            score, early_exit = await run_compute(
+                loader.predict_proba_cascade, client_id, client
+            )
+        return score, None, early_exit
+
+    if micro_batcher.enabled:
+        # Score + SHAP regroupés avec les requêtes concurrentes
+        # (un seul appel ONNX et un seul appel SHAP par lot)
+        # Durées du lot partagé imputées aux étapes score et shap de la requête
+        score, explanation, durations = await micro_batcher.submit(
+            (client, mode, top_k)
+        )
+        for name, seconds in durations.items():
+            stage_timer.add(name, seconds)
+        return score, explanation, False
+
+    # Prédiction (via loader qui gère ONNX + Cache)
+    with stage_timer.stage("score"):
+        score = await run_compute(loader.predict_proba, client_id, client)
+    explanation = None
+    if score is not None and mode != EXPLAIN_NONE:
+        # Explicabilité SHAP (via loader qui gère Cache)
+        with stage_timer.stage("shap"):
+            explanation = await run_compute(
+                loader.get_shap_values_cached,
+                client_id,
+                client,
+                top_k=top_k,
+                mode=mode,
+            )
+    return score, explanation, False
+
+
 @app.get("/predict/{client_id}", response_model=PredictionResponse)
-async def predict(client_id: int):
-    """Calcule le score de crédit pour un client (avec cache LRU)."""
+async def predict(
+    client_id: int,
+    ticket: InteractiveTicket,
+    explain: ExplainMode = ExplainMode.exact,
+    top_k: int = Query(TOP_SHAP_FEATURES, ge=1),
+):
+    """Calcule le score de crédit pour un client (avec cache des résultats).
+
+    `explain` : `none` (score seul, sans SHAP), `fast` (attributions approchées
+    de Saabas) ou `exact` (TreeSHAP, par défaut). `top_k` : nombre de features
+    SHAP renvoyées (défaut : SHAP_TOP_K). API sous pression : score seul
+    (`degraded`) ; saturée : 503 avec Retry-After.
+    """
     start_time = time.time()
+    degraded = ticket.degraded and explain != ExplainMode.none
+    if degraded:
+        explain = ExplainMode.none
     try:
-        # 1. Récupération des données (via loader qui gère SQLite)
-        client_data = loader.get_client_data(client_id)
-        if client_data is None:
+        # 1. Récupération des données (une seule lecture SQLite par requête,
+        # partagée par le scoring, SHAP et le logging).
+        # Les appels bloquants passent par des pools dédiés (I/O vs calcul)
+        # pour ne pas bloquer la boucle d'événements
+        with stage_timer.stage("fetch"):
+            client = await run_io(loader.fetch_client_features, client_id)
+        if client is None:
             raise HTTPException(
                 status_code=404, detail=f"Client {client_id} non trouvé dans la base."
             )
 
-        # 2. Prédiction (via loader qui gère ONNX + Cache)
-        score = loader.predict_proba(client_id)
+        # 2-3. Score + SHAP ; les requêtes concurrentes pour le même client
+        # attendent le calcul déjà en cours au lieu de le dupliquer
+        mode = explain.value
+        score, explanation, early_exit = await single_flight.do(
+            (client_id, loader.model_version, mode, top_k),
+            lambda: score_and_explain(client_id, client, mode, top_k),
+        )
+
         if score is None:
             raise HTTPException(status_code=500, detail="Modèle non disponible")
 
-        # Seuil de décision (Standard Projet 7)
-        threshold = 0.5
+        threshold = DECISION_THRESHOLD
         decision = "Accepté" if score < threshold else "Refusé"
 
-        # 3. Explicabilité SHAP (via loader qui gère Cache)
-        shap_values = loader.get_shap_values_cached(client_id)
-
-        # Extraction des features importance locales
-        features_list = client_data.drop(
-            columns=["TARGET", "SK_ID_CURR"], errors="ignore"
-        ).columns.tolist()
-
         # Formater les SHAP values pour le dashboard
-        # On prend les 10 plus importantes (valeur absolue)
-        importances = []
-        if shap_values is not None:
-            # shap_values.values est un array (n_samples, n_features) ou (n_samples, n_features, n_classes)
-            # Pour TreeExplainer sur LGBMBinary, c'est souvent (n_features,) pour un sample
-            vals = (
-                shap_values.values[0]
-                if len(shap_values.values.shape) > 1
-                else shap_values.values
-            )
-
-            for i, feat in enumerate(features_list):
-                importances.append({"feature": feat, "shap_value": float(vals[i])})
-
-            # Trier par importance absolue
-            importances = sorted(
-                importances, key=lambda x: abs(x["shap_value"]), reverse=True
-            )[:15]
+        # (les plus importantes en valeur absolue, déjà triées par le loader)
+        top_shap, base_value = {}, 0.0
+        if explanation is not None:
+            with stage_timer.stage("format"):
+                top_shap = explanation.as_dict(
+                    loader.get_feature_name_array(client.feature_names)
+                )
+            base_value = explanation.base_value
 
         execution_time = time.time() - start_time
 
-        # 4. Logging en base SQLite pour monitoring
-        log_prediction(
-            db_path=loader.db_path,
-            client_id=client_id,
-            score=float(score),
-            decision=decision,
-            features=client_data.iloc[0].to_dict(),
-            latency=execution_time,
-        )
+        # 4. Logging en base SQLite pour monitoring (file + writer en arrière-plan)
+        with stage_timer.stage("log"):
+            log_writer.submit(
+                client_id=client_id,
+                score=float(score),
+                decision=decision,
+                features=client,
+                latency=execution_time,
+                stages=stage_timer.current() if SERVER_TIMING_LOG else None,
+            )
 
         return {
             "client_id": client_id,
             "score": float(score),
             "decision": decision,
             "threshold": threshold,
-            "shap_values": {imp["feature"]: imp["shap_value"] for imp in importances},
-            "base_value": (
-                float(shap_values.base_values[0]) if shap_values is not None else 0.0
-            ),
+            "shap_values": top_shap,
+            "base_value": base_value,
+            "explain": mode,
+            "early_exit": early_exit,
+            "degraded": degraded,
         }
 
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Erreur de prédiction pour client {client_id}: {e}")
-        raise HTTPException(status_code=500, detail=f"Erreur de prédiction: {str(e)}")
+        logger.exception(f"Erreur de prédiction pour client {client_id}")
+        raise HTTPException(status_code=500, detail=f"Erreur de prédiction: {e}")
+
+
+@app.post("/predict/batch", response_model=BatchPredictionResponse)
+async def predict_batch(
+    request: BatchPredictionRequest,
+    ticket: BulkTicket,
+):
+    """Calcule le score de crédit d'un lot de clients (une requête, un appel modèle).
+
+    Les clients inconnus sont remontés dans `errors` sans faire échouer le lot.
+    File `bulk` par défaut (en-tête X-Priority pour la changer).
+    """
+    start_time = time.time()
+    # Dédoublonnage en conservant l'ordre de la requête
+    client_ids = list(dict.fromkeys(request.client_ids))
+
+    try:
+        # 1. Récupération groupée des données (une seule requête SQLite)
+        with stage_timer.stage("fetch"):
+            clients = await run_io(loader.fetch_clients_features, client_ids)
+        if clients is None:
+            raise HTTPException(status_code=503, detail="Base de données indisponible")
+
+        # Indexation par ID pour restituer l'ordre de la requête
+        by_id = {c.client_id: c for c in clients}
+        clients = [by_id[cid] for cid in client_ids if cid in by_id]
+        errors = [
+            {"client_id": cid, "detail": f"Client {cid} non trouvé dans la base."}
+            for cid in client_ids
+            if cid not in by_id
+        ]
+
+        if not clients:
+            return {"predictions": [], "errors": errors}
+
+        # 2-3. Score + SHAP en un appel modèle et un appel SHAP, pour les seuls
+        # clients absents des caches (mémoire, disque) et du store SHAP
+        mode = request.explain.value
+        degraded = ticket.degraded and mode != EXPLAIN_NONE
+        if degraded:
+            mode = EXPLAIN_NONE
+        early_exits = np.zeros(len(clients), dtype=bool)
+        explanations = [None] * len(clients)
+        if mode == EXPLAIN_NONE and loader.cascade is not None:
+            # Score seul : cascade, arrêt anticipé pour les clients loin du seuil
+            features = np.vstack([c.vector for c in clients])
+            with stage_timer.stage("score"):
+                scores, early_exits = await run_compute(
+                    loader.predict_proba_batch_cascade, features
+                )
+        else:
+            durations = {}
+            results = await run_compute(
+                loader.score_and_explain_batch,
+                clients,
+                top_k=request.top_k,
+                mode=mode,
+                durations=durations,
+            )
+            for name, seconds in durations.items():
+                stage_timer.add(name, seconds)
+            scores = [score for score, _ in results]
+            explanations = [explanation for _, explanation in results]
+        if scores is None or any(score is None for score in scores):
+            raise HTTPException(status_code=500, detail="Modèle non disponible")
+
+        top_shaps = [{}] * len(clients)
+        base_values = [0.0] * len(clients)
+        if mode != EXPLAIN_NONE:
+            names = loader.get_feature_name_array(clients[0].feature_names)
+            with stage_timer.stage("format"):
+                top_shaps = [
+                    e.as_dict(names) if e is not None else {} for e in explanations
+                ]
+            base_values = [e.base_value if e is not None else 0.0 for e in explanations]
+
+        threshold = DECISION_THRESHOLD
+        predictions = []
+        for i, client in enumerate(clients):
+            score = float(scores[i])
+            predictions.append(
+                {
+                    "client_id": client.client_id,
+                    "score": score,
+                    "decision": "Accepté" if score < threshold else "Refusé",
+                    "threshold": threshold,
+                    "shap_values": top_shaps[i],
+                    "base_value": float(base_values[i]),
+                    "explain": mode,
+                    "early_exit": bool(early_exits[i]),
+                    "degraded": degraded,
+                }
+            )
+
+        execution_time = time.time() - start_time
+
+        # 4. Logging groupé (writer en arrière-plan) ; latences amorties par client
+        stages = stage_timer.current() if SERVER_TIMING_LOG else None
+        if stages:
+            stages = {name: s / len(predictions) for name, s in stages.items()}
+        with stage_timer.stage("log"):
+            log_writer.submit_many(
+                [
+                    {
+                        "client_id": p["client_id"],
+                        "score": p["score"],
+                        "decision": p["decision"],
+                        "features": client,
+                        "latency": execution_time / len(predictions),
+                        "stages": stages,
+                    }
+                    for p, client in zip(predictions, clients)
+                ],
+            )
+
+        return {"predictions": predictions, "errors": errors}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception(f"Erreur de prédiction batch ({len(client_ids)} clients)")
+        raise HTTPException(status_code=500, detail=f"Erreur de prédiction: {e}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,166 @@
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+import uvicorn
+
+from src.api.main import DECISION_THRESHOLD, app, loader
+from src.model.explainers import EXPLAIN_FAST
+
+logger = logging.getLogger("credit-scoring-api")
+
+# Configuration (surchargeable par variables d'environnement)
+API_HOST = os.getenv("API_HOST", "0.0.0.0")
+API_PORT = int(os.getenv("API_PORT", "8000"))
+# Nombre de processus workers (uvicorn) servant la même socket
+API_WORKERS = int(os.getenv("API_WORKERS", "1"))
+# 1 : artefacts chargés une fois dans le parent, partagés par fork (copy-on-write) ;
+# auto : seulement avec plusieurs workers (un worker seul démarre par le chemin
+# de scoring et préchauffe le reste en arrière-plan, cf. src/api/warmup.py)
+API_PRELOAD = os.getenv("API_PRELOAD", "auto")
+# Un worker qui s'arrête avant ce délai n'est pas relancé (erreur de démarrage)
+WORKER_MIN_UPTIME_S = 5
+
+
+def preload_artifacts():
+    """Charge dans le processus parent tout ce qui se partage par fork.
+
+    Modèle Joblib, explainers (forêt aplatie de Saabas), feature store,
+    store SHAP et cascade sont en lecture seule : les workers forkés les
+    partagent en copy-on-write au lieu d'en charger chacun une copie (le
+    feature store en mmap est de plus partagé via le cache de pages).
+    Les sessions ONNX et les caches restent propres à chaque worker.
+    """
+    from threadpoolctl import threadpool_limits
+
+    try:
+        # Bibliothèques chargées avant de limiter leurs threads
+        import lightgbm  # noqa: F401
+        import onnxruntime  # noqa: F401
+    except ImportError:
+        pass
+
+    start_time = time.time()
+    # Aucun pool de threads OpenMP ni session ONNX avant le fork : leurs
+    # threads n'existeraient pas dans les workers
+    with threadpool_limits(limits=1, user_api="openmp"):
+        loader.load_artifacts(onnx=False)
+        loader.load_feature_store()
+        loader.load_shap_store()
+        loader.load_cascade(threshold=DECISION_THRESHOLD)
+        loader.get_explainer(EXPLAIN_FAST)
+    # Objets du parent hors du GC : les workers ne réécrivent pas leurs pages
+    gc.collect()
+    gc.freeze()
+    logger.info(f"Artefacts préchargés en {time.time() - start_time:.2f}s")
+
+
+def bind_socket(host=API_HOST, port=API_PORT):
+    """Socket d'écoute créée par le parent et héritée par tous les workers."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(sock):
+    """Corps d'un worker forké : état par processus, puis serveur uvicorn."""
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    loader.after_fork()
+    # Démarrage habituel (startup_event) : session ONNX, writer de logs,
+    # préchauffage des artefacts non préchargés
+    server = uvicorn.Server(uvicorn.Config(app, lifespan="on"))
+    server.run(sockets=[sock])
+
+
+def should_preload(workers, preload=API_PRELOAD):
+    """Préchargement dans le parent : `1`/`0`, ou `auto` (plusieurs workers).
+
+    Le préchargement est synchrone : aucune connexion n'est acceptée avant sa
+    fin. Il n'est utile que pour partager les artefacts entre workers.
+    """
+    if isinstance(preload, bool):
+        return preload
+    if preload == "auto":
+        return workers > 1
+    return preload == "1"
+
+
+def serve(workers=API_WORKERS, host=API_HOST, port=API_PORT, preload=API_PRELOAD):
+    """Lance `workers` processus uvicorn sur une socket partagée.
+
+    Le parent ne sert aucune requête : il précharge les artefacts (cf.
+    `should_preload`), forke les workers, relance ceux qui s'arrêtent et leur
+    transmet SIGTERM/SIGINT.
+    """
+    sock = bind_socket(host, port)
+    preload = should_preload(workers, preload)
+    if preload:
+        preload_artifacts()
+
+    children = {}
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                run_worker(sock)
+            except Exception:
+                logger.exception(f"Worker {os.getpid()} arrêté sur erreur")
+                code = 1
+            finally:
+                os._exit(code)
+        children[pid] = time.time()
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for _ in range(workers):
+        spawn()
+    logger.info(
+        f"{workers} worker(s) sur {host}:{port} (préchargement : {preload}), "
+        f"pids {sorted(children)}"
+    )
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        started = children.pop(pid, None)
+        if stopping or started is None:
+            continue
+        if time.time() - started < WORKER_MIN_UPTIME_S:
+            logger.error(f"Worker {pid} arrêté au démarrage (statut {status})")
+            stop(signal.SIGTERM, None)
+            continue
+        logger.warning(f"Worker {pid} arrêté (statut {status}), relance")
+        spawn()
+
+    sock.close()
+    logger.info("Serveur arrêté.")
+
+
+if __name__ == "__main__":
+    # Usage : python -m src.api.serve [workers] [port]
+    WORKERS = int(sys.argv[1]) if len(sys.argv) > 1 else API_WORKERS
+    PORT = int(sys.argv[2]) if len(sys.argv) > 2 else API_PORT
+    serve(workers=WORKERS, port=PORT)
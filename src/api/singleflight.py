@@ -0,0 +1,78 @@
+import asyncio
+import threading
+
+
+class SingleFlight:
+    """
+    Déduplication des calculs concurrents portant sur la même clé.
+
+    Le premier appelant pour une clé exécute le calcul ; les appelants
+    suivants arrivés avant la fin attendent son résultat au lieu de le
+    recalculer (contrairement à `lru_cache`, qui ne coordonne pas les appels
+    en cours). Le calcul s'exécute dans sa propre tâche et n'est annulé que
+    lorsque plus aucun appelant ne l'attend. Les compteurs indiquent le nombre
+    de calculs économisés.
+    """
+
+    def __init__(self):
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key, func):
+        """Exécute `await func()` une seule fois pour tous les appels de `key`."""
+        flight = self._inflight.get(key)
+        with self._lock:
+            self.calls += 1
+            if flight is None:
+                self.executions += 1
+            else:
+                self.coalesced += 1
+
+        if flight is None:
+            # Calcul dans sa propre tâche : l'annulation d'un appelant, premier
+            # compris, n'interrompt pas les autres
+            task = asyncio.ensure_future(func())
+            # Évite l'avertissement "exception never retrieved" sans appelant
+            task.add_done_callback(_consume_exception)
+            flight = self._inflight[key] = _Flight(task)
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Plus aucun appelant n'attend le résultat : calcul abandonné
+                flight.task.cancel()
+            if (flight.waiters == 0 or flight.task.done()) and (
+                self._inflight.get(key) is flight
+            ):
+                del self._inflight[key]
+
+    def stats(self):
+        """Compteurs (pour le monitoring)."""
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._inflight),
+            }
+
+
+class _Flight:
+    """Calcul en cours pour une clé et nombre d'appelants qui l'attendent."""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+
+
+def _consume_exception(future):
+    if not future.cancelled():
+        future.exception()
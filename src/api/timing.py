@@ -0,0 +1,158 @@
+import bisect
+import contextvars
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+# Configuration (surchargeable par variables d'environnement)
+# 1 : durée de chaque étape des requêtes (agrégats de /health et /metrics)
+STAGE_TIMING = os.getenv("STAGE_TIMING", "1") == "1"
+# 1 : durées des étapes renvoyées au client (en-tête Server-Timing)
+SERVER_TIMING = os.getenv("SERVER_TIMING", "0") == "1"
+# 1 : durées des étapes enregistrées dans prediction_logs (colonnes latency_*)
+SERVER_TIMING_LOG = os.getenv("SERVER_TIMING_LOG", "0") == "1"
+
+# Bornes des histogrammes de durée par étape (millisecondes)
+TIMING_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Mesures de la requête en cours (propagées aux tâches et threads de la requête)
+_current = contextvars.ContextVar("request_timings", default=None)
+
+# Étape sans mesure (instrumentation désactivée ou hors requête)
+_NO_SPAN = nullcontext()
+
+
+class RequestTimings:
+    """Durées (secondes) des étapes d'une requête, cumulées par nom."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages = {}
+        self.token = None
+
+    def add(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def header(self, total=None):
+        """Valeur de l'en-tête Server-Timing (`nom;dur=ms`, étapes puis total)."""
+        total = time.perf_counter() - self.start if total is None else total
+        metrics = [
+            f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.stages.items()
+        ]
+        metrics.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(metrics)
+
+
+class _Span:
+    __slots__ = ("name", "start", "timings")
+
+    def __init__(self, timings, name):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timings.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class StageTimer:
+    """
+    Instrumentation des étapes des requêtes (récupération des features,
+    score, SHAP, mise en forme, logging...).
+
+    `begin()` ouvre les mesures d'une requête, `with timer.stage(nom):`
+    chronomètre une étape et `end()` les agrège en mémoire par route et par
+    étape (nombre, somme, maximum, histogramme) ; l'en-tête Server-Timing
+    n'est produit que si `header` est vrai. Désactivé, `stage` renvoie un
+    contexte vide partagé : le coût se limite à la lecture d'une ContextVar.
+    """
+
+    def __init__(
+        self, enabled=STAGE_TIMING, header=SERVER_TIMING, buckets_ms=TIMING_BUCKETS_MS
+    ):
+        self.enabled = enabled
+        self.header = header
+        self.buckets = tuple(b / 1000 for b in buckets_ms)
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def begin(self):
+        """Ouvre les mesures de la requête courante (None si désactivé)."""
+        if not self.enabled:
+            return None
+        timings = RequestTimings()
+        timings.token = _current.set(timings)
+        return timings
+
+    def stage(self, name):
+        """`with timer.stage(nom):` ajoute la durée du bloc à l'étape `nom`."""
+        timings = _current.get()
+        if timings is None:
+            return _NO_SPAN
+        return _Span(timings, name)
+
+    def add(self, name, seconds):
+        """Ajoute une durée mesurée ailleurs (ex. lot partagé par plusieurs
+        requêtes) à l'étape `nom` de la requête courante."""
+        timings = _current.get()
+        if timings is not None:
+            timings.add(name, seconds)
+
+    def current(self):
+        """Durées des étapes de la requête courante (dict, ou None)."""
+        timings = _current.get()
+        return None if timings is None else dict(timings.stages)
+
+    def end(self, timings, route):
+        """Agrège les durées d'une requête terminée ; retourne l'en-tête
+        Server-Timing (None si `header` est faux)."""
+        total = time.perf_counter() - timings.start
+        _current.reset(timings.token)
+        with self._lock:
+            for name, seconds in (*timings.stages.items(), ("total", total)):
+                self._record(route, name, seconds)
+        return timings.header(total) if self.header else None
+
+    def _record(self, route, name, seconds):
+        stat = self._stats.get((route, name))
+        if stat is None:
+            stat = self._stats[(route, name)] = {
+                "count": 0,
+                "sum": 0.0,
+                "max": 0.0,
+                "buckets": [0] * (len(self.buckets) + 1),
+            }
+        stat["count"] += 1
+        stat["sum"] += seconds
+        stat["max"] = max(stat["max"], seconds)
+        # Dernier intervalle : au-delà de la plus grande borne
+        stat["buckets"][bisect.bisect_left(self.buckets, seconds)] += 1
+
+    def snapshot(self):
+        """Copie brute des agrégats : {(route, étape): {count, sum, max, buckets}}
+        (histogramme non cumulé, bornes dans `self.buckets` puis +Inf)."""
+        with self._lock:
+            return {
+                key: {**stat, "buckets": list(stat["buckets"])}
+                for key, stat in self._stats.items()
+            }
+
+    def stats(self):
+        """Moyenne et maximum (ms) par route et par étape (pour le monitoring)."""
+        routes = {}
+        for (route, name), stat in self.snapshot().items():
+            routes.setdefault(route, {})[name] = {
+                "count": stat["count"],
+                "mean_ms": round(stat["sum"] / stat["count"] * 1000, 3),
+                "max_ms": round(stat["max"] * 1000, 3),
+            }
+        return {"enabled": self.enabled, "header": self.header, "routes": routes}
+
+
+# Instance globale utilisée par l'API
+stage_timer = StageTimer()
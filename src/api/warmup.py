@@ -0,0 +1,99 @@
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger("credit-scoring-api")
+
+# 1 : préchauffage dans un thread (l'API répond pendant le chargement) ;
+# 0 : au démarrage, avant d'accepter du trafic
+WARMUP_IN_BACKGROUND = os.getenv("WARMUP_IN_BACKGROUND", "1") == "1"
+
+PENDING = "pending"
+RUNNING = "running"
+READY = "ready"
+# Étape terminée sans résultat (ex. feature store non configuré)
+DISABLED = "disabled"
+FAILED = "failed"
+
+
+class Warmup:
+    """
+    Préchauffage des artefacts hors du chemin des requêtes.
+
+    Les étapes `(nom, fonction)` sont exécutées dans l'ordre, dans un thread
+    dédié ; l'état de chacune (en attente, en cours, prête, désactivée si la
+    fonction renvoie None, en échec) est lu par les sondes sans bloquer.
+    """
+
+    def __init__(self):
+        self._steps = {}
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, steps, background=WARMUP_IN_BACKGROUND):
+        """Lance les étapes (dans un thread si `background`)."""
+        if self.running:
+            return
+        steps = list(steps)
+        with self._lock:
+            self._steps = {name: {"status": PENDING} for name, _ in steps}
+        self._stop.clear()
+        if not background:
+            self._run(steps)
+            return
+        self._thread = threading.Thread(
+            target=self._run, args=(steps,), name="warmup", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """N'enchaîne plus de nouvelle étape et attend la fin de l'étape en cours."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self, steps):
+        start_time = time.time()
+        for name, func in steps:
+            if self._stop.is_set():
+                break
+            self._update(name, status=RUNNING)
+            step_start = time.time()
+            try:
+                status = DISABLED if func() is None else READY
+            except Exception:
+                logger.exception(f"Préchauffage : échec de l'étape {name}")
+                status = FAILED
+            self._update(name, status=status, seconds=time.time() - step_start)
+        logger.info(f"Préchauffage terminé en {time.time() - start_time:.2f}s")
+
+    def _update(self, name, **state):
+        with self._lock:
+            self._steps[name] = {**self._steps.get(name, {}), **state}
+
+    def status(self, name):
+        """État d'une étape (None si elle n'existe pas)."""
+        with self._lock:
+            step = self._steps.get(name)
+            return None if step is None else step["status"]
+
+    @property
+    def done(self):
+        """Toutes les étapes sont terminées (quel que soit leur résultat)."""
+        with self._lock:
+            return all(
+                step["status"] not in (PENDING, RUNNING)
+                for step in self._steps.values()
+            )
+
+    def stats(self):
+        """État et durée de chaque étape (pour le monitoring)."""
+        with self._lock:
+            return {name: dict(step) for name, step in self._steps.items()}
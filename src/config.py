@@ -0,0 +1,32 @@
+import logging
+from pathlib import Path
+
+# Module de configuration léger : aucune dépendance lourde (pandas, ONNX
+# Runtime, SHAP...), importable par le dashboard et les scripts sans charger
+# la pile ML.
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Bases clients candidates, par ordre de préférence
+DATABASE_CANDIDATES = ("data/database.sqlite", "data/database_lite.sqlite")
+
+
+def resolve_db_path(base_dir=None):
+    """Détecte la meilleure base de données disponible.
+
+    Retourne la première base existante parmi `DATABASE_CANDIDATES`, sinon
+    le chemin de la base complète (créée plus tard par les scripts).
+    """
+    base_dir = Path(base_dir) if base_dir is not None else BASE_DIR
+    for candidate in DATABASE_CANDIDATES:
+        path = base_dir / candidate
+        if path.exists():
+            logger.info(f"Base de données détectée : {path}")
+            return str(path)
+
+    path = str(base_dir / DATABASE_CANDIDATES[0])
+    logger.warning(
+        f"Aucune base de données trouvée, utilisation du chemin par défaut : {path}"
+    )
+    return path
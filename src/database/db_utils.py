@@ -15,6 +15,10 @@ LOG_FEATURES = [
     "DAYS_REGISTRATION",
 ]
 
+# Étapes de la requête dont la durée est enregistrée (colonnes latency_<étape>,
+# en secondes, renseignées si SERVER_TIMING_LOG=1)
+LOG_STAGES = ["admission", "fetch", "score", "shap", "format"]
+
 
 def init_logs_db(db_path="data/database.sqlite"):
     """
@@ -26,6 +30,7 @@ def init_logs_db(db_path="data/database.sqlite"):
     # Construction de la requête de création
     # On ajoute les colonnes dynamiquement basées sur LOG_FEATURES
     cols = ", ".join([f"{feat} REAL" for feat in LOG_FEATURES])
+    stage_cols = ", ".join([f"latency_{stage} REAL" for stage in LOG_STAGES])
 
     create_query = f"""
     CREATE TABLE IF NOT EXISTS prediction_logs (
@@ -35,7 +40,8 @@ def init_logs_db(db_path="data/database.sqlite"):
         decision TEXT,
         timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
         latency REAL,
-        {cols}
+        {cols},
+        {stage_cols}
     )
     """
 
@@ -46,6 +52,13 @@ def init_logs_db(db_path="data/database.sqlite"):
         cursor.execute("ALTER TABLE prediction_logs ADD COLUMN latency REAL")
     except sqlite3.OperationalError:
         pass  # La colonne existe déjà
+    for stage in LOG_STAGES:
+        try:
+            cursor.execute(
+                f"ALTER TABLE prediction_logs ADD COLUMN latency_{stage} REAL"
+            )
+        except sqlite3.OperationalError:
+            pass
 
     # Création d'index pour optimiser les requêtes par date
     cursor.execute(
@@ -56,7 +69,9 @@ def init_logs_db(db_path="data/database.sqlite"):
     conn.close()
 
 
-def log_prediction(db_path, client_id, score, decision, features, latency=None):
+def log_prediction(
+    db_path, client_id, score, decision, features, latency=None, stages=None
+):
     """
     Enregistre une prédiction et les features associées.
 
@@ -67,10 +82,30 @@ def log_prediction(db_path, client_id, score, decision, features, latency=None):
         decision (str): Décision (Accordé/Refusé).
         features (dict): Dictionnaire contenant les valeurs des features.
         latency (float, optional): Latence de la requête en secondes.
+        stages (dict, optional): Durée (secondes) de chaque étape (LOG_STAGES).
     """
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
 
+    params = build_log_row(client_id, score, decision, features, latency, stages)
+
+    cursor.execute(insert_log_query(), params)
+    conn.commit()
+    conn.close()
+
+
+def insert_log_query():
+    """Requête INSERT paramétrée de la table prediction_logs."""
+    columns = LOG_FEATURES + [f"latency_{stage}" for stage in LOG_STAGES]
+    placeholders = ", ".join(["?" for _ in columns])
+    return f"""
+    INSERT INTO prediction_logs (client_id, score, decision, timestamp, latency, {', '.join(columns)})
+    VALUES (?, ?, ?, ?, ?, {placeholders})
+    """
+
+
+def build_log_row(client_id, score, decision, features, latency, stages=None):
+    """Construit les paramètres d'une ligne de log (ordre de `insert_log_query`)."""
     # Préparation des valeurs pour les features
     # On utilise features.get(feat, None) pour gérer les cas manquants
     # Attention: features peut être un DataFrame row (Series) ou un dict
@@ -95,18 +130,13 @@ def log_prediction(db_path, client_id, score, decision, features, latency=None):
                 val = None
         feature_values.append(val)
 
-    # Construction de la requête
-    placeholders = ", ".join(["?" for _ in LOG_FEATURES])
-    insert_query = f"""
-    INSERT INTO prediction_logs (client_id, score, decision, timestamp, latency, {', '.join(LOG_FEATURES)})
-    VALUES (?, ?, ?, ?, ?, {placeholders})
-    """
-
     # Date actuelle explicite
     timestamp = datetime.datetime.now().isoformat()
 
-    params = [client_id, score, decision, timestamp, latency] + feature_values
+    # Durées des étapes (None si non mesurées)
+    stages = stages or {}
+    stage_values = [stages.get(stage) for stage in LOG_STAGES]
 
-    cursor.execute(insert_query, params)
-    conn.commit()
-    conn.close()
+    return (
+        [client_id, score, decision, timestamp, latency] + feature_values + stage_values
+    )
@@ -0,0 +1,242 @@
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from src.database.db_utils import build_log_row, insert_log_query
+
+logger = logging.getLogger(__name__)
+
+# Configuration (surchargeable par variables d'environnement)
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "200"))
+LOG_FLUSH_INTERVAL_MS = int(os.getenv("LOG_FLUSH_INTERVAL_MS", "200"))
+# Délai (secondes) avant de relancer le thread quand la base est inutilisable
+LOG_RETRY_INTERVAL_S = float(os.getenv("LOG_RETRY_INTERVAL_S", "30"))
+
+
+class PredictionLogWriter:
+    """
+    Écriture asynchrone des logs de prédiction.
+
+    Les prédictions sont déposées dans une file bornée en mémoire ; un thread
+    dédié la vide par transactions de `batch_size` lignes (ou toutes les
+    `flush_interval_ms` millisecondes) avec `executemany`, sur une connexion
+    SQLite unique en mode WAL. Le chemin de la requête ne fait donc plus aucun
+    commit disque. Si la file est pleine, la ligne est abandonnée (et comptée).
+
+    Une ligne soumise avant `start()` démarre le thread sur `db_path` s'il est
+    connu ; sans base, ou après `stop()`, elle est abandonnée (et comptée) :
+    aucune écriture synchrone sur le chemin de la requête.
+
+    Si la base ne peut pas être ouverte, le thread s'arrête : les lignes en
+    file sont comptées en échec, l'erreur est exposée dans `stats()` et le
+    thread n'est relancé qu'après `retry_interval_s` secondes (lignes
+    abandonnées entre-temps).
+    """
+
+    def __init__(
+        self,
+        max_queue=LOG_QUEUE_SIZE,
+        batch_size=LOG_BATCH_SIZE,
+        flush_interval_ms=LOG_FLUSH_INTERVAL_MS,
+        retry_interval_s=LOG_RETRY_INTERVAL_S,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.retry_interval = retry_interval_s
+        self.db_path = None
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        # Dernière erreur d'ouverture de la base, et prochain essai (monotonic)
+        self.error = None
+        self._retry_at = 0.0
+        self.queued = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, db_path):
+        """Démarre le thread d'écriture sur la base `db_path`."""
+        with self._start_lock:
+            if self.running:
+                return
+            self.db_path = db_path
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="prediction-log-writer", daemon=True
+            )
+            self._thread.start()
+        logger.info(f"Writer de logs démarré ({db_path})")
+
+    def stop(self, timeout=5.0):
+        """Vide la file puis arrête le thread d'écriture.
+
+        Retourne False si le thread n'a pas fini de vider la file dans le
+        délai : il est alors conservé (toujours `running`) et continue.
+        """
+        self._stop.set()
+        if not self.running:
+            return True
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning(
+                f"Writer de logs : vidage incomplet après {timeout}s "
+                f"({self._queue.qsize()} lignes en file)"
+            )
+            return False
+        self._thread = None
+        logger.info(f"Writer de logs arrêté ({self.stats()})")
+        return True
+
+    def flush(self, timeout=5.0):
+        """Attend que toutes les lignes en file soient écrites."""
+        deadline = time.monotonic() + timeout
+        while self.running and self._queue.unfinished_tasks:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def submit(self, client_id, score, decision, features, latency=None, stages=None):
+        """Dépose une prédiction dans la file (non bloquant)."""
+        if not self.running and not self._start_lazily():
+            # Pas de base configurée, writer arrêté ou base inutilisable :
+            # ligne abandonnée
+            with self._lock:
+                self.dropped += 1
+            return False
+
+        row = build_log_row(client_id, score, decision, features, latency, stages)
+
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+
+        with self._lock:
+            self.queued += 1
+        return True
+
+    def _start_lazily(self):
+        """Démarre le thread sur `db_path` s'il est connu, que le writer n'a
+        pas été arrêté (scripts, tests) et que le délai suivant un échec
+        d'ouverture de la base est écoulé."""
+        if (
+            self.db_path is None
+            or self._stop.is_set()
+            or time.monotonic() < self._retry_at
+        ):
+            return False
+        self.start(self.db_path)
+        return True
+
+    def submit_many(self, records):
+        """Dépose un lot de prédictions (dicts avec les clés client_id, score,
+        decision, features et, optionnelles, latency et stages)."""
+        for r in records:
+            self.submit(
+                r["client_id"],
+                r["score"],
+                r["decision"],
+                r["features"],
+                r.get("latency"),
+                r.get("stages"),
+            )
+
+    def stats(self):
+        """Compteurs du writer (pour le monitoring)."""
+        return {
+            "running": self.running,
+            "queue_depth": self._queue.qsize(),
+            "queued": self.queued,
+            "dropped": self.dropped,
+            "written": self.written,
+            "failed": self.failed,
+            "error": self.error,
+        }
+
+    def _run(self):
+        conn = None
+        try:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        except sqlite3.Error as e:
+            if conn is not None:
+                conn.close()
+            self._fail(e)
+            return
+        self.error = None
+        query = insert_log_query()
+
+        try:
+            while not (self._stop.is_set() and self._queue.empty()):
+                batch = self._next_batch()
+                if batch:
+                    self._write(conn, query, batch)
+        finally:
+            conn.close()
+
+    def _fail(self, error):
+        """Base inutilisable : lignes en file comptées en échec, prochain
+        démarrage différé de `retry_interval` secondes."""
+        self.error = str(error)
+        self._retry_at = time.monotonic() + self.retry_interval
+        logger.error(
+            f"Writer de logs : base {self.db_path} inutilisable ({error}), "
+            f"nouvel essai dans {self.retry_interval}s"
+        )
+        discarded = 0
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._queue.task_done()
+            discarded += 1
+        with self._lock:
+            self.failed += discarded
+
+    def _next_batch(self):
+        """Accumule jusqu'à `batch_size` lignes ou `flush_interval` secondes."""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, conn, query, batch):
+        try:
+            with conn:
+                conn.executemany(query, batch)
+            with self._lock:
+                self.written += len(batch)
+        except sqlite3.Error as e:
+            with self._lock:
+                self.failed += len(batch)
+            logger.error(f"Erreur écriture des logs ({len(batch)} lignes) : {e}")
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+
+# Instance globale utilisée par l'API
+log_writer = PredictionLogWriter()
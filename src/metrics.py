@@ -0,0 +1,268 @@
+import bisect
+import math
+import os
+import threading
+import time
+
+# Métriques au format texte de Prometheus (exposées par GET /metrics).
+#
+# Compteurs et histogrammes sont mis à jour sur le chemin des requêtes : un
+# incrément est une addition sous un verrou non contendu (pas d'E/S, pas
+# d'allocation hors première apparition d'un jeu de labels). Les valeurs
+# tenues par les composants (caches, writer de logs, admission...) ne sont
+# lues qu'au scrape, par des collecteurs. Les métriques sont propres au
+# processus : avec plusieurs workers (src/api/serve.py), chaque scrape
+# interroge l'un d'eux et tous ses échantillons portent le label `worker`
+# (PID), pour que Prometheus tienne une série par worker (à agréger par
+# `sum without (worker)`) au lieu de mélanger leurs compteurs.
+
+# Bornes des histogrammes de latence (secondes)
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Metric:
+    """Base des métriques : nom, aide, noms de labels et valeurs par labels."""
+
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, label_values):
+        if len(label_values) != len(self.labels):
+            raise ValueError(
+                f"{self.name} : {len(self.labels)} labels attendus "
+                f"({', '.join(self.labels)}), {len(label_values)} reçus"
+            )
+        # Valeurs brutes (converties en texte au scrape seulement)
+        return label_values
+
+    def samples(self):
+        """Échantillons `(suffixe, labels, valeur)` (labels : dict)."""
+        with self._lock:
+            items = list(self._values.items())
+        return [("", dict(zip(self.labels, key)), value) for key, value in items]
+
+
+class Counter(Metric):
+    """Compteur monotone (suffixe `_total` attendu dans le nom)."""
+
+    kind = "counter"
+
+    def inc(self, *label_values, amount=1):
+        key = self._key(label_values)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Collected(Metric):
+    """Métrique construite au scrape par un collecteur, à partir de valeurs
+    tenues par un composant (compteurs de `stats()`, jauges)."""
+
+    def __init__(self, kind, name, documentation):
+        super().__init__(name, documentation)
+        self.kind = kind
+        self._samples = []
+
+    def add(self, value, **labels):
+        if value is not None:
+            self._samples.append(("", labels, value))
+        return self
+
+    def add_histogram(self, bounds, counts, total, **labels):
+        self._samples.extend(histogram_samples(labels, bounds, counts, total))
+        return self
+
+    def samples(self):
+        return list(self._samples)
+
+
+class Histogram(Metric):
+    """Histogramme à bornes fixes (`_bucket` cumulés, `_sum`, `_count`)."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *label_values):
+        key = self._key(label_values)
+        # Premier intervalle dont la borne est >= value (dernier : +Inf)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def time(self, *label_values):
+        """`with histogram.time(*labels):` observe la durée du bloc."""
+        return _Timer(self, label_values)
+
+    def samples(self):
+        with self._lock:
+            items = [
+                (key, list(counts), total)
+                for key, (counts, total) in self._values.items()
+            ]
+        samples = []
+        for key, counts, total in items:
+            labels = dict(zip(self.labels, key))
+            samples.extend(histogram_samples(labels, self.buckets, counts, total))
+        return samples
+
+
+class _Timer:
+    __slots__ = ("histogram", "label_values", "start")
+
+    def __init__(self, histogram, label_values):
+        self.histogram = histogram
+        self.label_values = label_values
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.label_values)
+        return False
+
+
+def histogram_samples(labels, bounds, counts, total):
+    """Échantillons d'un histogramme à partir des effectifs par intervalle
+    (non cumulés ; un effectif de plus que de bornes pour +Inf)."""
+    samples = []
+    cumulative = 0
+    for bound, count in zip(bounds, counts):
+        cumulative += count
+        samples.append(("_bucket", {**labels, "le": _format_value(bound)}, cumulative))
+    cumulative += sum(counts[len(bounds) :])
+    samples.append(("_bucket", {**labels, "le": "+Inf"}, cumulative))
+    samples.append(("_sum", labels, total))
+    samples.append(("_count", labels, cumulative))
+    return samples
+
+
+class Registry:
+    """Métriques enregistrées et collecteurs appelés au scrape.
+
+    Un collecteur est une fonction sans argument qui retourne des métriques
+    construites à la volée (ex. jauges lues dans les `stats()` des
+    composants). Avec `worker_label`, chaque échantillon reçoit en plus ce
+    label, valant le PID du processus au moment du scrape (après le fork
+    des workers).
+    """
+
+    def __init__(self, worker_label=None):
+        self.worker_label = worker_label
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Métrique déjà enregistrée : {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def add_collector(self, collector):
+        with self._lock:
+            self._collectors.append(collector)
+        return collector
+
+    def collect(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        for collector in collectors:
+            metrics.extend(collector())
+        return metrics
+
+    def render(self):
+        """Toutes les métriques au format texte de Prometheus."""
+        extra = {self.worker_label: os.getpid()} if self.worker_label else None
+        return render(self.collect(), extra)
+
+
+def render(metrics, extra_labels=None):
+    lines = []
+    for metric in metrics:
+        lines.append(f"# HELP {metric.name} {_escape_help(metric.documentation)}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for suffix, labels, value in metric.samples():
+            if extra_labels:
+                labels = {**labels, **extra_labels}
+            lines.append(
+                f"{metric.name}{suffix}{_format_labels(labels)} {_format_value(value)}"
+            )
+    return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape_label(value)}"' for name, value in labels.items()
+    )
+    return "{" + pairs + "}"
+
+
+def _escape_help(text):
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value):
+    value = float(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(int(value)) if value.is_integer() else repr(value)
+
+
+def process_resident_memory_bytes():
+    """Mémoire résidente du processus (Linux : /proc/self/statm), ou None."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+# Registre global (un par processus, échantillons étiquetés par worker)
+REGISTRY = Registry(worker_label="worker")
+
+
+def counter(name, documentation, labels=()):
+    return REGISTRY.register(Counter(name, documentation, labels))
+
+
+def histogram(name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+    return REGISTRY.register(Histogram(name, documentation, labels, buckets))
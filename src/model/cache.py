@@ -0,0 +1,199 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+
+import numpy as np
+
+# Configuration (surchargeable par variables d'environnement)
+PREDICTION_CACHE_MAX_ENTRIES = int(os.getenv("PREDICTION_CACHE_MAX_ENTRIES", "10000"))
+PREDICTION_CACHE_MAX_BYTES = int(
+    os.getenv("PREDICTION_CACHE_MAX_BYTES", str(64 * 1024 * 1024))
+)
+# Durée de vie d'une entrée en secondes (0 = pas d'expiration)
+PREDICTION_CACHE_TTL = float(os.getenv("PREDICTION_CACHE_TTL", "3600"))
+
+# Surcoût estimé d'une entrée (clé, OrderedDict, tuple interne)
+ENTRY_OVERHEAD = 200
+
+
+class ShapExplanation:
+    """
+    Explication SHAP compacte d'un client : les `k` features les plus
+    importantes (indices int32 + valeurs float32, triées par |valeur|
+    décroissante) et la valeur de base. Quelques centaines d'octets au lieu
+    d'un objet `shap.Explanation` complet.
+    """
+
+    __slots__ = ("base_value", "indices", "values")
+
+    def __init__(self, indices, values, base_value):
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.values = np.asarray(values, dtype=np.float32)
+        self.base_value = float(base_value)
+
+    @property
+    def nbytes(self):
+        return self.indices.nbytes + self.values.nbytes + 8
+
+    def as_dict(self, feature_names):
+        """{nom de feature: valeur SHAP}, dans l'ordre d'importance.
+
+        `feature_names` : liste ou tableau NumPy (indexation vectorisée).
+        """
+        if isinstance(feature_names, np.ndarray):
+            names = feature_names[self.indices].tolist()
+        else:
+            names = [feature_names[i] for i in self.indices.tolist()]
+        return dict(zip(names, self.values.tolist()))
+
+    def __eq__(self, other):
+        if not isinstance(other, ShapExplanation):
+            return NotImplemented
+        return (
+            np.array_equal(self.indices, other.indices)
+            and np.array_equal(self.values, other.values)
+            and self.base_value == other.base_value
+        )
+
+    def __repr__(self):
+        return f"ShapExplanation(k={len(self.indices)}, base_value={self.base_value})"
+
+
+def top_k_indices(values, k):
+    """Indices des `k` plus fortes valeurs absolues (dernier axe), par ordre
+    décroissant.
+
+    `argpartition` (linéaire) isole les `k` candidats, seuls ces `k` éléments
+    sont ensuite triés. Fonctionne sur une ligne (n_features,) comme sur un
+    lot (n, n_features).
+    """
+    magnitude = np.abs(np.asarray(values))
+    n_features = magnitude.shape[-1]
+    k = max(0, min(k, n_features))
+    if k == n_features:
+        return np.argsort(-magnitude, axis=-1, kind="stable")
+    candidates = np.argpartition(-magnitude, k - 1, axis=-1)[..., :k]
+    order = np.argsort(
+        -np.take_along_axis(magnitude, candidates, axis=-1), axis=-1, kind="stable"
+    )
+    return np.take_along_axis(candidates, order, axis=-1)
+
+
+def top_k_shap(row, base_value, k):
+    """Réduit une ligne de valeurs SHAP à ses `k` valeurs les plus fortes."""
+    row = np.asarray(row)
+    indices = top_k_indices(row, k)
+    return ShapExplanation(indices, row[indices], base_value)
+
+
+def top_k_rows(values, k):
+    """Version vectorisée de `top_k_shap` : (indices, valeurs) de forme (n, k)."""
+    values = np.asarray(values)
+    indices = top_k_indices(values, k)
+    return indices.astype(np.int32), np.take_along_axis(values, indices, axis=1)
+
+
+class PredictionCache:
+    """
+    Cache LRU des scores et explications, borné en entrées et en octets.
+
+    Les clés sont des tuples `(type, client_id, version du modèle, version des
+    données, ...)` : un changement de modèle ou de ligne client rend les
+    anciennes entrées inaccessibles (elles sortent ensuite par LRU ou TTL).
+    Thread-safe ; les compteurs hits/misses/évictions alimentent le monitoring.
+    """
+
+    def __init__(
+        self,
+        max_entries=PREDICTION_CACHE_MAX_ENTRIES,
+        max_bytes=PREDICTION_CACHE_MAX_BYTES,
+        ttl=PREDICTION_CACHE_TTL,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = Counter()
+        self.misses = Counter()
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        """Valeur en cache pour `key`, ou None (absente ou expirée)."""
+        kind = key[0]
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses[kind] += 1
+                return None
+            value, _size, expires_at = entry
+            if expires_at is not None and time.monotonic() >= expires_at:
+                self._remove(key)
+                self.expirations += 1
+                self.misses[kind] += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits[kind] += 1
+            return value
+
+    def set(self, key, value):
+        """Ajoute une valeur (les entrées les plus anciennes sont évincées)."""
+        if self.max_entries <= 0:
+            return
+        size = _sizeof(value) + ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl > 0 else None
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (value, size, expires_at)
+            self.bytes += size
+            while len(self._data) > self.max_entries or self.bytes > self.max_bytes:
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        _, size, _ = self._data.pop(key)
+        self.bytes -= size
+
+    def clear(self):
+        """Vide le cache (les compteurs sont conservés)."""
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def stats(self):
+        """Taille et compteurs du cache (pour le monitoring)."""
+        with self._lock:
+            hits, misses = sum(self.hits.values()), sum(self.misses.values())
+            return {
+                "entries": len(self._data),
+                "bytes": self.bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "by_kind": {
+                    kind: {"hits": self.hits[kind], "misses": self.misses[kind]}
+                    for kind in sorted(set(self.hits) | set(self.misses))
+                },
+            }
+
+
+def _sizeof(value):
+    nbytes = getattr(value, "nbytes", None)
+    if nbytes is not None:
+        return int(nbytes)
+    return sys.getsizeof(value)
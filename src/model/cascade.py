@@ -0,0 +1,228 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Configuration (surchargeable par variables d'environnement)
+# 1 : score seul (explain=none) en cascade, avec arrêt anticipé
+SCORING_CASCADE = os.getenv("SCORING_CASCADE", "0") == "1"
+# Calibration produite par `python -m src.model.cascade`
+CASCADE_CONFIG_PATH = os.getenv("CASCADE_CONFIG_PATH", "data/cascade.json")
+
+# Calibration : nombres d'arbres testés pour le premier étage, part des
+# clients utilisée pour fixer la borne (le reste sert à la mesurer) et
+# accord minimal exigé avec le modèle complet
+CASCADE_STAGES = (25, 50, 100, 200, 400)
+CALIBRATION_FRACTION = 0.5
+TARGET_AGREEMENT = 0.999
+
+
+class CascadeScorer:
+    """
+    Scoring en deux étages avec arrêt anticipé.
+
+    Les `n_trees` premiers arbres donnent un score brut partiel ; si son
+    écart au seuil de décision (en log-odds) dépasse la borne calibrée
+    `bound`, le reste de la forêt ne peut pas, d'après la calibration,
+    inverser la décision : on s'arrête là (score approché, `early_exit`).
+    Sinon les arbres restants sont évalués et le score est exact.
+    """
+
+    def __init__(self, scorer, n_trees, bound, threshold=0.5, model_version=None):
+        self.scorer = scorer
+        self.n_trees = int(n_trees)
+        self.bound = float(bound)
+        self.threshold = float(threshold)
+        self.model_version = model_version
+        self.margin_threshold = float(scorer.to_raw_score(threshold))
+        self._lock = threading.Lock()
+        self.rows = 0
+        self.early_exits = 0
+        self.trees_evaluated = 0
+
+    @classmethod
+    def load(cls, path, scorer):
+        """Charge une calibration écrite par `save`."""
+        with open(path, encoding="utf-8") as f:
+            config = json.load(f)
+        return cls(
+            scorer,
+            config["n_trees"],
+            config["bound"],
+            threshold=config["threshold"],
+            model_version=config.get("model_version"),
+        )
+
+    def save(self, path, report=None):
+        """Écrit la calibration (et le rapport de calibration) en JSON."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        config = {
+            "n_trees": self.n_trees,
+            "bound": self.bound,
+            "threshold": self.threshold,
+            "model_version": self.model_version,
+            "total_trees": self.scorer.trees.n_trees,
+        }
+        if report is not None:
+            config["calibration"] = report
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(config, f, indent=2)
+
+    def score(self, X):
+        """Probabilités de la classe 1 et indicateur d'arrêt anticipé par ligne.
+
+        Returns:
+            tuple: (probabilités (n,), early_exit (n,) bool).
+        """
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        raw = self.scorer.raw_score(X, stop=self.n_trees)
+        early_exit = np.abs(raw - self.margin_threshold) > self.bound
+        rest = ~early_exit
+        if rest.any():
+            raw[rest] += self.scorer.raw_score(X[rest], start=self.n_trees)
+
+        n_rest = int(rest.sum())
+        with self._lock:
+            self.rows += len(X)
+            self.early_exits += len(X) - n_rest
+            self.trees_evaluated += len(X) * self.n_trees + n_rest * (
+                self.scorer.trees.n_trees - self.n_trees
+            )
+        return self.scorer.to_proba(raw), early_exit
+
+    def stats(self):
+        """Configuration et compteurs de la cascade (pour le monitoring)."""
+        with self._lock:
+            rows = self.rows
+            return {
+                "n_trees": self.n_trees,
+                "total_trees": self.scorer.trees.n_trees,
+                "bound": self.bound,
+                "threshold": self.threshold,
+                "rows": rows,
+                "early_exits": self.early_exits,
+                "early_exit_rate": self.early_exits / rows if rows else 0.0,
+                "avg_trees_evaluated": self.trees_evaluated / rows if rows else 0.0,
+            }
+
+
+def calibrate(
+    scorer,
+    X,
+    stages=CASCADE_STAGES,
+    threshold=0.5,
+    target_agreement=TARGET_AGREEMENT,
+    calibration_fraction=CALIBRATION_FRACTION,
+    seed=0,
+):
+    """Calibre la cascade sur les lignes de `X` (ex. table clients).
+
+    Pour chaque premier étage candidat, la borne est le plus grand écart
+    |score complet - score partiel| observé sur la partie calibration ;
+    l'accord des décisions, le taux d'arrêt et le nombre moyen d'arbres
+    évalués sont mesurés sur l'autre partie. L'étage retenu est celui qui
+    évalue le moins d'arbres en moyenne avec un accord >= `target_agreement`.
+
+    Returns:
+        tuple: (étage retenu (dict) ou None, rapport de tous les étages).
+    """
+    total_trees = scorer.trees.n_trees
+    rng = np.random.default_rng(seed)
+    is_calibration = rng.random(len(X)) < calibration_fraction
+    margin_threshold = scorer.to_raw_score(threshold)
+
+    report = []
+    partial = np.zeros(len(X))
+    done = 0
+    for n_trees in sorted(s for s in stages if 0 < s < total_trees):
+        # Scores partiels cumulés étage par étage (chaque arbre évalué une fois)
+        partial += scorer.raw_score(X, start=done, stop=n_trees)
+        done = n_trees
+        report.append({"n_trees": n_trees, "partial": partial.copy()})
+    full = partial + scorer.raw_score(X, start=done)
+    full_decision = full > margin_threshold
+
+    for stage in report:
+        stage_partial = stage.pop("partial")
+        rest = np.abs(full - stage_partial)
+        bound = float(rest[is_calibration].max()) if is_calibration.any() else 0.0
+
+        held_out = ~is_calibration
+        early = np.abs(stage_partial - margin_threshold) > bound
+        decision = np.where(early, stage_partial > margin_threshold, full_decision)
+        agreement = float(np.mean(decision[held_out] == full_decision[held_out]))
+        early_rate = float(early[held_out].mean())
+        stage.update(
+            {
+                "bound": bound,
+                "agreement": agreement,
+                "early_exit_rate": early_rate,
+                "avg_trees_evaluated": stage["n_trees"]
+                + (1 - early_rate) * (total_trees - stage["n_trees"]),
+            }
+        )
+
+    eligible = [s for s in report if s["agreement"] >= target_agreement]
+    best = min(eligible, key=lambda s: s["avg_trees_evaluated"], default=None)
+    return best, report
+
+
+if __name__ == "__main__":
+    # Usage : python -m src.model.cascade [db_path] [output_path] [agreement]
+    from src.model.feature_store import FeatureStore
+    from src.model.loader import loader
+
+    DB_FILE = sys.argv[1] if len(sys.argv) > 1 else loader.db_path
+    OUTPUT_FILE = sys.argv[2] if len(sys.argv) > 2 else CASCADE_CONFIG_PATH
+    AGREEMENT = float(sys.argv[3]) if len(sys.argv) > 3 else TARGET_AGREEMENT
+    THRESHOLD = 0.5  # Seuil de décision de l'API (DECISION_THRESHOLD)
+
+    if not os.path.exists(DB_FILE):
+        print(f"Erreur : La base {DB_FILE} n'existe pas.")
+        sys.exit(1)
+
+    loader.load_artifacts()
+    scorer = loader.get_tree_scorer()
+    if scorer is None:
+        print("Erreur : modèle LightGBM indisponible.")
+        sys.exit(1)
+    features = FeatureStore.from_sqlite(DB_FILE, loader.get_model_feature_names())
+
+    print(f"Calibration de la cascade sur {len(features)} clients ({DB_FILE})")
+    start_time = time.time()
+    best, report = calibrate(
+        scorer, features.matrix, threshold=THRESHOLD, target_agreement=AGREEMENT
+    )
+    for stage in report:
+        print(
+            f"{stage['n_trees']:>4} arbres | borne {stage['bound']:.3f} | "
+            f"accord {stage['agreement']:.4%} | "
+            f"arrêt anticipé {stage['early_exit_rate']:.1%} | "
+            f"{stage['avg_trees_evaluated']:.0f} arbres en moyenne"
+        )
+    print(f"Calibration terminée en {time.time() - start_time:.2f} secondes.")
+
+    if best is None:
+        print(f"Aucun étage n'atteint un accord de {AGREEMENT:.2%} : rien n'est écrit.")
+        sys.exit(1)
+    CascadeScorer(
+        scorer,
+        best["n_trees"],
+        best["bound"],
+        threshold=THRESHOLD,
+        model_version=loader.model_version,
+    ).save(OUTPUT_FILE, report)
+    print(
+        f"Cascade retenue : {best['n_trees']} arbres, borne {best['bound']:.3f} "
+        f"-> {OUTPUT_FILE}"
+    )
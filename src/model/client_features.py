@@ -0,0 +1,122 @@
+import hashlib
+
+import numpy as np
+
+# Colonnes de la table clients qui ne sont pas des features du modèle
+NON_FEATURE_COLUMNS = ["TARGET", "SK_ID_CURR"]
+
+
+class ClientFeatures:
+    """
+    Features d'un client, récupérées une seule fois par requête.
+
+    Les valeurs sont stockées sous forme d'un vecteur float32 dans l'ordre
+    d'entrée du modèle ; le DataFrame n'est construit qu'à la demande (fallback
+    Joblib). L'objet est partagé entre le scoring, l'explicabilité SHAP et le
+    logging. Deux instances sont égales si elles portent sur le même client
+    avec les mêmes valeurs (`data_version`, empreinte également utilisée par
+    les clés de cache des scores et explications).
+    """
+
+    __slots__ = (
+        "_data_version",
+        "_frame",
+        "_index",
+        "client_id",
+        "feature_names",
+        "vector",
+    )
+
+    def __init__(self, client_id, vector, feature_names, index=None):
+        self.client_id = int(client_id)
+        self.vector = vector
+        self.feature_names = feature_names
+        # Index nom -> position, partagé entre requêtes quand il est fourni
+        self._index = index
+        self._frame = None
+        self._data_version = None
+
+    @classmethod
+    def from_frame(cls, df, client_id=None):
+        """Construit l'objet depuis un DataFrame d'une ligne (None si vide)."""
+        if df is None or df.empty:
+            return None
+        import pandas as pd
+
+        if client_id is None:
+            client_id = df.iloc[0]["SK_ID_CURR"]
+        features = df.drop(columns=NON_FEATURE_COLUMNS, errors="ignore")
+        features = features.apply(pd.to_numeric, errors="coerce")
+        vector = features.iloc[0].to_numpy(dtype=np.float32)
+        return cls(client_id, vector, features.columns.tolist())
+
+    @property
+    def values(self):
+        """Matrice float32 (1, n_features) attendue par ONNX."""
+        return self.vector.reshape(1, -1)
+
+    @property
+    def features(self):
+        """DataFrame (1, n_features), construit uniquement si nécessaire."""
+        if self._frame is None:
+            import pandas as pd
+
+            self._frame = pd.DataFrame(self.values, columns=self.feature_names)
+        return self._frame
+
+    @property
+    def data_version(self):
+        """Empreinte de la ligne de features (change si les données changent)."""
+        if self._data_version is None:
+            self._data_version = data_digest(self.vector)
+        return self._data_version
+
+    def get(self, name, default=None):
+        """Valeur d'une feature par son nom (interface dict pour le logging)."""
+        if self._index is None:
+            self._index = {n: i for i, n in enumerate(self.feature_names)}
+        i = self._index.get(name)
+        return default if i is None else self.vector[i]
+
+    def __hash__(self):
+        return hash((self.client_id, self.data_version))
+
+    def __eq__(self, other):
+        if not isinstance(other, ClientFeatures):
+            return NotImplemented
+        return (self.client_id, self.data_version) == (
+            other.client_id,
+            other.data_version,
+        )
+
+    def __repr__(self):
+        return f"ClientFeatures(client_id={self.client_id})"
+
+
+def data_digest(vector):
+    """Empreinte courte (blake2b, 16 caractères hexa) d'un vecteur float32."""
+    return hashlib.blake2b(vector.tobytes(), digest_size=8).hexdigest()
+
+
+def row_to_vector(row):
+    """Convertit une ligne SQLite en vecteur float32 (NULL -> NaN)."""
+    try:
+        return np.array(row, dtype=np.float32)
+    except (ValueError, TypeError):
+        # Valeurs non numériques (texte) : conversion élément par élément
+        return np.array([_to_float(v) for v in row], dtype=np.float32)
+
+
+def rows_to_matrix(rows):
+    """Convertit des lignes SQLite en matrice float32 (NULL -> NaN)."""
+    try:
+        return np.array(rows, dtype=np.float32)
+    except (ValueError, TypeError):
+        return np.array([row_to_vector(r) for r in rows], dtype=np.float32)
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return np.nan
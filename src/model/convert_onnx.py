@@ -1,55 +1,212 @@
+import json
+import sqlite3
+import sys
+import time
 import joblib
+import numpy as np
+import onnx
+from onnx import version_converter
 from onnxmltools.convert.common.data_types import FloatTensorType as ONNXFloatTensorType
+from onnxmltools.convert.common.onnx_ex import get_maximum_opset_supported
 import onnxmltools
 from pathlib import Path
 
+from src.model.client_features import rows_to_matrix
+from src.model.onnx_sessions import FEATURE_NAMES_KEY
 
-def convert_model():
-    model_path = Path("src/model/model.joblib")
-    onnx_path = Path("src/model/model.onnx")
+# Contrôle de parité avant écriture : nombre de lignes comparées et écart
+# maximal toléré sur la probabilité (float32 ONNX vs float64 LightGBM)
+PARITY_ROWS = 1000
+PARITY_TOLERANCE = 1e-5
+# Dimension de lot symbolique des entrées/sorties du graphe
+BATCH_DIM = "N"
+
+
+def get_classifier(model):
+    """Classifieur final (étape `clf` si le modèle est un Pipeline)."""
+    if hasattr(model, "named_steps"):
+        return model.named_steps["clf"]
+    return model
+
+
+def get_n_features(model):
+    """Nombre de features en entrée, lu sur le modèle lui-même."""
+    for estimator in (model, get_classifier(model)):
+        n_features = getattr(estimator, "n_features_in_", None)
+        if n_features is not None:
+            return int(n_features)
+    return None
+
+
+def make_batch_dynamic(onx, batch_dim=BATCH_DIM):
+    """Remplace la 1re dimension des entrées/sorties par une dimension libre.
+
+    Le converter LightGBM fixe la sortie `label` à un lot de 1 : ONNX Runtime
+    avertit alors à chaque appel sur un lot de plusieurs lignes.
+    """
+    for value in list(onx.graph.input) + list(onx.graph.output):
+        dims = value.type.tensor_type.shape.dim
+        if len(dims):
+            dims[0].Clear()
+            dims[0].dim_param = batch_dim
+    return onx
+
+
+def pin_opset(onx, target_opset):
+    """Déclare exactement `target_opset` (et l'opset ai.onnx.ml associé).
+
+    Le converter ne déclare que l'opset minimal des nœuds émis (9 pour un
+    LightGBM) : `target_opset` n'est qu'une borne haute. Le domaine par
+    défaut est migré par le version converter d'ONNX ; l'opset ai.onnx.ml et
+    la version IR sont ceux de la release d'ONNX qui a introduit l'opset.
+    """
+    release = next(row for row in onnx.helper.VERSION_TABLE if row[2] == target_opset)
+    _, ir_version, _, ml_opset = release[:4]
+    onx = version_converter.convert_version(onx, target_opset)
+    for opset in onx.opset_import:
+        if opset.domain == "ai.onnx.ml":
+            opset.version = max(opset.version, ml_opset)
+    onx.ir_version = max(onx.ir_version, ir_version)
+    onnx.checker.check_model(onx)
+    return onx
+
+
+def set_feature_names(onx, feature_names):
+    """Enregistre l'ordre d'entrée des features dans les métadonnées du modèle
+    (lu par l'API sans charger le modèle Joblib, cf. `session_feature_names`)."""
+    if feature_names is not None:
+        onnx.helper.set_model_props(
+            onx, {FEATURE_NAMES_KEY: json.dumps(list(feature_names))}
+        )
+    return onx
+
+
+def sample_rows(n_rows, n_features, db_path=None, feature_names=None, seed=0):
+    """Lignes de contrôle : clients de la base si disponible, sinon synthétiques."""
+    if db_path is not None and feature_names is not None and Path(db_path).exists():
+        select = ", ".join(f'"{c}"' for c in feature_names)
+        conn = sqlite3.connect(db_path)
+        try:
+            rows = conn.execute(
+                f"SELECT {select} FROM clients LIMIT ?", (n_rows,)
+            ).fetchall()
+        finally:
+            conn.close()
+        if rows:
+            return rows_to_matrix(rows)
+
+    # Valeurs centrées-réduites avec ~5 % de manquants
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, n_features)).astype(np.float32)
+    X[rng.random(X.shape) < 0.05] = np.nan
+    return X
+
+
+def check_parity(model, session, X):
+    """Écart maximal |p_onnx - p_joblib| sur la probabilité de la classe 1."""
+    input_name = session.get_inputs()[0].name
+    onnx_proba = session.run(None, {input_name: X})[1][:, 1]
+    joblib_proba = model.predict_proba(X)[:, 1]
+    return float(np.max(np.abs(onnx_proba - joblib_proba)))
+
+
+def compare_timings(model, session, X, n_single=200):
+    """Latence moyenne (ms) ONNX vs joblib : une ligne, puis tout le lot."""
+    input_name = session.get_inputs()[0].name
+    runners = {
+        "onnx": lambda rows: session.run(None, {input_name: rows}),
+        "joblib": lambda rows: model.predict_proba(rows),
+    }
+    timings = {}
+    for name, run in runners.items():
+        run(X[:1])
+        start = time.perf_counter()
+        for i in range(n_single):
+            run(X[i % len(X) : i % len(X) + 1])
+        single = (time.perf_counter() - start) / n_single * 1000
+        start = time.perf_counter()
+        run(X)
+        batch = (time.perf_counter() - start) * 1000
+        timings[name] = {"single_ms": single, "batch_ms": batch}
+    return timings
+
+
+def convert_model(
+    model_path="src/model/model.joblib",
+    onnx_path="src/model/model.onnx",
+    db_path=None,
+    parity_rows=PARITY_ROWS,
+    tolerance=PARITY_TOLERANCE,
+    target_opset=None,
+):
+    """Convertit le modèle joblib en ONNX (sortie tenseur, lot dynamique).
+
+    Le fichier n'est écrit que si la parité avec le pipeline joblib est
+    vérifiée sur `parity_rows` lignes (écart <= `tolerance`).
+    """
+    import onnxruntime as ort
+
+    model_path = Path(model_path)
+    onnx_path = Path(onnx_path)
 
     if not model_path.exists():
         print(f"Error: {model_path} not found.")
-        return
+        return None
 
     print(f"Loading model from {model_path}...")
     model = joblib.load(model_path)
+    lgbm_model = get_classifier(model)
 
-    # Détection du nombre de features
-    from src.model.loader import loader
-
-    sample = loader.get_client_data(100004)
-    if sample is not None:
-        features = sample.drop(columns=["TARGET", "SK_ID_CURR"], errors="ignore")
-        n_features = features.shape[1]
-    else:
+    n_features = get_n_features(model)
+    if n_features is None:
         print("Error: Could not determine feature count.")
-        return
-
+        return None
     print(f"Detected {n_features} features.")
 
     # Utilisation du type spécifique onnxmltools
     initial_type = [("float_input", ONNXFloatTensorType([None, n_features]))]
+    target_opset = target_opset or get_maximum_opset_supported()
 
-    print("Converting LightGBM to ONNX...")
+    print(f"Converting LightGBM to ONNX (opset {target_opset}, no ZipMap)...")
     try:
-        # Extraction du classifieur si c'est un Pipeline
-        if hasattr(model, "named_steps"):
-            lgbm_model = model.named_steps["clf"]
-        else:
-            lgbm_model = model
-
+        # zipmap=False : probabilités en tenseur (n, 2) au lieu de dicts
         onx = onnxmltools.convert_lightgbm(
-            lgbm_model, initial_types=initial_type, target_opset=12
+            lgbm_model,
+            initial_types=initial_type,
+            target_opset=target_opset,
+            zipmap=False,
         )
-
-        with open(onnx_path, "wb") as f:
-            f.write(onx.SerializeToString())
-
-        print(f"Success! Model saved to {onnx_path}")
+        onx = make_batch_dynamic(pin_opset(onx, target_opset))
+        session = ort.InferenceSession(onx.SerializeToString())
     except Exception as e:
         print(f"Conversion failed: {e}")
+        return None
+
+    feature_names = getattr(lgbm_model, "feature_name_", None)
+    set_feature_names(onx, feature_names)
+    X = sample_rows(parity_rows, n_features, db_path, feature_names)
+    max_diff = check_parity(model, session, X)
+    print(f"Parity on {len(X)} rows: max |p_onnx - p_joblib| = {max_diff:.2e}")
+    if not max_diff <= tolerance:
+        print(f"Error: parity check failed (tolerance {tolerance:.0e}).")
+        return None
+
+    timings = compare_timings(model, session, X)
+    for name, t in timings.items():
+        print(
+            f"{name:<6} single row: {t['single_ms']:.3f} ms | "
+            f"batch of {len(X)}: {t['batch_ms']:.1f} ms"
+        )
+
+    with open(onnx_path, "wb") as f:
+        f.write(onx.SerializeToString())
+
+    print(f"Success! Model saved to {onnx_path}")
+    return {"max_abs_diff": max_diff, "timings": timings}
 
 
 if __name__ == "__main__":
-    convert_model()
+    # Usage : python -m src.model.convert_onnx [db_path] [parity_rows]
+    DB_FILE = sys.argv[1] if len(sys.argv) > 1 else None
+    ROWS = int(sys.argv[2]) if len(sys.argv) > 2 else PARITY_ROWS
+    convert_model(db_path=DB_FILE, parity_rows=ROWS)
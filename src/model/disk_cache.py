@@ -0,0 +1,270 @@
+import logging
+import os
+import queue
+import sqlite3
+import struct
+import threading
+import time
+
+import numpy as np
+
+from src.model.cache import ShapExplanation
+
+logger = logging.getLogger(__name__)
+
+# Configuration (surchargeable par variables d'environnement)
+# Fichier SQLite du cache persistant (vide = cache persistant désactivé)
+PERSISTENT_CACHE_PATH = os.getenv("PERSISTENT_CACHE_PATH", "")
+PERSISTENT_CACHE_QUEUE_SIZE = int(os.getenv("PERSISTENT_CACHE_QUEUE_SIZE", "10000"))
+PERSISTENT_CACHE_BATCH_SIZE = int(os.getenv("PERSISTENT_CACHE_BATCH_SIZE", "200"))
+PERSISTENT_CACHE_FLUSH_INTERVAL_MS = int(
+    os.getenv("PERSISTENT_CACHE_FLUSH_INTERVAL_MS", "200")
+)
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS prediction_cache (
+        key TEXT PRIMARY KEY,
+        model_version TEXT,
+        value BLOB NOT NULL,
+        created_at REAL NOT NULL
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_prediction_cache_model
+    ON prediction_cache (model_version)
+    """,
+]
+
+INSERT_QUERY = (
+    "INSERT OR REPLACE INTO prediction_cache (key, model_version, value, created_at) "
+    "VALUES (?, ?, ?, ?)"
+)
+SELECT_QUERY = "SELECT value FROM prediction_cache WHERE key = ?"
+
+# Encodage binaire des valeurs : tag, puis float64 (score) ou
+# base_value float64 + k int32 + indices int32[k] + valeurs float32[k]
+_SCORE = struct.Struct("<cd")
+_EXPLANATION = struct.Struct("<cdi")
+
+
+class PersistentCache:
+    """
+    Second niveau de cache (disque), consulté après le cache mémoire.
+
+    Les entrées sont stockées dans une base SQLite dédiée (mode WAL) avec les
+    mêmes clés que `PredictionCache` (client, version du modèle, empreinte de
+    la ligne de features) : elles restent valides après un redémarrage et sont
+    partagées entre les workers uvicorn d'une même machine. Les écritures sont
+    différées (write-behind) : un thread dédié vide une file bornée par
+    transactions groupées ; le chemin de la requête ne fait que des lectures.
+    """
+
+    def __init__(
+        self,
+        path,
+        max_queue=PERSISTENT_CACHE_QUEUE_SIZE,
+        batch_size=PERSISTENT_CACHE_BATCH_SIZE,
+        flush_interval_ms=PERSISTENT_CACHE_FLUSH_INTERVAL_MS,
+    ):
+        self.path = str(path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._stop = threading.Event()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.queued = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, keep_model_version=None):
+        """Crée la table si besoin et démarre le thread d'écriture.
+
+        Si `keep_model_version` est fourni, les entrées des autres versions du
+        modèle sont supprimées (elles ne peuvent plus être servies).
+        """
+        if self.running:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                for statement in SCHEMA:
+                    conn.execute(statement)
+                if keep_model_version is not None:
+                    deleted = conn.execute(
+                        "DELETE FROM prediction_cache WHERE model_version != ?",
+                        (keep_model_version,),
+                    ).rowcount
+                    if deleted:
+                        logger.info(
+                            f"Cache persistant : {deleted} entrées d'anciens "
+                            "modèles supprimées"
+                        )
+        finally:
+            conn.close()
+
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="persistent-cache-writer", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"Cache persistant démarré ({self.path})")
+
+    def stop(self, timeout=5.0):
+        """Écrit les entrées en attente puis arrête le thread d'écriture."""
+        if not self.running:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+        logger.info(f"Cache persistant arrêté ({self.stats()})")
+
+    def flush(self, timeout=5.0):
+        """Attend que toutes les entrées en file soient écrites."""
+        deadline = time.monotonic() + timeout
+        while self.running and self._queue.unfinished_tasks:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def get(self, key):
+        """Valeur stockée pour `key`, ou None (absente ou illisible)."""
+        try:
+            row = (
+                self._get_connection()
+                .execute(SELECT_QUERY, (encode_key(key),))
+                .fetchone()
+            )
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lecture du cache persistant : {e}")
+            row = None
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return decode_value(row[0])
+
+    def set(self, key, value):
+        """Dépose une entrée dans la file d'écriture (non bloquant)."""
+        if not self.running:
+            return False
+        row = (encode_key(key), key[2], encode_value(value), time.time())
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        with self._lock:
+            self.queued += 1
+        return True
+
+    def stats(self):
+        """Compteurs du cache persistant (pour le monitoring)."""
+        with self._lock:
+            hits, misses = self.hits, self.misses
+            stats = {
+                "path": self.path,
+                "running": self.running,
+                "file_bytes": (
+                    os.path.getsize(self.path) if os.path.exists(self.path) else 0
+                ),
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+                "queue_depth": self._queue.qsize(),
+                "queued": self.queued,
+                "dropped": self.dropped,
+                "written": self.written,
+                "failed": self.failed,
+            }
+        return stats
+
+    def _get_connection(self):
+        # Une connexion de lecture par thread (les connexions SQLite ne se
+        # partagent pas entre threads)
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path)
+            self._local.conn = conn
+        return conn
+
+    def _run(self):
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        try:
+            while not (self._stop.is_set() and self._queue.empty()):
+                batch = self._next_batch()
+                if batch:
+                    self._write(conn, batch)
+        finally:
+            conn.close()
+
+    def _next_batch(self):
+        """Accumule jusqu'à `batch_size` entrées ou `flush_interval` secondes."""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, conn, batch):
+        try:
+            with conn:
+                conn.executemany(INSERT_QUERY, batch)
+            with self._lock:
+                self.written += len(batch)
+        except sqlite3.Error as e:
+            with self._lock:
+                self.failed += len(batch)
+            logger.error(f"Erreur écriture du cache persistant ({len(batch)}) : {e}")
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+
+def encode_key(key):
+    """Clé texte stable d'une clé de cache (tuple)."""
+    return "|".join(str(part) for part in key)
+
+
+def encode_value(value):
+    """Sérialise un score (float) ou une `ShapExplanation` en octets."""
+    if isinstance(value, ShapExplanation):
+        header = _EXPLANATION.pack(b"E", value.base_value, len(value.indices))
+        return header + value.indices.tobytes() + value.values.tobytes()
+    return _SCORE.pack(b"S", float(value))
+
+
+def decode_value(blob):
+    """Inverse de `encode_value`."""
+    blob = bytes(blob)
+    if blob[:1] == b"S":
+        return _SCORE.unpack(blob)[1]
+    _, base_value, k = _EXPLANATION.unpack_from(blob)
+    offset = _EXPLANATION.size
+    indices = np.frombuffer(blob, dtype=np.int32, count=k, offset=offset)
+    values = np.frombuffer(blob, dtype=np.float32, count=k, offset=offset + 4 * k)
+    return ShapExplanation(indices, values, base_value)
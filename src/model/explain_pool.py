@@ -0,0 +1,319 @@
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from src.model.explainers import EXPLAIN_EXACT, EXPLAIN_FAST, make_explainer
+
+logger = logging.getLogger(__name__)
+
+# Configuration (surchargeable par variables d'environnement)
+# Processus de calcul SHAP (0 = explainers dans le processus de l'API)
+SHAP_WORKERS = int(os.getenv("SHAP_WORKERS", "0"))
+# Lignes par échange avec un processus (taille des segments de mémoire partagée)
+SHAP_POOL_MAX_ROWS = int(os.getenv("SHAP_POOL_MAX_ROWS", "512"))
+# Attente maximale d'une réponse d'un processus (secondes)
+SHAP_POOL_TIMEOUT_S = float(os.getenv("SHAP_POOL_TIMEOUT_S", "60"))
+
+
+def _worker_main(conn, model_path, backend, input_name, output_name, shape):
+    """Boucle d'un processus du pool : explique les lignes du segment d'entrée
+    et écrit valeurs SHAP et valeur de base dans le segment de sortie."""
+    from multiprocessing import shared_memory
+
+    import joblib
+
+    from src.model.explainers import SaabasExplainer
+
+    max_rows, n_features = shape
+    try:
+        model = joblib.load(model_path)
+        if hasattr(model, "named_steps") and "clf" in model.named_steps:
+            model = model.named_steps["clf"]
+        # Un thread par processus : le parallélisme vient du pool
+        explainers = {EXPLAIN_EXACT: make_explainer(model, backend, num_threads=1)}
+        input_shm = shared_memory.SharedMemory(name=input_name)
+        output_shm = shared_memory.SharedMemory(name=output_name)
+    except Exception as e:
+        logger.exception(f"Processus SHAP {os.getpid()} : initialisation impossible")
+        conn.send(("error", f"Initialisation impossible : {e}"))
+        return
+
+    inputs = np.ndarray((max_rows, n_features), dtype=np.float64, buffer=input_shm.buf)
+    # Dernière colonne : valeur de base
+    outputs = np.ndarray(
+        (max_rows, n_features + 1), dtype=np.float64, buffer=output_shm.buf
+    )
+    conn.send(("ready", os.getpid()))
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if message is None:
+            break
+        n_rows, mode = message
+        try:
+            if mode not in explainers:
+                try:
+                    explainers[mode] = SaabasExplainer(model, num_threads=1)
+                except TypeError:
+                    explainers[mode] = explainers[EXPLAIN_EXACT]
+            values, base_values = explainers[mode].explain(inputs[:n_rows])
+            outputs[:n_rows, :-1] = values
+            outputs[:n_rows, -1] = base_values
+            conn.send(("ok", None))
+        except Exception as e:
+            logger.exception(f"Processus SHAP {os.getpid()} : erreur de calcul")
+            conn.send(("error", str(e)))
+
+    del inputs, outputs
+    input_shm.close()
+    output_shm.close()
+
+
+class _Worker:
+    """Processus du pool, sa connexion et ses deux segments de mémoire partagée."""
+
+    def __init__(self, context, model_path, backend, max_rows, n_features):
+        from multiprocessing import shared_memory
+
+        self.input_shm = shared_memory.SharedMemory(
+            create=True, size=max_rows * n_features * 8
+        )
+        self.output_shm = shared_memory.SharedMemory(
+            create=True, size=max_rows * (n_features + 1) * 8
+        )
+        self.inputs = np.ndarray(
+            (max_rows, n_features), dtype=np.float64, buffer=self.input_shm.buf
+        )
+        self.outputs = np.ndarray(
+            (max_rows, n_features + 1), dtype=np.float64, buffer=self.output_shm.buf
+        )
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(
+                child_conn,
+                model_path,
+                backend,
+                self.input_shm.name,
+                self.output_shm.name,
+                (max_rows, n_features),
+            ),
+            name="shap-worker",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+
+    def call(self, message, timeout):
+        self.conn.send(message)
+        return self.receive(timeout)
+
+    def receive(self, timeout):
+        if not self.conn.poll(timeout):
+            raise TimeoutError(f"Pas de réponse du processus SHAP en {timeout}s")
+        return self.conn.recv()
+
+    def close(self):
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(5)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.conn.close()
+        del self.inputs, self.outputs
+        for shm in (self.input_shm, self.output_shm):
+            shm.close()
+            shm.unlink()
+
+
+class ExplainerPool:
+    """
+    Calcul SHAP dans des processus dédiés, hors du processus de l'API.
+
+    Chaque processus construit son explainer à partir de `model.joblib` et
+    possède deux segments de mémoire partagée : les lignes de features y sont
+    copiées par l'API, les valeurs SHAP y sont écrites par le processus ; seuls
+    le nombre de lignes et le mode transitent par le pipe (pas de DataFrame
+    sérialisé). Un lot plus grand que `max_rows` est découpé et réparti sur
+    les processus libres ; le nombre de processus borne les calculs simultanés.
+    """
+
+    def __init__(
+        self,
+        model_path,
+        n_features,
+        workers=SHAP_WORKERS,
+        backend=None,
+        max_rows=SHAP_POOL_MAX_ROWS,
+        timeout=SHAP_POOL_TIMEOUT_S,
+    ):
+        self.model_path = model_path
+        self.n_features = int(n_features)
+        self.n_workers = max(1, int(workers))
+        self.backend = backend
+        self.max_rows = int(max_rows)
+        self.timeout = timeout
+        self._workers = []
+        self._idle = queue.Queue()
+        self._executor = None
+        self._lock = threading.Lock()
+        self.ready = False
+        self.calls = 0
+        self.rows = 0
+        self.waits = 0
+        self.errors = 0
+
+    def start(self):
+        """Lance les processus et attend qu'ils aient chargé le modèle.
+
+        Returns:
+            ExplainerPool: self, ou lève RuntimeError si un processus échoue.
+        """
+        import multiprocessing
+
+        # spawn : le processus de l'API a déjà des threads (ONNX, pools)
+        context = multiprocessing.get_context("spawn")
+        start_time = time.time()
+        try:
+            for _ in range(self.n_workers):
+                self._workers.append(
+                    _Worker(
+                        context,
+                        self.model_path,
+                        self.backend,
+                        self.max_rows,
+                        self.n_features,
+                    )
+                )
+            for worker in self._workers:
+                try:
+                    status, detail = worker.receive(self.timeout)
+                except EOFError:
+                    status, detail = "error", "processus arrêté au démarrage"
+                if status != "ready":
+                    raise RuntimeError(detail)
+        except Exception:
+            self.close()
+            raise
+        for worker in self._workers:
+            self._idle.put(worker)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.n_workers, thread_name_prefix="shap-pool"
+        )
+        self.ready = True
+        logger.info(
+            f"Pool SHAP prêt : {self.n_workers} processus "
+            f"({time.time() - start_time:.2f}s)"
+        )
+        return self
+
+    def explain(self, features, mode=EXPLAIN_EXACT):
+        """Valeurs SHAP (n, n_features) et valeurs de base (n,) d'un lot."""
+        if not self.ready:
+            raise RuntimeError("Pool SHAP non démarré")
+        features = np.asarray(features, dtype=np.float64)
+        if features.ndim == 1:
+            features = features.reshape(1, -1)
+        if features.shape[1] != self.n_features:
+            raise ValueError(
+                f"{features.shape[1]} features reçues, {self.n_features} attendues"
+            )
+        mode = EXPLAIN_FAST if mode == EXPLAIN_FAST else EXPLAIN_EXACT
+        chunks = [
+            features[start : start + self.max_rows]
+            for start in range(0, len(features), self.max_rows)
+        ]
+        if len(chunks) == 1:
+            results = [self._explain_chunk(chunks[0], mode)]
+        else:
+            results = list(
+                self._executor.map(lambda c: self._explain_chunk(c, mode), chunks)
+            )
+        with self._lock:
+            self.calls += 1
+            self.rows += len(features)
+        return (
+            np.concatenate([values for values, _ in results]),
+            np.concatenate([base for _, base in results]),
+        )
+
+    def _explain_chunk(self, rows, mode):
+        try:
+            worker = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                self.waits += 1
+            try:
+                worker = self._idle.get(timeout=self.timeout)
+            except queue.Empty:
+                raise TimeoutError("Aucun processus SHAP disponible") from None
+        n_rows = len(rows)
+        healthy = True
+        try:
+            worker.inputs[:n_rows] = rows
+            try:
+                status, detail = worker.call((n_rows, mode), self.timeout)
+            except (TimeoutError, EOFError, OSError):
+                # Réponse perdue ou processus mort : il ne sert plus
+                healthy = False
+                raise
+            if status != "ok":
+                raise RuntimeError(detail)
+            out = worker.outputs[:n_rows]
+            return out[:, :-1].copy(), out[:, -1].copy()
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            if healthy:
+                self._idle.put(worker)
+            else:
+                self._retire(worker)
+
+    def _retire(self, worker):
+        logger.error(f"Processus SHAP {worker.process.pid} retiré du pool")
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+            if not self._workers:
+                # Plus de processus : l'API revient à l'explainer local
+                self.ready = False
+        worker.close()
+
+    def close(self):
+        """Arrête les processus et libère la mémoire partagée."""
+        self.ready = False
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        for worker in self._workers:
+            worker.close()
+        self._workers = []
+        self._idle = queue.Queue()
+
+    def stats(self):
+        """Compteurs du pool (pour le monitoring)."""
+        with self._lock:
+            return {
+                "workers": self.n_workers,
+                "alive": sum(w.process.is_alive() for w in self._workers),
+                "idle": self._idle.qsize(),
+                "ready": self.ready,
+                "max_rows": self.max_rows,
+                "calls": self.calls,
+                "rows": self.rows,
+                "waits": self.waits,
+                "errors": self.errors,
+            }
@@ -0,0 +1,178 @@
+import json
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from src.model.client_features import (
+    NON_FEATURE_COLUMNS,
+    ClientFeatures,
+    rows_to_matrix,
+)
+
+# Fichiers composant un feature store sur disque
+IDS_FILE = "ids.npy"
+MATRIX_FILE = "features.npy"
+COLUMNS_FILE = "columns.json"
+
+
+class FeatureStore:
+    """
+    Matrice de features en mémoire (float32), une ligne par client.
+
+    Les SK_ID_CURR sont gardés triés : la recherche d'un client est une
+    recherche dichotomique (`np.searchsorted`) et les lignes retournées sont
+    des vues sur la matrice (aucune copie). Chargée depuis des fichiers `.npy`,
+    la matrice est projetée en mémoire (mmap) et partagée via le cache disque
+    de l'OS.
+    """
+
+    def __init__(self, ids, matrix, feature_names, source=None):
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(ids) > 1 and np.any(ids[1:] < ids[:-1]):
+            order = np.argsort(ids, kind="stable")
+            ids = ids[order]
+            matrix = matrix[order]
+        self.ids = ids
+        self.matrix = matrix
+        self.feature_names = list(feature_names)
+        self.index = {c: i for i, c in enumerate(self.feature_names)}
+        self.source = source
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Charge un feature store construit par `save` (mmap par défaut)."""
+        path = Path(path)
+        with open(path / COLUMNS_FILE, encoding="utf-8") as f:
+            feature_names = json.load(f)
+        mode = "r" if mmap else None
+        ids = np.load(path / IDS_FILE)
+        matrix = np.load(path / MATRIX_FILE, mmap_mode=mode)
+        return cls(ids, matrix, feature_names, source=str(path))
+
+    @classmethod
+    def from_sqlite(cls, db_path, feature_names=None, chunksize=10000):
+        """Charge toute la table clients en mémoire (matrice préallouée)."""
+        conn = sqlite3.connect(db_path)
+        try:
+            table_cols = [r[1] for r in conn.execute("PRAGMA table_info(clients)")]
+            if feature_names is None:
+                feature_names = [c for c in table_cols if c not in NON_FEATURE_COLUMNS]
+            n_rows = conn.execute("SELECT COUNT(*) FROM clients").fetchone()[0]
+
+            ids = np.empty(n_rows, dtype=np.int64)
+            matrix = np.empty((n_rows, len(feature_names)), dtype=np.float32)
+
+            select = ", ".join(f'"{c}"' for c in feature_names)
+            cursor = conn.execute(f"SELECT SK_ID_CURR, {select} FROM clients")
+            pos = 0
+            while True:
+                rows = cursor.fetchmany(chunksize)
+                if not rows:
+                    break
+                end = pos + len(rows)
+                ids[pos:end] = [r[0] for r in rows]
+                matrix[pos:end] = rows_to_matrix([r[1:] for r in rows])
+                pos = end
+        finally:
+            conn.close()
+
+        return cls(ids[:pos], matrix[:pos], feature_names, source=str(db_path))
+
+    def save(self, path):
+        """Écrit le feature store sur disque (`ids.npy`, `features.npy`, colonnes)."""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        np.save(path / IDS_FILE, self.ids)
+        np.save(path / MATRIX_FILE, np.ascontiguousarray(self.matrix))
+        with open(path / COLUMNS_FILE, "w", encoding="utf-8") as f:
+            json.dump(self.feature_names, f)
+
+    def reorder(self, feature_names):
+        """Retourne un store dont les colonnes suivent `feature_names` (copie)."""
+        if list(feature_names) == self.feature_names:
+            return self
+        cols = [self.index[c] for c in feature_names]
+        return FeatureStore(
+            self.ids, np.ascontiguousarray(self.matrix[:, cols]), feature_names
+        )
+
+    def lookup(self, client_ids):
+        """Positions des clients dans la matrice (-1 si inconnu)."""
+        client_ids = np.asarray(client_ids, dtype=np.int64)
+        pos = np.searchsorted(self.ids, client_ids)
+        pos = np.minimum(pos, len(self.ids) - 1)
+        found = self.ids[pos] == client_ids
+        return np.where(found, pos, -1)
+
+    def get(self, client_id):
+        """Features d'un client (vue sur la matrice), ou None si inconnu."""
+        if not len(self.ids):
+            return None
+        pos = int(self.lookup([client_id])[0])
+        if pos < 0:
+            return None
+        return ClientFeatures(
+            client_id, self.matrix[pos], self.feature_names, self.index
+        )
+
+    def get_many(self, client_ids):
+        """Features de plusieurs clients (clients inconnus ignorés)."""
+        client_ids = list(client_ids)
+        if not client_ids or not len(self.ids):
+            return []
+        positions = self.lookup(client_ids)
+        return [
+            ClientFeatures(cid, self.matrix[pos], self.feature_names, self.index)
+            for cid, pos in zip(client_ids, positions.tolist())
+            if pos >= 0
+        ]
+
+    def memory_footprint(self):
+        """Empreinte mémoire (octets) et mode de chargement du store."""
+        return {
+            "n_clients": len(self.ids),
+            "n_features": len(self.feature_names),
+            "matrix_bytes": int(self.matrix.nbytes),
+            "ids_bytes": int(self.ids.nbytes),
+            "mmap": isinstance(self.matrix, np.memmap),
+            "source": self.source,
+        }
+
+
+def build_feature_store(db_path, output_path, feature_names=None):
+    """Construit le feature store sur disque depuis la table clients."""
+    if not os.path.exists(db_path):
+        print(f"Erreur : La base {db_path} n'existe pas.")
+        return None
+
+    print(f"Construction du feature store : {db_path} -> {output_path}")
+    start_time = time.time()
+    store = FeatureStore.from_sqlite(db_path, feature_names)
+    store.save(output_path)
+
+    footprint = store.memory_footprint()
+    print(
+        f"{footprint['n_clients']} clients x {footprint['n_features']} features "
+        f"({footprint['matrix_bytes'] / 1024**2:.1f} Mo) "
+        f"en {time.time() - start_time:.2f} secondes."
+    )
+    return store
+
+
+if __name__ == "__main__":
+    # Usage : python -m src.model.feature_store [db_path] [output_dir]
+    from src.model.loader import loader
+
+    DB_FILE = sys.argv[1] if len(sys.argv) > 1 else loader.db_path
+    OUTPUT_DIR = sys.argv[2] if len(sys.argv) > 2 else "data/feature_store"
+
+    # Les colonnes suivent l'ordre d'entrée du modèle
+    loader.load_artifacts()
+    build_feature_store(DB_FILE, OUTPUT_DIR, loader.get_model_feature_names())
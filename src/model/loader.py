@@ -1,134 +1,439 @@
-import joblib
 import os
 import logging
 import sqlite3
-import pandas as pd
-import shap
+import threading
+import time
 import numpy as np
-import onnxruntime as ort
-from pathlib import Path
-from functools import lru_cache
+
+from src.config import BASE_DIR, resolve_db_path
+from src.metrics import counter, histogram
+from src.model.client_features import (
+    ClientFeatures,
+    NON_FEATURE_COLUMNS,
+    row_to_vector,
+    rows_to_matrix,
+)
+from src.model.feature_store import FeatureStore
+from src.model.cache import (
+    PredictionCache,
+    ShapExplanation,
+    top_k_rows,
+    top_k_shap,
+)
+from src.model.explainers import (
+    EXPLAIN_EXACT,
+    EXPLAIN_FAST,
+    EXPLAIN_NONE,
+    SaabasExplainer,
+    make_explainer,
+)
+from src.model.disk_cache import PERSISTENT_CACHE_PATH, PersistentCache
+from src.model.onnx_sessions import (
+    artifacts_version,
+    create_onnx_session,
+    session_feature_names,
+)
+from src.model.explain_pool import SHAP_WORKERS, ExplainerPool
+from src.model.tree_scorer import SCORING_BACKEND, SCORING_BACKENDS, TreeScorer
+from src.model.cascade import CASCADE_CONFIG_PATH, SCORING_CASCADE, CascadeScorer
+from src.model.shap_store import META_FILE as SHAP_STORE_META_FILE, ShapStore
 
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-BASE_DIR = Path(__file__).resolve().parent.parent.parent
+# Feature store précalculé (cf. src/model/feature_store.py) ; si absent, les
+# features sont lues dans SQLite à chaque requête
+FEATURE_STORE_PATH = os.getenv(
+    "FEATURE_STORE_PATH", str(BASE_DIR / "data/feature_store")
+)
+# "1" : à défaut de fichier, charge toute la table clients en RAM au démarrage
+FEATURE_STORE_FROM_DB = os.getenv("FEATURE_STORE_FROM_DB", "0") == "1"
+
+# Explications SHAP précalculées (cf. src/model/shap_store.py) ; si absent,
+# SHAP est calculé à la demande
+SHAP_STORE_PATH = os.getenv("SHAP_STORE_PATH", str(BASE_DIR / "data/shap_store"))
+
+# Nombre de valeurs SHAP conservées par explication (cache et réponse API)
+SHAP_TOP_K = int(os.getenv("SHAP_TOP_K", "15"))
+
+# Nombre maximal de paramètres "?" par requête (limite SQLITE_MAX_VARIABLE_NUMBER)
+SQLITE_MAX_VARIABLES = 900
+
+# Métriques (cf. src/metrics.py, GET /metrics)
+SCORING_CALLS = counter(
+    "credit_scoring_calls_total",
+    "Scorings servis, par backend (numba, onnx, joblib, cascade) et mode.",
+    ("backend", "mode"),
+)
+SCORING_FALLBACKS = counter(
+    "credit_scoring_fallbacks_total",
+    "Échecs d'un backend de scoring suivis d'un repli sur le suivant.",
+    ("backend", "mode"),
+)
+FEATURE_FETCH_SECONDS = histogram(
+    "credit_feature_fetch_duration_seconds",
+    "Durée de lecture des features (feature store ou SQLite).",
+    ("source", "mode"),
+)
 
 
 class ModelLoader:
     _instance = None
+    _instance_lock = threading.Lock()
     _model = None
     _onnx_session = None
     _explainer = None
     _db_path = None
 
     def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(ModelLoader, cls).__new__(cls)
-            cls._instance.model = None
-            cls._instance.onnx_session = None
-            cls._instance.explainer = None
-            cls._instance.db_path = None
-            cls._instance._detect_db()
+        with cls._instance_lock:
+            if cls._instance is None:
+                instance = super(ModelLoader, cls).__new__(cls)
+                instance.model = None
+                instance.onnx_session = None
+                # Ordre des features enregistré dans le modèle ONNX (ou None)
+                instance.onnx_feature_names = None
+                # Backend de scoring (cf. src/model/tree_scorer.py)
+                instance.scoring_backend = SCORING_BACKEND
+                instance.tree_scorer = None
+                # Scoring en cascade (arrêt anticipé), cf. src/model/cascade.py
+                instance.cascade = None
+                instance.explainer = None
+                # Explainer approché (Saabas), construit au premier usage
+                instance.fast_explainer = None
+                # Processus de calcul SHAP, optionnels (cf. src/model/explain_pool.py)
+                instance.explain_pool = None
+                # Base clients, résolue au premier accès (cf. src/config.py)
+                instance._db_path = None
+                # Empreinte des artefacts chargés (clé de cache / déduplication)
+                instance.model_version = None
+                # Verrou protégeant le chargement paresseux des artefacts
+                instance._load_lock = threading.RLock()
+                # Connexions SQLite par thread et projection des colonnes
+                instance._local = threading.local()
+                instance._projection = None
+                instance.feature_store = None
+                # Cache des scores et explications (cf. src/model/cache.py)
+                instance.cache = PredictionCache()
+                # Second niveau sur disque, optionnel (cf. src/model/disk_cache.py)
+                instance.persistent_cache = None
+                instance.shap_store = None
+                # Noms de features en tableau NumPy (liste source, tableau)
+                instance._feature_name_array = None
+                cls._instance = instance
         return cls._instance
 
-    def _detect_db(self):
-        """Détecte la meilleure base de données disponible."""
-        paths = [
-            BASE_DIR / "data/database.sqlite",
-            BASE_DIR / "data/database_lite.sqlite",
-        ]
+    @property
+    def db_path(self):
+        """Chemin de la base clients (détecté au premier accès, pas à l'import)."""
+        if self._db_path is None:
+            self._detect_db()
+        return self._db_path
 
-        for p in paths:
-            if p.exists():
-                self.db_path = str(p)
-                logger.info(f"Base de données détectée : {self.db_path}")
-                return
+    @db_path.setter
+    def db_path(self, value):
+        self._db_path = value
 
-        self.db_path = str(BASE_DIR / "data/database.sqlite")
-        logger.warning(
-            f"Aucune base de données trouvée, utilisation du chemin par défaut : {self.db_path}"
-        )
+    @db_path.deleter
+    def db_path(self):
+        # Retour à la détection automatique
+        self._db_path = None
+
+    def _detect_db(self):
+        """Détecte la meilleure base de données disponible."""
+        self._db_path = resolve_db_path(BASE_DIR)
 
     def load_artifacts(
-        self, model_path="src/model/model.joblib", onnx_path="src/model/model.onnx"
+        self,
+        model_path="src/model/model.joblib",
+        onnx_path="src/model/model.onnx",
+        score_only=False,
+        onnx=True,
     ):
-        """Charge le modèle (ONNX prioritaire) et l'explainer SHAP."""
+        """Charge le modèle (ONNX prioritaire) et l'explainer SHAP.
+
+        `score_only` : seulement ce qu'il faut pour scorer (la session ONNX ;
+        le modèle Joblib uniquement s'il sert au scoring), le reste étant
+        chargé plus tard (cf. `load_explainer`, préchauffage de l'API).
+        `onnx=False` : pas de session ONNX (processus parent avant le fork des
+        workers, cf. src/api/serve.py : ses threads ne survivent pas au fork).
+
+        Thread-safe : les appels concurrents attendent la fin du premier
+        chargement au lieu de charger les artefacts plusieurs fois.
+        """
+        with self._load_lock:
+            return self._load_artifacts(model_path, onnx_path, score_only, onnx)
+
+    def _load_artifacts(self, model_path, onnx_path, score_only=False, onnx=True):
         # 1. Chargement ONNX pour l'inférence rapide
-        if self.onnx_session is None and os.path.exists(onnx_path):
+        if onnx and self.onnx_session is None and os.path.exists(onnx_path):
             logger.info(f"Chargement de la session ONNX depuis {onnx_path}")
             try:
-                self.onnx_session = ort.InferenceSession(onnx_path)
+                # Options (threads, optimisations, pool) : cf. onnx_sessions.py
+                self.onnx_session = create_onnx_session(onnx_path)
+                self.onnx_feature_names = session_feature_names(self.onnx_session)
             except Exception as e:
                 logger.error(f"Erreur chargement ONNX : {e}")
 
-        # 2. Chargement Joblib pour SHAP (qui a besoin de l'objet LightGBM)
-        if self.model is None:
+        if self.scoring_backend not in SCORING_BACKENDS:
+            logger.warning(
+                f"SCORING_BACKEND inconnu : {self.scoring_backend} "
+                f"({', '.join(SCORING_BACKENDS)}), utilisation d'ONNX"
+            )
+
+        # 2. Chargement Joblib pour SHAP (qui a besoin de l'objet LightGBM),
+        # pour le scoring sans ONNX ou avec un autre backend, et pour l'ordre
+        # des features si le modèle ONNX ne l'enregistre pas (ancien export)
+        needs_model = (
+            not score_only
+            or not onnx
+            or self.onnx_session is None
+            or self.onnx_feature_names is None
+            or self.scoring_backend in (TreeScorer.name, "joblib")
+        )
+        if self.model is None and needs_model:
             if os.path.exists(model_path):
                 logger.info(f"Chargement du modèle Joblib depuis {model_path}")
                 try:
-                    self.model = joblib.load(model_path)
+                    import joblib
 
-                    # Extraction du classifieur pour SHAP
-                    if (
-                        hasattr(self.model, "named_steps")
-                        and "clf" in self.model.named_steps
-                    ):
-                        classifier = self.model.named_steps["clf"]
-                    else:
-                        classifier = self.model
-
-                    logger.info("Initialisation de SHAP TreeExplainer...")
-                    self.explainer = shap.TreeExplainer(classifier)
+                    self.model = joblib.load(model_path)
                 except Exception as e:
-                    logger.error(f"Erreur chargement Joblib/SHAP : {e}")
+                    logger.error(f"Erreur chargement Joblib : {e}")
             else:
                 logger.warning(f"Fichier modèle non trouvé : {model_path}")
 
+        if not score_only and self.explainer is None and self.model is not None:
+            try:
+                self.explainer = make_explainer(self._get_classifier())
+                logger.info(f"Explainer SHAP initialisé ({self.explainer.name})")
+            except Exception:
+                logger.exception("Erreur initialisation SHAP")
+
+        # 2 bis. Forêt compilée si SCORING_BACKEND=numba
+        if self.scoring_backend == TreeScorer.name and self.model is not None:
+            self.get_tree_scorer()
+
+        # 3. Version du modèle : empreinte des fichiers d'artefacts présents
+        # (identique avant et après le chargement différé du modèle Joblib)
+        if self.model_version is None:
+            paths = [p for p in (onnx_path, model_path) if os.path.exists(p)]
+            if paths:
+                self.model_version = artifacts_version(paths)
+                logger.info(f"Version du modèle : {self.model_version}")
+
         return self.model
 
-    @lru_cache(maxsize=128)
-    def predict_proba(self, client_id):
-        """Prédit la probabilité avec ONNX (si dispo) et met en cache."""
-        data = self.get_client_data(client_id)
-        if data is None:
+    def load_explainer(self):
+        """Charge le modèle Joblib et l'explainer exact s'ils manquent.
+
+        Returns:
+            L'explainer exact, ou None si le modèle est indisponible.
+        """
+        if self.explainer is None:
+            self.load_artifacts()
+        return self.explainer
+
+    def warm_up(self):
+        """Premiers appels de chaque chemin de calcul, hors requêtes.
+
+        Construit l'explainer approché (Saabas) et exécute une inférence sur
+        une ligne vide avec chaque backend chargé (ONNX, forêt compilée,
+        explainers), pour que la première requête ne paie pas ces coûts.
+
+        Returns:
+            bool: True, ou None si aucun modèle n'est chargé.
+        """
+        n_features = self._n_features()
+        if n_features is None:
+            return None
+        row = np.zeros((1, n_features), dtype=np.float32)
+        self.predict_proba_batch(row)
+        if self.tree_scorer is not None:
+            self.tree_scorer.predict_proba(row)
+        if self.explainer is not None:
+            for mode in (EXPLAIN_EXACT, EXPLAIN_FAST):
+                self.get_explainer(mode).explain(row)
+        return True
+
+    def _n_features(self):
+        """Nombre de features en entrée du modèle (None si rien n'est chargé)."""
+        if self.model is not None:
+            n_features = getattr(self._get_classifier(), "n_features_in_", None)
+            if n_features is not None:
+                return int(n_features)
+        if self.onnx_session is not None:
+            shape = self.onnx_session.get_inputs()[0].shape
+            if isinstance(shape[-1], int):
+                return shape[-1]
+        return None
+
+    def readiness(self):
+        """Composants chargés, sans aucun chargement (sondes de l'API)."""
+        return {
+            "onnx": self.onnx_session is not None,
+            "model": self.model is not None,
+            "tree_scorer": self.tree_scorer is not None,
+            "explainer": self.explainer is not None,
+            "fast_explainer": self.fast_explainer is not None,
+            "feature_store": self.feature_store is not None,
+            "shap_store": self.shap_store is not None,
+            "cascade": self.cascade is not None,
+            "persistent_cache": self.persistent_cache is not None,
+            "explain_pool": self.explain_pool is not None and self.explain_pool.ready,
+        }
+
+    def _cache_key(self, kind, client, *extra):
+        """Clé de cache : type, client, version du modèle et des données."""
+        return (
+            kind,
+            client.client_id,
+            self.model_version,
+            client.data_version,
+            *extra,
+        )
+
+    def _cache_get(self, key):
+        """Cherche dans le cache mémoire, puis dans le cache persistant."""
+        value = self.cache.get(key)
+        if value is None and self._persistent_enabled():
+            value = self.persistent_cache.get(key)
+            if value is not None:
+                self.cache.set(key, value)
+        return value
+
+    def _cache_set(self, key, value):
+        self.cache.set(key, value)
+        if self._persistent_enabled():
+            self.persistent_cache.set(key, value)
+
+    def _persistent_enabled(self):
+        # Sans version de modèle, une entrée disque ne serait pas identifiable
+        return self.persistent_cache is not None and self.model_version is not None
+
+    def load_persistent_cache(self, path=None):
+        """Ouvre le cache persistant (PERSISTENT_CACHE_PATH, vide = désactivé).
+
+        À appeler après `load_artifacts` : les entrées des autres versions du
+        modèle sont alors purgées.
+        """
+        self.close_persistent_cache()
+        path = PERSISTENT_CACHE_PATH if path is None else path
+        if not path:
+            return None
+        cache = PersistentCache(path)
+        try:
+            cache.start(keep_model_version=self.model_version)
+        except (OSError, sqlite3.Error) as e:
+            logger.error(f"Erreur ouverture du cache persistant {path} : {e}")
             return None
+        self.persistent_cache = cache
+        return cache
+
+    def close_persistent_cache(self):
+        """Écrit les entrées en attente et ferme le cache persistant."""
+        if self.persistent_cache is not None:
+            self.persistent_cache.stop()
+            self.persistent_cache = None
+
+    def predict_proba(self, client_id, client=None):
+        """Prédit la probabilité avec ONNX (si dispo) et met en cache.
+
+        Args:
+            client_id (int): ID du client.
+            client (ClientFeatures, optional): Features déjà récupérées pour
+                la requête en cours (évite une nouvelle lecture SQLite).
+        """
+        if client is None:
+            client = self.fetch_client_features(client_id)
+        if client is None:
+            return None
+
+        key = self._cache_key("score", client)
+        score = self._cache_get(key)
+        if score is None:
+            score = self._predict_one(client)
+            if score is not None:
+                score = float(score)
+                self._cache_set(key, score)
+        return score
+
+    def predict_proba_cascade(self, client_id, client=None):
+        """Score en cascade : arrêt anticipé pour les clients loin du seuil.
 
-        features = data.drop(columns=["TARGET", "SK_ID_CURR"], errors="ignore")
+        Seuls les scores complets (exacts) sont mis en cache ; un score issu
+        d'un arrêt anticipé est recalculé (quelques arbres) à chaque appel.
+
+        Returns:
+            tuple: (score, early_exit) ; score None si le client est inconnu.
+        """
+        if self.cascade is None:
+            return self.predict_proba(client_id, client), False
+        if client is None:
+            client = self.fetch_client_features(client_id)
+        if client is None:
+            return None, False
+
+        key = self._cache_key("score", client)
+        score = self._cache_get(key)
+        if score is not None:
+            return score, False
+        try:
+            scores, early_exit = self.cascade.score(client.values)
+        except Exception:
+            logger.exception("Erreur scoring en cascade, modèle complet")
+            SCORING_FALLBACKS.inc("cascade", "single")
+            return self.predict_proba(client_id, client), False
+        SCORING_CALLS.inc("cascade", "single")
+        score, early_exit = float(scores[0]), bool(early_exit[0])
+        if not early_exit:
+            self._cache_set(key, score)
+        return score, early_exit
+
+    def _predict_one(self, client):
+        # Forêt compilée (SCORING_BACKEND=numba) : pas de surcoût par appel
+        if self._use_backend(TreeScorer.name) and self.tree_scorer is not None:
+            try:
+                score = self.tree_scorer.predict_proba(client.values)[0]
+                SCORING_CALLS.inc(TreeScorer.name, "single")
+                return score
+            except Exception:
+                logger.exception("Erreur scoring compilé, fallback")
+                SCORING_FALLBACKS.inc(TreeScorer.name, "single")
 
         # Inférence ONNX (Prioritaire car ultra rapide)
-        if self.onnx_session is not None:
+        if not self._use_backend("joblib") and self.onnx_session is not None:
             try:
                 # Préparation de l'input (doit être float32)
-                inputs = {
-                    self.onnx_session.get_inputs()[0].name: features.values.astype(
-                        np.float32
-                    )
-                }
+                inputs = {self.onnx_session.get_inputs()[0].name: client.values}
                 # ONNX retourne [label, probabilités]
-                # probas est une liste de dict ou un array selon le converter
                 outputs = self.onnx_session.run(None, inputs)
-
-                # Typiquement : [array([label]), [ {0: p0, 1: p1} ]]
-                # Ou si c'est un array direct :
-                if isinstance(outputs[1], list):
-                    return outputs[1][0][1]  # proba de la classe 1
-                return outputs[1][0, 1]
+                score = positive_class_proba(outputs)[0]
+                SCORING_CALLS.inc("onnx", "single")
+                return score
             except Exception as e:
                 logger.error(f"Erreur inférence ONNX : {e}, fallback sur Joblib")
+                SCORING_FALLBACKS.inc("onnx", "single")
 
-        # Fallback Joblib
+        # Fallback Joblib (DataFrame construit uniquement ici)
         if self.model is not None:
-            return self.model.predict_proba(features)[0, 1]
+            SCORING_CALLS.inc("joblib", "single")
+            return self.model.predict_proba(client.features)[0, 1]
 
         return None
 
     def get_client_data(self, client_id):
-        """Récupère les données d'un client spécifique depuis la base SQLite."""
+        """Récupère les données d'un client spécifique depuis la base SQLite.
+
+        Retourne un DataFrame complet (avec SK_ID_CURR/TARGET). Le chemin de
+        l'API utilise `fetch_client_features`, plus rapide.
+        """
         if not self.db_path or not os.path.exists(self.db_path):
             return None
 
+        import pandas as pd
+
         try:
             conn = sqlite3.connect(self.db_path)
             query = "SELECT * FROM clients WHERE SK_ID_CURR = ?"
@@ -147,35 +452,619 @@ class ModelLoader:
             logger.error(f"Erreur lecture SQLite : {e}")
             return None
 
-    @lru_cache(maxsize=128)
-    def get_shap_values_cached(self, client_id):
-        """Calcule les valeurs SHAP pour un client et met en cache."""
-        data = self.get_client_data(client_id)
-        if data is None:
+    def load_feature_store(self, path=None, from_db=None):
+        """Charge le feature store en mémoire (mmap), sinon fallback SQLite.
+
+        Args:
+            path (str, optional): Dossier du store (défaut : FEATURE_STORE_PATH).
+            from_db (bool, optional): Si aucun fichier n'existe, charge la table
+                clients en RAM (défaut : FEATURE_STORE_FROM_DB).
+
+        Returns:
+            FeatureStore: Le store chargé, ou None (lecture SQLite par requête).
+        """
+        path = path or FEATURE_STORE_PATH
+        from_db = FEATURE_STORE_FROM_DB if from_db is None else from_db
+
+        try:
+            if os.path.exists(os.path.join(path, "features.npy")):
+                store = FeatureStore.load(path)
+            elif from_db and self.db_path and os.path.exists(self.db_path):
+                store = FeatureStore.from_sqlite(
+                    self.db_path, self._get_projection()[0]
+                )
+            else:
+                logger.info("Pas de feature store : lecture SQLite par requête.")
+                self.feature_store = None
+                return None
+
+            # Les colonnes doivent suivre l'ordre d'entrée du modèle
+            model_names = self.get_model_feature_names()
+            if model_names and store.feature_names != model_names:
+                store = store.reorder(model_names)
+        except (OSError, ValueError, KeyError, sqlite3.Error) as e:
+            # Fichiers absents ou corrompus, colonne manquante, base illisible
+            logger.error(f"Erreur chargement feature store : {e}, fallback SQLite")
+            self.feature_store = None
             return None
 
-        features = data.drop(columns=["TARGET", "SK_ID_CURR"], errors="ignore")
+        footprint = store.memory_footprint()
+        logger.info(
+            f"Feature store chargé : {footprint['n_clients']} clients, "
+            f"{footprint['matrix_bytes'] / 1024**2:.1f} Mo (mmap={footprint['mmap']})"
+        )
+        self.feature_store = store
+        return store
+
+    def fetch_client_features(self, client_id):
+        """Récupère les features d'un client une seule fois pour toute la requête.
+
+        Chemin rapide sans pandas : la ligne est lue via un curseur brut (connexion
+        réutilisée par thread) avec une projection de colonnes précalculée, puis
+        convertie directement en vecteur float32 dans l'ordre d'entrée du modèle.
+
+        Returns:
+            ClientFeatures: Features partagées par le scoring, SHAP et le
+            logging, ou None si le client est introuvable.
+        """
+        if self.feature_store is not None:
+            with FEATURE_FETCH_SECONDS.time("feature_store", "single"):
+                return self.feature_store.get(client_id)
+
+        if not self.db_path or not os.path.exists(self.db_path):
+            return None
 
+        try:
+            columns, index, query = self._get_projection()
+            with FEATURE_FETCH_SECONDS.time("sqlite", "single"):
+                row = self._get_connection().execute(query, (client_id,)).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lecture SQLite : {e}")
+            return None
+
+        if row is None:
+            return None
+
+        return ClientFeatures(client_id, row_to_vector(row), columns, index)
+
+    def _get_connection(self):
+        """Connexion SQLite réutilisée par thread (une par base)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.db_path != self.db_path:
+            conn = sqlite3.connect(self.db_path)
+            self._local.conn = conn
+            self._local.db_path = self.db_path
+        return conn
+
+    def _get_projection(self):
+        """Colonnes de features (ordre du modèle) et requête SELECT associée.
+
+        Calculée une fois par base (et recalculée quand les noms de features
+        deviennent connus) : si le modèle expose ses noms de features (Joblib,
+        ou métadonnées ONNX), on les utilise pour garantir l'ordre d'entrée,
+        sinon on garde l'ordre de la table.
+        """
+        key = (
+            self.db_path,
+            self.model is not None or self.onnx_feature_names is not None,
+        )
+        if self._projection is not None and self._projection[0] == key:
+            return self._projection[1]
+
+        table_cols = [
+            r[1] for r in self._get_connection().execute("PRAGMA table_info(clients)")
+        ]
+        columns = [c for c in table_cols if c not in NON_FEATURE_COLUMNS]
+
+        model_names = self.get_model_feature_names()
+        if model_names and set(model_names).issubset(table_cols):
+            columns = list(model_names)
+
+        select = ", ".join(f'"{c}"' for c in columns)
+        query = f"SELECT {select} FROM clients WHERE SK_ID_CURR = ?"
+        index = {c: i for i, c in enumerate(columns)}
+
+        self._projection = (key, (columns, index, query))
+        return self._projection[1]
+
+    def _get_classifier(self):
+        """Classifieur du pipeline (étape `clf`), ou le modèle lui-même."""
+        model = self.model
+        if hasattr(model, "named_steps") and "clf" in model.named_steps:
+            return model.named_steps["clf"]
+        return model
+
+    def get_tree_scorer(self):
+        """Scoring compilé de la forêt, construit (et compilé) au premier appel.
+
+        Returns:
+            TreeScorer: ou None si le modèle n'est pas un LightGBM.
+        """
+        if self.tree_scorer is None and self.model is not None:
+            with self._load_lock:
+                if self.tree_scorer is None:
+                    try:
+                        scorer = TreeScorer.from_classifier(self._get_classifier())
+                        scorer.warmup()
+                        self.tree_scorer = scorer
+                        logger.info(
+                            f"Scoring compilé initialisé ({scorer.trees.n_trees} "
+                            f"arbres, numba={scorer.compiled})"
+                        )
+                    except Exception:
+                        # Compilation numba comprise : erreurs non typées
+                        logger.exception("Erreur scoring compilé")
+        return self.tree_scorer
+
+    def _use_backend(self, name):
+        """Le backend `name` est-il celui à essayer en premier ?"""
+        if self.scoring_backend not in SCORING_BACKENDS:
+            return name == "onnx"
+        return self.scoring_backend == name
+
+    def get_explainer(self, mode=EXPLAIN_EXACT):
+        """Explainer d'un mode d'explication (`fast` : Saabas, sinon TreeSHAP).
+
+        L'explainer approché est construit au premier appel ; si le modèle ne
+        le permet pas, le mode `fast` retombe sur l'explainer exact.
+        """
+        if mode != EXPLAIN_FAST or self.explainer is None:
+            return self.explainer
+        if self.fast_explainer is None:
+            with self._load_lock:
+                if self.fast_explainer is None:
+                    try:
+                        # Forêt aplatie partagée avec le scoring compilé
+                        trees = self.tree_scorer.trees if self.tree_scorer else None
+                        self.fast_explainer = SaabasExplainer(
+                            self._get_classifier(), trees=trees
+                        )
+                        logger.info("Explainer approché (Saabas) initialisé")
+                    except (TypeError, ValueError, KeyError) as e:
+                        # Pas de booster LightGBM, ou vidage des arbres illisible
+                        logger.warning(f"Saabas indisponible ({e}) : mode exact")
+                        self.fast_explainer = self.explainer
+        return self.fast_explainer
+
+    def get_model_feature_names(self):
+        """Noms des features dans l'ordre d'entraînement (si disponibles) :
+        modèle Joblib, sinon métadonnées du modèle ONNX."""
+        if self.model is None:
+            return self.onnx_feature_names
+        model = self._get_classifier()
+        try:
+            names = getattr(model, "feature_name_", None)
+            return list(names) if names is not None else None
+        except ValueError:
+            # Modèle LightGBM non entraîné (NotFittedError)
+            return None
+
+    def get_feature_name_array(self, feature_names):
+        """Tableau NumPy des noms de features, pour indexer le top-k SHAP.
+
+        Les listes de noms (projection, feature store) sont partagées par tous
+        les clients : le tableau n'est reconstruit que si la liste change.
+        """
+        cached = self._feature_name_array
+        if cached is None or cached[0] is not feature_names:
+            cached = (feature_names, np.asarray(feature_names, dtype=object))
+            self._feature_name_array = cached
+        return cached[1]
+
+    def fetch_clients_features(self, client_ids):
+        """Récupère les features de plusieurs clients (requêtes IN par paquets).
+
+        Même chemin rapide que `fetch_client_features` : les lignes sont lues
+        via un curseur brut et converties en une seule matrice float32 ; chaque
+        ClientFeatures retourné est une vue sur une ligne de cette matrice.
+
+        Returns:
+            list[ClientFeatures]: Clients trouvés (les IDs inconnus sont
+            ignorés), ou None si la base est indisponible.
+        """
+        if self.feature_store is not None:
+            with FEATURE_FETCH_SECONDS.time("feature_store", "batch"):
+                return self.feature_store.get_many(client_ids)
+
+        if not self.db_path or not os.path.exists(self.db_path):
+            return None
+
+        client_ids = list(client_ids)
+        try:
+            columns, index, _ = self._get_projection()
+            select = ", ".join(f'"{c}"' for c in columns)
+            conn = self._get_connection()
+            rows = []
+            with FEATURE_FETCH_SECONDS.time("sqlite", "batch"):
+                for start in range(0, len(client_ids), SQLITE_MAX_VARIABLES):
+                    chunk = client_ids[start : start + SQLITE_MAX_VARIABLES]
+                    placeholders = ", ".join("?" for _ in chunk)
+                    query = (
+                        f"SELECT SK_ID_CURR, {select} FROM clients "
+                        f"WHERE SK_ID_CURR IN ({placeholders})"
+                    )
+                    rows.extend(conn.execute(query, chunk).fetchall())
+        except sqlite3.Error as e:
+            logger.error(f"Erreur lecture SQLite (batch) : {e}")
+            return None
+
+        if not rows:
+            return []
+
+        matrix = rows_to_matrix([r[1:] for r in rows])
+        return [
+            ClientFeatures(r[0], matrix[i], columns, index) for i, r in enumerate(rows)
+        ]
+
+    def predict_proba_batch(self, features):
+        """Prédit les probabilités d'un lot de clients en un seul appel modèle.
+
+        Args:
+            features (np.ndarray | pd.DataFrame): Matrice (n, n_features) des
+                clients, dans l'ordre d'entrée du modèle.
+
+        Returns:
+            np.ndarray: Probabilités de la classe 1 (une par ligne), ou None.
+        """
+        if self._use_backend(TreeScorer.name) and self.tree_scorer is not None:
+            try:
+                scores = self.tree_scorer.predict_proba(np.asarray(features))
+                SCORING_CALLS.inc(TreeScorer.name, "batch")
+                return scores
+            except Exception:
+                logger.exception("Erreur scoring compilé (batch), fallback")
+                SCORING_FALLBACKS.inc(TreeScorer.name, "batch")
+
+        if not self._use_backend("joblib") and self.onnx_session is not None:
+            try:
+                inputs = {
+                    self.onnx_session.get_inputs()[0].name: np.asarray(
+                        features, dtype=np.float32
+                    )
+                }
+                outputs = self.onnx_session.run(None, inputs)
+                scores = positive_class_proba(outputs)
+                SCORING_CALLS.inc("onnx", "batch")
+                return scores
+            except Exception:
+                logger.exception("Erreur inférence ONNX (batch), fallback Joblib")
+                SCORING_FALLBACKS.inc("onnx", "batch")
+
+        if self.model is not None:
+            SCORING_CALLS.inc("joblib", "batch")
+            return self.model.predict_proba(features)[:, 1]
+
+        return None
+
+    def predict_proba_batch_cascade(self, features):
+        """Version lot de `predict_proba_cascade`.
+
+        Returns:
+            tuple: (probabilités (n,), early_exit (n,) bool), ou (None, None).
+        """
+        if self.cascade is not None:
+            try:
+                result = self.cascade.score(np.asarray(features))
+                SCORING_CALLS.inc("cascade", "batch")
+                return result
+            except Exception:
+                logger.exception("Erreur scoring en cascade (batch)")
+                SCORING_FALLBACKS.inc("cascade", "batch")
+        scores = self.predict_proba_batch(features)
+        if scores is None:
+            return None, None
+        return scores, np.zeros(len(scores), dtype=bool)
+
+    def get_shap_values_batch(self, features, mode=EXPLAIN_EXACT):
+        """Calcule les valeurs SHAP d'un lot de clients en un seul appel.
+
+        Args:
+            features (np.ndarray): Matrice (n, n_features).
+            mode (str): `exact` (TreeSHAP) ou `fast` (Saabas).
+
+        Returns:
+            tuple: (valeurs (n, n_features), valeurs de base (n,)) en NumPy,
+            ou None si l'explainer est indisponible.
+        """
         if self.explainer is None:
             self.load_artifacts()
 
         if self.explainer is not None:
             try:
-                shap_values = self.explainer(features)
-                return shap_values
-            except Exception as e:
-                logger.error(f"Erreur calcul SHAP : {e}")
+                return self._explain(features, mode)
+            except Exception:
+                logger.exception("Erreur calcul SHAP (batch)")
+                return None
+        return None
+
+    def _explain(self, features, mode=EXPLAIN_EXACT):
+        """Valeurs SHAP d'un lot : pool de processus s'il est prêt, sinon
+        explainer du processus courant."""
+        pool = self.explain_pool
+        if pool is not None and pool.ready:
+            try:
+                return pool.explain(features, mode)
+            except (RuntimeError, ValueError, OSError, EOFError) as e:
+                # Processus mort ou sans réponse (TimeoutError), lot refusé
+                logger.error(f"Erreur du pool SHAP : {e}, calcul local")
+        return self.get_explainer(mode).explain(features)
+
+    def score_and_explain_batch(
+        self, clients, top_k=SHAP_TOP_K, mode=EXPLAIN_EXACT, durations=None
+    ):
+        """Score et SHAP d'une liste de clients en un appel modèle + un appel SHAP.
+
+        Utilisé par le micro-batching des requêtes unitaires concurrentes ;
+        seuls les clients absents des caches (et du store SHAP) sont calculés.
+        `durations` (dict, optionnel) reçoit la durée (secondes) des étapes
+        `score` et `shap`.
+
+        Returns:
+            list[tuple]: (score, ShapExplanation) par client, dans l'ordre de
+            `clients` ; score None si le modèle est indisponible, explication
+            None en mode `none`.
+        """
+        durations = {} if durations is None else durations
+        start = time.perf_counter()
+        scores = [self._cache_get(self._cache_key("score", c)) for c in clients]
+        missing = [i for i, score in enumerate(scores) if score is None]
+        if missing:
+            features = np.vstack([clients[i].vector for i in missing])
+            batch_scores = self.predict_proba_batch(features)
+            if batch_scores is None:
+                return [(None, None) for _ in clients]
+            for j, i in enumerate(missing):
+                scores[i] = float(batch_scores[j])
+                self._cache_set(self._cache_key("score", clients[i]), scores[i])
+        durations["score"] = time.perf_counter() - start
+
+        if mode == EXPLAIN_NONE:
+            return [(score, None) for score in scores]
+
+        start = time.perf_counter()
+        explanations = [self._lookup_explanation(c, top_k, mode) for c in clients]
+        missing = [i for i, e in enumerate(explanations) if e is None]
+        if missing:
+            features = np.vstack([clients[i].vector for i in missing])
+            shap_values = self.get_shap_values_batch(features, mode)
+            if shap_values is not None:
+                values, base_values = shap_values
+                indices, top_values = top_k_rows(values, top_k)
+                for j, i in enumerate(missing):
+                    explanations[i] = ShapExplanation(
+                        indices[j], top_values[j], base_values[j]
+                    )
+                    self._cache_set(
+                        self._cache_key("shap", clients[i], top_k, mode),
+                        explanations[i],
+                    )
+        durations["shap"] = time.perf_counter() - start
+
+        return list(zip(scores, explanations))
+
+    def _lookup_explanation(self, client, top_k, mode=EXPLAIN_EXACT):
+        """Explication déjà disponible : caches, puis store SHAP précalculé."""
+        key = self._cache_key("shap", client, top_k, mode)
+        explanation = self._cache_get(key)
+        # Le store ne contient que des explications exactes
+        if (
+            explanation is None
+            and mode == EXPLAIN_EXACT
+            and self.shap_store is not None
+        ):
+            explanation = self.shap_store.get(client, top_k)
+            if explanation is not None:
+                self.cache.set(key, explanation)
+        return explanation
+
+    def get_shap_values_cached(
+        self, client_id, client=None, top_k=SHAP_TOP_K, mode=EXPLAIN_EXACT
+    ):
+        """Calcule l'explication SHAP (top-k) d'un client et la met en cache.
+
+        Sert en priorité les caches puis le store précalculé (cf.
+        `load_shap_store`) ; TreeExplainer n'est appelé que pour les absents.
+
+        Args:
+            client_id (int): ID du client.
+            client (ClientFeatures, optional): Features déjà récupérées pour
+                la requête en cours (évite une nouvelle lecture SQLite).
+            top_k (int): Nombre de features conservées.
+            mode (str): `exact` (TreeSHAP), `fast` (Saabas) ou `none`.
+
+        Returns:
+            ShapExplanation: indices/valeurs des `top_k` features les plus
+            importantes et valeur de base, ou None.
+        """
+        if mode == EXPLAIN_NONE:
+            return None
+        if client is None:
+            client = self.fetch_client_features(client_id)
+        if client is None:
+            return None
+
+        explanation = self._lookup_explanation(client, top_k, mode)
+        if explanation is not None:
+            return explanation
+
+        if self.explainer is None:
+            self.load_artifacts()
+
+        if self.explainer is not None:
+            try:
+                values, base_values = self._explain(client.values, mode)
+            except Exception:
+                logger.exception("Erreur calcul SHAP")
                 return None
+            explanation = top_k_shap(values[0], base_values[0], top_k)
+            self._cache_set(self._cache_key("shap", client, top_k, mode), explanation)
+            return explanation
         return None
 
+    def load_shap_store(self, path=None):
+        """Charge le store d'explications précalculées (cf. src/model/shap_store.py).
+
+        Le store est ignoré s'il a été construit pour une autre version du
+        modèle ou un autre ordre de features.
+
+        Returns:
+            ShapStore: Le store chargé, ou None (SHAP calculé à la demande).
+        """
+        path = path or SHAP_STORE_PATH
+        self.shap_store = None
+        if not os.path.exists(os.path.join(path, SHAP_STORE_META_FILE)):
+            logger.info("Pas de store SHAP : explications calculées à la demande.")
+            return None
+
+        try:
+            store = ShapStore.load(path)
+        except (OSError, ValueError, KeyError) as e:
+            # Fichiers absents ou corrompus, métadonnées incomplètes
+            logger.error(f"Erreur chargement store SHAP : {e}")
+            return None
+
+        if store.model_version != self.model_version:
+            logger.warning(
+                f"Store SHAP ignoré : construit pour le modèle {store.model_version}, "
+                f"modèle chargé {self.model_version}"
+            )
+            return None
+        model_names = self.get_model_feature_names()
+        if model_names and store.feature_names != model_names:
+            logger.warning("Store SHAP ignoré : ordre des features différent")
+            return None
+
+        logger.info(f"Store SHAP chargé : {len(store)} clients, top-{store.top_k}")
+        self.shap_store = store
+        return store
+
+    def load_cascade(self, path=None, threshold=0.5, enabled=None):
+        """Active le scoring en cascade à partir de sa calibration.
+
+        Désactivé par défaut (SCORING_CASCADE=0). La calibration est ignorée
+        si elle a été faite pour une autre version du modèle ou un autre
+        seuil de décision.
+
+        Returns:
+            CascadeScorer: La cascade active, ou None (modèle complet).
+        """
+        self.cascade = None
+        if not (SCORING_CASCADE if enabled is None else enabled):
+            return None
+        path = path or CASCADE_CONFIG_PATH
+        if not os.path.exists(path):
+            logger.warning(
+                f"Cascade désactivée : pas de calibration ({path}), "
+                "lancer python -m src.model.cascade"
+            )
+            return None
+        scorer = self.get_tree_scorer()
+        if scorer is None:
+            logger.warning("Cascade désactivée : scoring compilé indisponible")
+            return None
+
+        try:
+            cascade = CascadeScorer.load(path, scorer)
+        except (OSError, ValueError, KeyError) as e:
+            # Calibration illisible ou incomplète
+            logger.error(f"Erreur chargement de la cascade : {e}")
+            return None
+
+        if cascade.model_version != self.model_version:
+            logger.warning(
+                f"Cascade ignorée : calibrée pour le modèle {cascade.model_version}, "
+                f"modèle chargé {self.model_version}"
+            )
+            return None
+        if cascade.threshold != threshold:
+            logger.warning(
+                f"Cascade ignorée : calibrée pour le seuil {cascade.threshold}, "
+                f"seuil de décision {threshold}"
+            )
+            return None
+
+        logger.info(
+            f"Cascade active : {cascade.n_trees}/{scorer.trees.n_trees} arbres, "
+            f"borne {cascade.bound:.3f}"
+        )
+        self.cascade = cascade
+        return cascade
+
+    def start_explain_pool(
+        self, workers=None, model_path="src/model/model.joblib", backend=None
+    ):
+        """Démarre les processus de calcul SHAP (SHAP_WORKERS, 0 = désactivé).
+
+        Returns:
+            ExplainerPool: Le pool démarré, ou None (explainers locaux).
+        """
+        self.close_explain_pool()
+        workers = SHAP_WORKERS if workers is None else workers
+        if workers <= 0:
+            return None
+        n_features = self._n_features()
+        if n_features is None or not os.path.exists(model_path):
+            logger.warning("Pool SHAP désactivé : modèle indisponible")
+            return None
+        try:
+            pool = ExplainerPool(
+                model_path, n_features, workers=workers, backend=backend
+            ).start()
+        except (RuntimeError, OSError, EOFError) as e:
+            logger.error(f"Erreur démarrage du pool SHAP : {e}, calcul local")
+            return None
+        self.explain_pool = pool
+        return pool
+
+    def close_explain_pool(self):
+        """Arrête les processus de calcul SHAP."""
+        if self.explain_pool is not None:
+            self.explain_pool.close()
+            self.explain_pool = None
+
+    def after_fork(self):
+        """À appeler dans un worker forké : les artefacts en lecture seule du
+        parent sont conservés (copy-on-write), l'état propre à un processus
+        (connexions SQLite, verrous, cache mémoire) est recréé."""
+        self._load_lock = threading.RLock()
+        self._local = threading.local()
+        self.cache = PredictionCache()
+        self.persistent_cache = None
+        # Processus et segments partagés du parent : non hérités
+        self.explain_pool = None
+
     def _reset(self):
         """Réinitialise l'instance (usage interne pour les tests)."""
         self.model = None
         self.onnx_session = None
+        self.onnx_feature_names = None
+        self.scoring_backend = SCORING_BACKEND
+        self.tree_scorer = None
+        self.cascade = None
         self.explainer = None
-        self.predict_proba.cache_clear()
-        self.get_shap_values_cached.cache_clear()
-        self._detect_db()
+        self.fast_explainer = None
+        self.close_explain_pool()
+        self.model_version = None
+        self.cache = PredictionCache()
+        self.close_persistent_cache()
+        self._projection = None
+        self._local = threading.local()
+        self.feature_store = None
+        self.shap_store = None
+        self._feature_name_array = None
+        self._db_path = None
+
+
+def positive_class_proba(outputs):
+    """Probabilités de la classe 1 à partir des sorties ONNX `[label, probas]`.
+
+    Tenseur (n, 2) pour les exports actuels (cf. src/model/convert_onnx.py) ;
+    les anciens exports avec ZipMap renvoient une liste de dict {classe: proba}.
+    """
+    probabilities = outputs[1]
+    if isinstance(probabilities, list):
+        return np.array([p[1] for p in probabilities], dtype=np.float64)
+    return np.asarray(probabilities)[:, 1]
 
 
 # Instance globale pour accès facile
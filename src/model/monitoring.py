@@ -2,8 +2,6 @@ import pandas as pd
 import sqlite3
 import os
 import logging
-from evidently import Report
-from evidently.presets.drift import DataDriftPreset
 
 # Configuration logging si non déjà faite par l'appelant
 logging.basicConfig(level=logging.INFO)
@@ -90,6 +88,10 @@ def generate_drift_report(db_path, output_path="drift_report.html", features=Non
         f"Génération du rapport de drift sur {len(available_features)} features..."
     )
 
+    # Evidently (plusieurs secondes d'import) n'est chargé qu'ici
+    from evidently import Report
+    from evidently.presets.drift import DataDriftPreset
+
     report = Report(metrics=[DataDriftPreset()])
 
     try:
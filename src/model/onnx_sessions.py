@@ -0,0 +1,232 @@
+import hashlib
+import json
+import logging
+import os
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Configuration ONNX Runtime (surchargeable par variables d'environnement)
+# Threads par opérateur / entre opérateurs (0 = défaut ONNX Runtime)
+ONNX_INTRA_OP_THREADS = int(os.getenv("ONNX_INTRA_OP_THREADS", "0"))
+ONNX_INTER_OP_THREADS = int(os.getenv("ONNX_INTER_OP_THREADS", "0"))
+# Exécution des noeuds du graphe : sequential ou parallel
+ONNX_EXECUTION_MODE = os.getenv("ONNX_EXECUTION_MODE", "sequential")
+# Optimisations du graphe : disable, basic, extended ou all
+ONNX_GRAPH_OPTIMIZATION = os.getenv("ONNX_GRAPH_OPTIMIZATION", "all")
+# Modèle optimisé sérialisé (vide = pas de cache sur disque)
+ONNX_OPTIMIZED_MODEL_PATH = os.getenv("ONNX_OPTIMIZED_MODEL_PATH", "")
+# Fichier voisin du modèle optimisé : clé du modèle source dont il est issu
+OPTIMIZED_KEY_SUFFIX = ".source"
+# Métadonnée du modèle ONNX : noms des features dans l'ordre d'entrée (liste
+# JSON), écrite par src/model/convert_onnx.py
+FEATURE_NAMES_KEY = "feature_names"
+# Allocateur mémoire (arena CPU et réutilisation des plans d'allocation)
+ONNX_ENABLE_MEM_ARENA = os.getenv("ONNX_ENABLE_MEM_ARENA", "1") == "1"
+ONNX_ENABLE_MEM_PATTERN = os.getenv("ONNX_ENABLE_MEM_PATTERN", "1") == "1"
+# Nombre de sessions (1 = une session partagée par tous les threads)
+ONNX_SESSION_POOL_SIZE = int(os.getenv("ONNX_SESSION_POOL_SIZE", "1"))
+
+# Noms des valeurs d'énumération ONNX Runtime : onnxruntime n'est importé
+# qu'à la création de la première session
+EXECUTION_MODES = {
+    "sequential": "ORT_SEQUENTIAL",
+    "parallel": "ORT_PARALLEL",
+}
+GRAPH_OPTIMIZATION_LEVELS = {
+    "disable": "ORT_DISABLE_ALL",
+    "basic": "ORT_ENABLE_BASIC",
+    "extended": "ORT_ENABLE_EXTENDED",
+    "all": "ORT_ENABLE_ALL",
+}
+
+
+def session_config(**overrides):
+    """Réglages des sessions : valeurs d'environnement + surcharges."""
+    config = {
+        "intra_op_threads": ONNX_INTRA_OP_THREADS,
+        "inter_op_threads": ONNX_INTER_OP_THREADS,
+        "execution_mode": ONNX_EXECUTION_MODE,
+        "graph_optimization": ONNX_GRAPH_OPTIMIZATION,
+        "optimized_model_path": ONNX_OPTIMIZED_MODEL_PATH,
+        "mem_arena": ONNX_ENABLE_MEM_ARENA,
+        "mem_pattern": ONNX_ENABLE_MEM_PATTERN,
+        "pool_size": ONNX_SESSION_POOL_SIZE,
+    }
+    unknown = set(overrides) - set(config)
+    if unknown:
+        raise ValueError(f"Réglages ONNX inconnus : {', '.join(sorted(unknown))}")
+    config.update(overrides)
+    for name, choices in (
+        ("execution_mode", EXECUTION_MODES),
+        ("graph_optimization", GRAPH_OPTIMIZATION_LEVELS),
+    ):
+        if config[name] not in choices:
+            raise ValueError(f"{name} invalide : {config[name]} ({', '.join(choices)})")
+    return config
+
+
+def make_session_options(config):
+    """`ort.SessionOptions` correspondant à un dictionnaire de `session_config`."""
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = config["intra_op_threads"]
+    options.inter_op_num_threads = config["inter_op_threads"]
+    options.execution_mode = getattr(
+        ort.ExecutionMode, EXECUTION_MODES[config["execution_mode"]]
+    )
+    options.graph_optimization_level = getattr(
+        ort.GraphOptimizationLevel,
+        GRAPH_OPTIMIZATION_LEVELS[config["graph_optimization"]],
+    )
+    options.enable_cpu_mem_arena = config["mem_arena"]
+    options.enable_mem_pattern = config["mem_pattern"]
+    return options
+
+
+def artifacts_version(paths, chunk_size=1 << 20):
+    """Empreinte courte (SHA-256) du contenu des fichiers d'artefacts."""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def optimized_model_key(onnx_path, config):
+    """Clé du modèle optimisé : empreinte du modèle source et niveau
+    d'optimisation (indépendante des dates des fichiers)."""
+    return f"{artifacts_version([onnx_path])}:{config['graph_optimization']}"
+
+
+def session_feature_names(session):
+    """Noms des features enregistrés dans le modèle ONNX (None si absents).
+
+    Conservés dans le modèle optimisé sérialisé par ONNX Runtime : l'ordre
+    d'entrée est connu sans charger le modèle Joblib.
+    """
+    value = session.get_modelmeta().custom_metadata_map.get(FEATURE_NAMES_KEY)
+    try:
+        names = json.loads(value)
+    except (TypeError, ValueError):
+        # Ancien export sans métadonnée
+        return None
+    return names if isinstance(names, list) else None
+
+
+def _read_optimized_key(optimized_path):
+    try:
+        with open(optimized_path + OPTIMIZED_KEY_SUFFIX) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _new_session(onnx_path, config, key):
+    import onnxruntime as ort
+
+    options = make_session_options(config)
+    optimized_path = config["optimized_model_path"]
+    if (
+        optimized_path
+        and os.path.exists(optimized_path)
+        and _read_optimized_key(optimized_path) == key
+    ):
+        # Graphe déjà optimisé : on saute la phase d'optimisation au chargement
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+        return ort.InferenceSession(optimized_path, options)
+    if not optimized_path:
+        return ort.InferenceSession(onnx_path, options)
+
+    directory = os.path.dirname(optimized_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    options.optimized_model_filepath = optimized_path
+    session = ort.InferenceSession(onnx_path, options)
+    # Clé écrite une fois le modèle optimisé sérialisé par ONNX Runtime
+    with open(optimized_path + OPTIMIZED_KEY_SUFFIX, "w") as f:
+        f.write(key)
+    logger.info(f"Modèle ONNX optimisé sérialisé dans {optimized_path} ({key})")
+    return session
+
+
+class SessionPool:
+    """
+    Pool de sessions ONNX Runtime, utilisable comme une session (`run`,
+    `get_inputs`, `get_outputs`, `get_modelmeta`).
+
+    Chaque appel emprunte une session libre (ou attend qu'une se libère) :
+    avec plusieurs threads de calcul et peu de threads par session, les
+    inférences concurrentes ne se disputent plus le même pool de threads
+    interne.
+    """
+
+    def __init__(self, sessions):
+        if not sessions:
+            raise ValueError("Le pool doit contenir au moins une session")
+        self.size = len(sessions)
+        self._sessions = sessions
+        self._free = queue.LifoQueue()
+        for session in sessions:
+            self._free.put(session)
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.waits = 0
+
+    def get_inputs(self):
+        return self._sessions[0].get_inputs()
+
+    def get_outputs(self):
+        return self._sessions[0].get_outputs()
+
+    def get_modelmeta(self):
+        return self._sessions[0].get_modelmeta()
+
+    def run(self, output_names, input_feed, run_options=None):
+        try:
+            session = self._free.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                self.waits += 1
+            session = self._free.get()
+        try:
+            return session.run(output_names, input_feed, run_options)
+        finally:
+            self._free.put(session)
+            with self._lock:
+                self.runs += 1
+
+    def stats(self):
+        """Compteurs du pool (pour le monitoring)."""
+        with self._lock:
+            return {
+                "size": self.size,
+                "available": self._free.qsize(),
+                "runs": self.runs,
+                "waits": self.waits,
+            }
+
+
+def create_onnx_session(onnx_path, **overrides):
+    """Session ONNX réglée par la configuration (pool si `pool_size` > 1)."""
+    config = session_config(**overrides)
+    logger.info(
+        "Sessions ONNX : "
+        + ", ".join(f"{name}={value}" for name, value in config.items())
+    )
+    key = (
+        optimized_model_key(onnx_path, config)
+        if config["optimized_model_path"]
+        else None
+    )
+    first = _new_session(onnx_path, config, key)
+    if config["pool_size"] <= 1:
+        return first
+    # Les sessions suivantes relisent le modèle optimisé s'il a été sérialisé
+    sessions = [first] + [
+        _new_session(onnx_path, config, key) for _ in range(config["pool_size"] - 1)
+    ]
+    return SessionPool(sessions)
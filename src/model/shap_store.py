@@ -0,0 +1,259 @@
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from src.model.cache import ShapExplanation, top_k_rows
+from src.model.client_features import data_digest
+from src.model.explainers import make_explainer
+
+logger = logging.getLogger(__name__)
+
+# Fichiers composant un store d'explications sur disque
+IDS_FILE = "ids.npy"
+INDICES_FILE = "indices.npy"
+VALUES_FILE = "values.npy"
+BASE_VALUES_FILE = "base_values.npy"
+DIGESTS_FILE = "digests.npy"
+META_FILE = "meta.json"
+
+# Taille des paquets de clients envoyés à chaque processus
+SHAP_STORE_CHUNK_SIZE = int(os.getenv("SHAP_STORE_CHUNK_SIZE", "1000"))
+
+
+class ShapStore:
+    """
+    Explications SHAP précalculées hors ligne pour toute la base clients.
+
+    Pour chaque client (SK_ID_CURR triés, recherche dichotomique) : les `k`
+    features les plus importantes (indices int32, valeurs float32), la valeur
+    de base et l'empreinte de la ligne de features utilisée. Une entrée n'est
+    servie que si l'empreinte correspond encore aux données du client ; sinon
+    l'explication est recalculée à la demande.
+    """
+
+    def __init__(
+        self,
+        ids,
+        indices,
+        values,
+        base_values,
+        digests,
+        feature_names,
+        model_version=None,
+        source=None,
+    ):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.indices = indices
+        self.values = values
+        self.base_values = base_values
+        self.digests = digests
+        self.feature_names = list(feature_names)
+        self.model_version = model_version
+        self.source = source
+        self.top_k = indices.shape[1] if indices.ndim == 2 else 0
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Charge un store construit par `save` (mmap par défaut)."""
+        path = Path(path)
+        with open(path / META_FILE, encoding="utf-8") as f:
+            meta = json.load(f)
+        mode = "r" if mmap else None
+        return cls(
+            np.load(path / IDS_FILE),
+            np.load(path / INDICES_FILE, mmap_mode=mode),
+            np.load(path / VALUES_FILE, mmap_mode=mode),
+            np.load(path / BASE_VALUES_FILE, mmap_mode=mode),
+            np.load(path / DIGESTS_FILE, mmap_mode=mode),
+            meta["feature_names"],
+            model_version=meta.get("model_version"),
+            source=str(path),
+        )
+
+    def save(self, path):
+        """Écrit le store sur disque (tableaux `.npy` + métadonnées)."""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        np.save(path / IDS_FILE, self.ids)
+        np.save(path / INDICES_FILE, self.indices)
+        np.save(path / VALUES_FILE, self.values)
+        np.save(path / BASE_VALUES_FILE, self.base_values)
+        np.save(path / DIGESTS_FILE, self.digests)
+        with open(path / META_FILE, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "model_version": self.model_version,
+                    "top_k": self.top_k,
+                    "n_clients": len(self.ids),
+                    "feature_names": self.feature_names,
+                },
+                f,
+            )
+
+    def get(self, client, top_k):
+        """Explication stockée pour `client` (ClientFeatures), ou None.
+
+        None si le client est absent, si le store contient moins de `top_k`
+        features par client ou si la ligne de features a changé depuis le
+        calcul.
+        """
+        pos = -1
+        if len(self.ids) and top_k <= self.top_k:
+            pos = int(np.searchsorted(self.ids, client.client_id))
+            if pos >= len(self.ids) or self.ids[pos] != client.client_id:
+                pos = -1
+        if pos < 0:
+            self.misses += 1
+            return None
+        if self.digests[pos].decode() != client.data_version:
+            self.stale += 1
+            return None
+        self.hits += 1
+        return ShapExplanation(
+            self.indices[pos, :top_k],
+            self.values[pos, :top_k],
+            self.base_values[pos],
+        )
+
+    def stats(self):
+        """Taille et compteurs du store (pour le monitoring)."""
+        return {
+            "n_clients": len(self.ids),
+            "top_k": self.top_k,
+            "model_version": self.model_version,
+            "bytes": int(
+                self.indices.nbytes
+                + self.values.nbytes
+                + self.base_values.nbytes
+                + self.digests.nbytes
+                + self.ids.nbytes
+            ),
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "source": self.source,
+        }
+
+
+# Explainer de chaque processus du pool (initialisé une fois par processus)
+_worker_explainer = None
+
+
+def _init_worker(model_path, backend):
+    global _worker_explainer
+    import joblib
+
+    model = joblib.load(model_path)
+    if hasattr(model, "named_steps") and "clf" in model.named_steps:
+        model = model.named_steps["clf"]
+    # Un thread par processus : le parallélisme vient du pool
+    _worker_explainer = make_explainer(model, backend, num_threads=1)
+
+
+def _explain_chunk(args):
+    """Calcule le top-k SHAP d'un paquet de lignes (dans un processus du pool)."""
+    start, features, top_k = args
+    values, base_values = _worker_explainer.explain(features)
+    indices, top_values = top_k_rows(values, top_k)
+    return start, indices, top_values.astype(np.float32), base_values
+
+
+def build_shap_store(
+    feature_store,
+    model_path,
+    output_path,
+    top_k,
+    model_version=None,
+    workers=None,
+    chunk_size=SHAP_STORE_CHUNK_SIZE,
+    backend=None,
+):
+    """Calcule les explications de tous les clients de `feature_store`.
+
+    Les lignes sont découpées en paquets de `chunk_size` répartis sur
+    `workers` processus (défaut : tous les coeurs), chacun avec son propre
+    explainer (backend : EXPLAINER_BACKEND par défaut).
+    """
+    n_clients = len(feature_store)
+    top_k = min(top_k, len(feature_store.feature_names))
+    indices = np.empty((n_clients, top_k), dtype=np.int32)
+    values = np.empty((n_clients, top_k), dtype=np.float32)
+    base_values = np.empty(n_clients, dtype=np.float32)
+    digests = np.array(
+        [data_digest(row) for row in feature_store.matrix], dtype="S16"
+    ).reshape(n_clients)
+
+    tasks = (
+        (start, np.asarray(feature_store.matrix[start : start + chunk_size]), top_k)
+        for start in range(0, n_clients, chunk_size)
+    )
+    workers = workers or os.cpu_count() or 1
+    start_time = time.time()
+    done = 0
+    with multiprocessing.Pool(workers, _init_worker, (model_path, backend)) as pool:
+        for start, idx, vals, base in pool.imap_unordered(_explain_chunk, tasks):
+            end = start + len(idx)
+            indices[start:end] = idx
+            values[start:end] = vals
+            base_values[start:end] = base
+            done += len(idx)
+            print(
+                f"{done}/{n_clients} clients expliqués "
+                f"({time.time() - start_time:.1f}s)"
+            )
+
+    store = ShapStore(
+        feature_store.ids,
+        indices,
+        values,
+        base_values,
+        digests,
+        feature_store.feature_names,
+        model_version=model_version,
+    )
+    store.save(output_path)
+    return store
+
+
+if __name__ == "__main__":
+    # Usage : python -m src.model.shap_store [db_path] [output_dir] [top_k] [workers]
+    from src.model.feature_store import FeatureStore
+    from src.model.loader import SHAP_TOP_K, loader
+
+    DB_FILE = sys.argv[1] if len(sys.argv) > 1 else loader.db_path
+    OUTPUT_DIR = sys.argv[2] if len(sys.argv) > 2 else "data/shap_store"
+    TOP_K = int(sys.argv[3]) if len(sys.argv) > 3 else SHAP_TOP_K
+    WORKERS = int(sys.argv[4]) if len(sys.argv) > 4 else None
+    MODEL_FILE = "src/model/model.joblib"
+
+    if not os.path.exists(DB_FILE):
+        print(f"Erreur : La base {DB_FILE} n'existe pas.")
+        sys.exit(1)
+
+    # Lignes dans l'ordre d'entrée du modèle (mêmes empreintes qu'à la requête)
+    loader.load_artifacts(model_path=MODEL_FILE)
+    features = FeatureStore.from_sqlite(DB_FILE, loader.get_model_feature_names())
+
+    print(f"Calcul SHAP de {len(features)} clients : {DB_FILE} -> {OUTPUT_DIR}")
+    start_time = time.time()
+    build_shap_store(
+        features,
+        MODEL_FILE,
+        OUTPUT_DIR,
+        TOP_K,
+        model_version=loader.model_version,
+        workers=WORKERS,
+    )
+    print(f"Store SHAP construit en {time.time() - start_time:.2f} secondes.")
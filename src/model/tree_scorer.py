@@ -0,0 +1,117 @@
+import logging
+import os
+
+import numpy as np
+
+from src.model.trees import TreeArrays
+
+logger = logging.getLogger(__name__)
+
+# Backend de scoring : onnx (ONNX Runtime), numba (forêt compilée) ou joblib
+SCORING_BACKEND = os.getenv("SCORING_BACKEND", "onnx")
+SCORING_BACKENDS = ("onnx", "numba", "joblib")
+
+
+def _compile_kernel():
+    """Parcours compilé de la forêt (None si numba n'est pas disponible)."""
+    try:
+        from numba import njit
+    except ImportError:
+        return None
+
+    # nogil : plusieurs threads du pool de calcul scorent en parallèle
+    @njit(cache=True, nogil=True)
+    def raw_score_kernel(
+        X, feature, threshold, left, right, missing_left, zero_missing, value, roots
+    ):
+        out = np.zeros(X.shape[0])
+        for i in range(X.shape[0]):
+            total = 0.0
+            for t in range(roots.shape[0]):
+                node = roots[t]
+                while left[node] >= 0:
+                    x = X[i, feature[node]]
+                    if np.isnan(x) or (zero_missing[node] and x == 0.0):
+                        go_left = missing_left[node]
+                    else:
+                        go_left = x <= threshold[node]
+                    node = left[node] if go_left else right[node]
+                total += value[node]
+            out[i] = total
+        return out
+
+    return raw_score_kernel
+
+
+class TreeScorer:
+    """
+    Scoring de la forêt LightGBM sans ONNX Runtime ni LightGBM.
+
+    Les arbres du booster sont aplatis en tableaux contigus (cf.
+    src/model/trees.py) et parcourus par une boucle compilée avec numba : pas
+    de conversion d'entrée ni de surcoût par appel, ce qui domine la latence
+    d'une ligne seule sur de petites machines. Sans numba, le parcours
+    vectorisé NumPy de `TreeArrays` est utilisé.
+    """
+
+    name = "numba"
+
+    def __init__(self, trees):
+        self.trees = trees
+        self.sigmoid = trees.sigmoid
+        self._kernel = _compile_kernel()
+        if self._kernel is None:
+            logger.warning("numba indisponible : scoring des arbres en NumPy")
+
+    @classmethod
+    def from_classifier(cls, classifier):
+        booster = getattr(classifier, "booster_", None)
+        if booster is None or not hasattr(booster, "dump_model"):
+            raise TypeError(f"Pas de booster LightGBM dans {type(classifier)}")
+        return cls(TreeArrays.from_booster(booster))
+
+    @property
+    def compiled(self):
+        return self._kernel is not None
+
+    def raw_score(self, X, start=0, stop=None):
+        """Score brut (log-odds) de chaque ligne de `X` (n, n_features).
+
+        `start`/`stop` : tranche d'arbres évaluée (tous par défaut).
+        """
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if self._kernel is None:
+            return self.trees.raw_score(X, start, stop)
+        if X.dtype not in (np.float32, np.float64):
+            X = X.astype(np.float64)
+        t = self.trees
+        return self._kernel(
+            np.ascontiguousarray(X),
+            t.feature,
+            t.threshold,
+            t.left,
+            t.right,
+            t.missing_left,
+            t.zero_missing,
+            t.value,
+            t.roots[start:stop],
+        )
+
+    def to_proba(self, raw_score):
+        """Probabilité de la classe 1 à partir du score brut."""
+        return 1.0 / (1.0 + np.exp(-self.sigmoid * raw_score))
+
+    def to_raw_score(self, proba):
+        """Inverse de `to_proba` (score brut d'une probabilité)."""
+        return np.log(proba / (1.0 - proba)) / self.sigmoid
+
+    def predict_proba(self, X):
+        """Probabilité de la classe 1 de chaque ligne."""
+        return self.to_proba(self.raw_score(X))
+
+    def warmup(self):
+        """Compile le parcours (float32 et float64) avant la première requête."""
+        for dtype in (np.float32, np.float64):
+            self.predict_proba(np.zeros((1, self.trees.n_features), dtype=dtype))
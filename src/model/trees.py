@@ -0,0 +1,199 @@
+import numpy as np
+
+
+class TreeArrays:
+    """
+    Forêt LightGBM aplatie en tableaux NumPy (un noeud par position).
+
+    Les arbres du booster (`dump_model`) sont mis bout à bout : `roots[t]` est
+    l'indice de la racine de l'arbre `t`, et pour chaque noeud on garde la
+    feature et le seuil du split (`x <= seuil` : à gauche), les enfants, la
+    direction des valeurs manquantes et la valeur du noeud (espérance du
+    sous-arbre pour un split, sortie pour une feuille). Permet de parcourir toutes les
+    feuilles d'un lot en NumPy, sans repasser par LightGBM.
+    """
+
+    def __init__(
+        self,
+        feature,
+        threshold,
+        left,
+        right,
+        missing_left,
+        zero_missing,
+        value,
+        roots,
+        n_features,
+        objective=None,
+    ):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.missing_left = missing_left
+        self.zero_missing = zero_missing
+        self.value = value
+        self.roots = roots
+        self.n_features = n_features
+        # Objectif LightGBM (ex. "binary sigmoid:1"), pour passer du score
+        # brut à la probabilité
+        self.objective = objective
+        self.is_leaf = left < 0
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    @classmethod
+    def from_booster(cls, booster):
+        """Aplatit un `lightgbm.Booster` (splits numériques uniquement)."""
+        dump = booster.dump_model()
+        nodes = []
+        roots = []
+        for tree in dump["tree_info"]:
+            roots.append(_flatten(tree["tree_structure"], nodes)[0])
+
+        n = len(nodes)
+        feature = np.full(n, -1, dtype=np.int32)
+        threshold = np.zeros(n, dtype=np.float64)
+        left = np.full(n, -1, dtype=np.int32)
+        right = np.full(n, -1, dtype=np.int32)
+        missing_left = np.zeros(n, dtype=bool)
+        zero_missing = np.zeros(n, dtype=bool)
+        value = np.zeros(n, dtype=np.float64)
+        for i, node in enumerate(nodes):
+            value[i] = node["value"]
+            if node["left"] < 0:
+                continue
+            feature[i] = node["feature"]
+            threshold[i] = node["threshold"]
+            left[i] = node["left"]
+            right[i] = node["right"]
+            zero_missing[i] = node["missing_type"] == "Zero"
+            if node["missing_type"] == "None":
+                # Sans gestion des manquants, LightGBM remplace NaN par 0
+                missing_left[i] = 0.0 <= node["threshold"]
+            else:
+                missing_left[i] = node["default_left"]
+
+        return cls(
+            feature,
+            threshold,
+            left,
+            right,
+            missing_left,
+            zero_missing,
+            value,
+            np.asarray(roots, dtype=np.int32),
+            booster.num_feature(),
+            objective=dump.get("objective"),
+        )
+
+    @property
+    def sigmoid(self):
+        """Coefficient de la sigmoïde de l'objectif `binary` (1 par défaut)."""
+        for part in (self.objective or "").split()[1:]:
+            name, _, value = part.partition(":")
+            if name == "sigmoid":
+                return float(value)
+        return 1.0
+
+    def _go_left(self, nodes, x):
+        # x : valeurs des features testées par `nodes` (float)
+        missing = np.isnan(x) | (self.zero_missing[nodes] & (x == 0))
+        with np.errstate(invalid="ignore"):
+            return np.where(
+                missing, self.missing_left[nodes], x <= self.threshold[nodes]
+            )
+
+    def raw_score(self, X, start=0, stop=None):
+        """Score brut (log-odds) de chaque ligne : somme des feuilles atteintes.
+
+        `start`/`stop` : ne somme que les arbres `start` à `stop - 1` (la
+        somme des tranches successives donne le score complet).
+        """
+        X = np.asarray(X, dtype=np.float64)
+        node = np.tile(self.roots[start:stop], (len(X), 1))
+        active = ~self.is_leaf[node]
+        while active.any():
+            r, t = np.nonzero(active)
+            current = node[r, t]
+            x = X[r, self.feature[current]]
+            child = np.where(
+                self._go_left(current, x), self.left[current], self.right[current]
+            )
+            node[r, t] = child
+            active[r, t] = ~self.is_leaf[child]
+        return self.value[node].sum(axis=1)
+
+    def saabas(self, X):
+        """Contributions de Saabas (chemin de décision) de chaque ligne.
+
+        À chaque split traversé, la variation de la valeur du noeud est
+        attribuée à la feature du split. Approximation de TreeSHAP, exacte en
+        somme : contributions + valeur de base = score brut.
+
+        Returns:
+            tuple: (contributions (n, n_features), valeur de base (float)).
+        """
+        X = np.asarray(X, dtype=np.float64)
+        n_rows = len(X)
+        node = np.tile(self.roots, (n_rows, 1))
+        contrib = np.zeros(n_rows * self.n_features)
+        active = ~self.is_leaf[node]
+        while active.any():
+            r, t = np.nonzero(active)
+            current = node[r, t]
+            feature = self.feature[current]
+            x = X[r, feature]
+            child = np.where(
+                self._go_left(current, x), self.left[current], self.right[current]
+            )
+            contrib += np.bincount(
+                r * self.n_features + feature,
+                weights=self.value[child] - self.value[current],
+                minlength=n_rows * self.n_features,
+            )
+            node[r, t] = child
+            active[r, t] = ~self.is_leaf[child]
+        base_value = float(self.value[self.roots].sum())
+        return contrib.reshape(n_rows, self.n_features), base_value
+
+
+def _flatten(tree, nodes):
+    """Ajoute un arbre (structure de `dump_model`) à `nodes`.
+
+    La valeur d'un split est la moyenne des feuilles de son sous-arbre,
+    pondérée par le nombre d'exemples d'entraînement (comme l'espérance de
+    TreeSHAP) ; `internal_value` n'inclut pas le biais initial du booster.
+
+    Returns:
+        tuple: (indice de la racine, valeur, nombre d'exemples).
+    """
+    index = len(nodes)
+    if "leaf_value" in tree:
+        nodes.append({"value": tree["leaf_value"], "left": -1})
+        return index, tree["leaf_value"], tree.get("leaf_count", 1)
+    if tree.get("decision_type", "<=") != "<=":
+        raise ValueError(f"Split non supporté : {tree['decision_type']}")
+
+    node = {
+        "feature": tree["split_feature"],
+        "threshold": tree["threshold"],
+        "missing_type": tree.get("missing_type", "None"),
+        "default_left": tree.get("default_left", True),
+    }
+    nodes.append(node)
+    node["left"], left_value, left_count = _flatten(tree["left_child"], nodes)
+    node["right"], right_value, right_count = _flatten(tree["right_child"], nodes)
+    count = left_count + right_count
+    node["value"] = (
+        (left_value * left_count + right_value * right_count) / count
+        if count
+        else (left_value + right_value) / 2
+    )
+    return index, node["value"], count
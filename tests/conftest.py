@@ -3,8 +3,11 @@ from fastapi.testclient import TestClient
 from unittest.mock import MagicMock, patch
 import pandas as pd
 import numpy as np
+from lightgbm import LGBMClassifier
 
 from src.model.loader import loader
+from src.model.client_features import ClientFeatures
+from src.model.cache import ShapExplanation
 from src.api.main import app
 
 
@@ -27,18 +30,47 @@ def mock_loader():
     """Fixture pour mocker le ModelLoader avec comportements par défaut."""
     with patch("src.api.main.loader") as mock:
         # Mock SHAP par défaut pour éviter les crashes dans predict()
-        shap_mock = MagicMock()
-        # On simule un tableau (1, N) pour 1 sample
-        shap_mock.values = np.array([[0.01] * 200])
-        shap_mock.base_values = np.array([0.5])
-        mock.get_shap_values_cached.return_value = shap_mock
+        # (explication compacte : top-k indices/valeurs + valeur de base)
+        mock.get_shap_values_cached.return_value = ShapExplanation(
+            [0, 1, 2], [0.03, -0.02, 0.01], 0.5
+        )
+        mock.get_feature_name_array.side_effect = lambda names: np.asarray(
+            names, dtype=object
+        )
+        mock.cache.stats.return_value = {}
+        mock.persistent_cache = None
+        mock.shap_store = None
+        mock.cascade = None
+
+        # fetch_client_features s'appuie sur get_client_data (comme le vrai loader)
+        def fetch_client_features(client_id):
+            data = mock.get_client_data(client_id)
+            return ClientFeatures.from_frame(data, client_id)
+
+        mock.fetch_client_features.side_effect = fetch_client_features
+        mock.feature_store = None
+        mock.db_path = "data/database.sqlite"
+        mock.readiness.return_value = {
+            "onnx": True,
+            "model": True,
+            "tree_scorer": False,
+            "explainer": True,
+            "fast_explainer": True,
+            "feature_store": False,
+            "shap_store": False,
+            "cascade": False,
+            "persistent_cache": False,
+            "explain_pool": False,
+        }
+        mock.explain_pool = None
         yield mock
 
 
 @pytest.fixture(autouse=True)
-def mock_log_prediction():
-    """Fixture automatique pour mocker log_prediction (évite l'accès SQLite)."""
-    with patch("src.api.main.log_prediction") as mock:
+def mock_log_writer():
+    """Fixture automatique pour mocker le writer de logs (évite l'accès SQLite)."""
+    with patch("src.api.main.log_writer") as mock:
+        mock.stats.return_value = {}
         yield mock
 
 
@@ -51,6 +83,35 @@ def mock_model():
     return model
 
 
+# Nombre de features du modèle LightGBM de test (fixture `lgbm_model`)
+N_TEST_FEATURES = 6
+
+
+@pytest.fixture(scope="session")
+def lgbm_model():
+    """
+    Petit LGBMClassifier entraîné une seule fois pour toute la session.
+
+    100 arbres de 8 feuilles sur 6 features. Les NaN ne portent que sur les
+    2 premières à l'entraînement : les splits des autres n'ont pas de gestion
+    des manquants (missing_type None), les deux cas sont donc couverts.
+    """
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(1000, N_TEST_FEATURES))
+    X[:, :2][rng.random((1000, 2)) < 0.15] = np.nan
+    signal = np.nan_to_num(X[:, 0]) + 0.5 * np.nan_to_num(X[:, 1])
+    y = (signal + rng.normal(scale=0.3, size=1000) > 0).astype(int)
+    return LGBMClassifier(n_estimators=100, num_leaves=8, verbose=-1).fit(X, y)
+
+
+def random_rows(n_rows, seed=0, missing=0.0):
+    """Lignes aléatoires pour `lgbm_model`, avec une part `missing` de NaN."""
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, N_TEST_FEATURES))
+    X[rng.random(X.shape) < missing] = np.nan
+    return X
+
+
 def create_client_features(overrides=None):
     """
     Data Factory pour générer des features client.
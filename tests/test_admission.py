@@ -0,0 +1,157 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from src.api import main
+from src.api.admission import BULK, INTERACTIVE, AdmissionController, Overloaded
+from tests.conftest import create_client_features
+
+
+def test_disabled_controller_admits_everything():
+    controller = AdmissionController(max_in_flight=0)
+
+    async def scenario():
+        async with controller.admit(BULK) as ticket:
+            return ticket
+
+    ticket = asyncio.run(scenario())
+    assert not controller.enabled
+    assert ticket.lane == BULK and not ticket.degraded
+
+
+def test_lane_from_priority_header():
+    assert AdmissionController.lane("bulk") == BULK
+    assert AdmissionController.lane(" Interactive ") == INTERACTIVE
+    assert AdmissionController.lane(None, default=BULK) == BULK
+    assert AdmissionController.lane("urgent", default=BULK) == BULK
+
+
+def test_full_queue_sheds_immediately():
+    """Places et file pleines : rejet sans attendre (Overloaded -> 503)."""
+    controller = AdmissionController(
+        max_in_flight=1, max_queue=1, queue_timeout_ms=1000, retry_after_s=3
+    )
+
+    async def scenario():
+        first = await controller.acquire(INTERACTIVE)
+        queued = asyncio.ensure_future(controller.acquire(INTERACTIVE))
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as excinfo:
+            await controller.acquire(INTERACTIVE)
+        controller.release(first.lane)
+        await queued
+        controller.release(INTERACTIVE)
+        return excinfo.value
+
+    error = asyncio.run(scenario())
+    assert error.retry_after == 3
+    counters = controller.stats()["lanes"][INTERACTIVE]
+    assert counters["admitted"] == 2
+    assert counters["queued"] == 1
+    assert counters["shed"] == 1
+    assert counters["in_flight"] == 0 and counters["waiting"] == 0
+
+
+def test_queue_timeout_sheds():
+    controller = AdmissionController(max_in_flight=1, queue_timeout_ms=10)
+
+    async def scenario():
+        await controller.acquire(INTERACTIVE)
+        with pytest.raises(Overloaded):
+            await controller.acquire(INTERACTIVE)
+
+    asyncio.run(scenario())
+    stats = controller.stats()["lanes"][INTERACTIVE]
+    assert stats["shed"] == 1 and stats["waiting"] == 0
+
+
+def test_interactive_lane_served_first():
+    """Une place libérée revient à la file interactive avant la file bulk."""
+    controller = AdmissionController(max_in_flight=2, bulk_share=1.0)
+    order = []
+
+    async def request(lane):
+        async with controller.admit(lane):
+            order.append(lane)
+            await asyncio.sleep(0.01)
+
+    async def scenario():
+        await controller.acquire(INTERACTIVE)
+        await controller.acquire(INTERACTIVE)
+        tasks = [asyncio.ensure_future(request(BULK))]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.ensure_future(request(INTERACTIVE)))
+        await asyncio.sleep(0)
+        controller.release(INTERACTIVE)
+        await asyncio.gather(*tasks)
+        controller.release(INTERACTIVE)
+
+    asyncio.run(scenario())
+    assert order == [INTERACTIVE, BULK]
+
+
+def test_bulk_lane_is_capped():
+    """Les requêtes bulk n'occupent pas toutes les places."""
+    controller = AdmissionController(
+        max_in_flight=4, bulk_share=0.5, queue_timeout_ms=10
+    )
+
+    async def scenario():
+        await controller.acquire(BULK)
+        await controller.acquire(BULK)
+        with pytest.raises(Overloaded):
+            await controller.acquire(BULK)
+        # La file interactive dispose encore des places restantes
+        return await controller.acquire(INTERACTIVE)
+
+    ticket = asyncio.run(scenario())
+    assert ticket.lane == INTERACTIVE
+    assert controller.stats()["lanes"][BULK]["in_flight"] == 2
+
+
+def test_degrades_under_pressure():
+    controller = AdmissionController(max_in_flight=2, degrade_at=0.5)
+
+    async def scenario():
+        first = await controller.acquire(INTERACTIVE)
+        second = await controller.acquire(INTERACTIVE)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert not first.degraded
+    assert second.degraded
+    assert controller.stats()["lanes"][INTERACTIVE]["degraded"] == 1
+
+
+def test_predict_returns_503_with_retry_after(client, mock_loader):
+    saturated = AdmissionController(max_in_flight=1, max_queue=0, retry_after_s=2)
+    saturated._in_flight[INTERACTIVE] = 1
+
+    with patch.object(main, "admission", saturated):
+        response = client.get("/predict/123")
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "2"
+    assert not mock_loader.fetch_client_features.called
+
+
+def test_predict_degraded_to_score_only(client, mock_loader):
+    """Sous pression : score seul, sans SHAP, signalé par `degraded`."""
+    mock_loader.predict_proba.return_value = 0.3
+    mock_loader.get_client_data.return_value = create_client_features()
+
+    with patch.object(
+        main, "admission", AdmissionController(max_in_flight=2, degrade_at=0.5)
+    ):
+        # Aucune requête en cours : pression nulle, réponse complète
+        assert client.get("/predict/123").json()["degraded"] is False
+        main.admission._in_flight[BULK] = 1
+        response = client.get("/predict/123", headers={"X-Priority": "interactive"})
+
+    body = response.json()
+    assert response.status_code == 200
+    assert body["degraded"] is True
+    assert body["explain"] == "none"
+    assert body["shap_values"] == {}
+    assert mock_loader.get_shap_values_cached.call_count == 1
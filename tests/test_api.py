@@ -1,6 +1,10 @@
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 import numpy as np
+import pytest
 import pandas as pd
+from src.model.client_features import ClientFeatures
+from src.model.cache import ShapExplanation
+from src.model.loader import loader
 from tests.conftest import create_client_features
 
 
@@ -83,6 +87,7 @@ def test_predict_model_error(client, mock_loader, mock_model):
 def test_predict_no_model(client, mock_loader):
     """Vérifie l'erreur si le modèle n'est pas chargé."""
     mock_loader.predict_proba.return_value = None
+    mock_loader.get_client_data.return_value = create_client_features()
 
     response = client.get("/predict/123")
     assert response.status_code == 500
@@ -144,3 +149,189 @@ def test_clean_feature_names():
     df = pd.DataFrame({"Feature (Name)!": [1]})
     df_clean = clean_feature_names(df)
     assert "Feature__Name__" in df_clean.columns
+
+
+def test_predict_batch(client, mock_loader, mock_log_writer):
+    """Scoring batch : un seul appel au loader, clients inconnus dans `errors`."""
+    mock_loader.fetch_clients_features.return_value = [
+        ClientFeatures.from_frame(create_client_features({"SK_ID_CURR": 1})),
+        ClientFeatures.from_frame(create_client_features({"SK_ID_CURR": 2})),
+    ]
+    mock_loader.score_and_explain_batch.return_value = [
+        (0.2, ShapExplanation([0, 1], [0.02, 0.01], 0.5)),
+        (0.7, ShapExplanation([1, 0], [0.03, -0.01], 0.5)),
+    ]
+
+    response = client.post("/predict/batch", json={"client_ids": [2, 999, 1, 2]})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [p["client_id"] for p in data["predictions"]] == [2, 1]
+    # Scores alignés sur l'ordre de la requête (client 2 puis client 1)
+    assert [p["score"] for p in data["predictions"]] == [0.2, 0.7]
+    assert [p["decision"] for p in data["predictions"]] == ["Accepté", "Refusé"]
+    assert data["errors"] == [
+        {"client_id": 999, "detail": "Client 999 non trouvé dans la base."}
+    ]
+    # Clients transmis dans l'ordre de la requête
+    assert mock_loader.score_and_explain_batch.call_count == 1
+    clients = mock_loader.score_and_explain_batch.call_args[0][0]
+    assert [c.client_id for c in clients] == [2, 1]
+    assert len(mock_log_writer.submit_many.call_args[0][0]) == 2
+
+
+def test_predict_batch_all_unknown(client, mock_loader):
+    """Scoring batch : aucun client trouvé, pas d'appel modèle."""
+    mock_loader.fetch_clients_features.return_value = []
+
+    response = client.post("/predict/batch", json={"client_ids": [999]})
+
+    assert response.status_code == 200
+    assert response.json()["predictions"] == []
+    assert len(response.json()["errors"]) == 1
+    assert not mock_loader.score_and_explain_batch.called
+
+
+def test_predict_batch_empty_request(client):
+    """Scoring batch : une liste vide est rejetée par la validation."""
+    response = client.post("/predict/batch", json={"client_ids": []})
+    assert response.status_code == 422
+
+
+def test_predict_explain_none(client, mock_loader):
+    """explain=none : score seul, SHAP jamais calculé."""
+    mock_loader.predict_proba.return_value = 0.3
+    mock_loader.get_client_data.return_value = create_client_features()
+
+    response = client.get("/predict/123?explain=none")
+
+    assert response.status_code == 200
+    assert response.json()["shap_values"] == {}
+    assert response.json()["explain"] == "none"
+    assert not mock_loader.get_shap_values_cached.called
+
+
+def test_predict_explain_fast(client, mock_loader):
+    """explain=fast : le mode est transmis au loader et renvoyé."""
+    mock_loader.predict_proba.return_value = 0.3
+    mock_loader.get_client_data.return_value = create_client_features()
+
+    response = client.get("/predict/123?explain=fast")
+
+    assert response.status_code == 200
+    assert response.json()["explain"] == "fast"
+    assert mock_loader.get_shap_values_cached.call_args.kwargs["mode"] == "fast"
+
+
+def test_predict_explain_invalid(client):
+    response = client.get("/predict/123?explain=full")
+    assert response.status_code == 422
+
+
+def test_predict_batch_explain_none(client, mock_loader):
+    """Batch en mode `none` : pas d'appel à l'explainer."""
+    mock_loader.fetch_clients_features.return_value = [
+        ClientFeatures.from_frame(create_client_features({"SK_ID_CURR": 1})),
+    ]
+    mock_loader.score_and_explain_batch.return_value = [(0.2, None)]
+
+    response = client.post(
+        "/predict/batch", json={"client_ids": [1], "explain": "none"}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["predictions"][0]["explain"] == "none"
+    assert response.json()["predictions"][0]["shap_values"] == {}
+    assert mock_loader.score_and_explain_batch.call_args.kwargs["mode"] == "none"
+
+
+def test_predict_top_k(client, mock_loader):
+    """top_k : transmis au loader, validé (>= 1)."""
+    mock_loader.predict_proba.return_value = 0.3
+    mock_loader.get_client_data.return_value = create_client_features()
+
+    response = client.get("/predict/123?top_k=2")
+
+    assert response.status_code == 200
+    assert mock_loader.get_shap_values_cached.call_args.kwargs["top_k"] == 2
+    assert client.get("/predict/123?top_k=0").status_code == 422
+
+
+def test_predict_batch_top_k(client, mock_loader):
+    """Batch : top-k transmis au loader, explications triées par |valeur|."""
+    mock_loader.fetch_clients_features.return_value = [
+        ClientFeatures.from_frame(create_client_features({"SK_ID_CURR": 1})),
+    ]
+    mock_loader.score_and_explain_batch.return_value = [
+        (0.2, ShapExplanation([7, 9], [-0.4, 0.2], 0.5))
+    ]
+
+    response = client.post("/predict/batch", json={"client_ids": [1], "top_k": 2})
+
+    assert response.status_code == 200
+    assert mock_loader.score_and_explain_batch.call_args.kwargs["top_k"] == 2
+    prediction = response.json()["predictions"][0]
+    names = ClientFeatures.from_frame(create_client_features()).feature_names
+    assert list(prediction["shap_values"]) == [names[7], names[9]]
+    assert prediction["shap_values"][names[7]] == pytest.approx(-0.4)
+    assert prediction["base_value"] == 0.5
+
+
+def test_livez(client):
+    assert client.get("/livez").json() == {"status": "alive"}
+
+
+def test_readyz_waits_for_explainer(client, mock_loader):
+    """503 tant que l'explainer est en préchauffage ; les sondes ne chargent rien."""
+    mock_loader.readiness.return_value = {
+        **mock_loader.readiness.return_value,
+        "explainer": False,
+    }
+    with patch("src.api.main.warmup") as mock_warmup:
+        mock_warmup.status.return_value = "running"
+        response = client.get("/readyz")
+        assert response.status_code == 503
+        assert response.json()["components"]["explainer"] == "running"
+
+        # Feature store non configuré (étape terminée sans store) : pas bloquant
+        mock_warmup.status.return_value = "disabled"
+        response = client.get("/readyz")
+        assert response.status_code == 200
+        assert response.json()["components"]["feature_store"] == "disabled"
+
+    assert not mock_loader.load_artifacts.called
+    client.get("/health")
+    assert not mock_loader.load_artifacts.called
+
+
+def test_predict_batch_served_from_shap_store(client):
+    """Batch : un client du store SHAP n'est pas recalculé (même chemin que
+    /predict : caches puis store, via score_and_explain_batch)."""
+    clients = [
+        ClientFeatures.from_frame(create_client_features({"SK_ID_CURR": 1})),
+        ClientFeatures.from_frame(create_client_features({"SK_ID_CURR": 2})),
+    ]
+    stored = ShapExplanation([4, 2], [0.3, -0.1], 0.45)
+    shap_store = MagicMock()
+    shap_store.get.side_effect = lambda c, top_k: stored if c.client_id == 1 else None
+    loader.shap_store = shap_store
+    shap_rows = (np.full((1, 11), 0.01), np.array([0.5]))
+
+    with (
+        patch.object(loader, "fetch_clients_features", return_value=clients),
+        patch.object(loader, "predict_proba_batch", return_value=np.array([0.2, 0.7])),
+        patch.object(
+            loader, "get_shap_values_batch", return_value=shap_rows
+        ) as mock_shap,
+    ):
+        response = client.post("/predict/batch", json={"client_ids": [1, 2]})
+
+    assert response.status_code == 200
+    first, second = response.json()["predictions"]
+    names = clients[0].feature_names
+    assert first["shap_values"] == pytest.approx({names[4]: 0.3, names[2]: -0.1})
+    assert first["base_value"] == 0.45
+    assert second["base_value"] == 0.5
+    # Seul le client absent du store passe par l'explainer
+    assert mock_shap.call_count == 1
+    assert mock_shap.call_args[0][0].shape[0] == 1
@@ -2,10 +2,12 @@ import os
 import pytest
 import numpy as np
 from fastapi.testclient import TestClient
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 import pandas as pd
 
 from src.api.main import app, loader
+from src.model.client_features import ClientFeatures
+from src.model.cache import ShapExplanation
 from src.database.db_utils import init_logs_db
 
 TEST_DB_FILE = "test_api_logs.sqlite"
@@ -18,7 +20,7 @@ def mock_loader_monitoring():
         patch.object(loader, "db_path", TEST_DB_FILE),
         patch.object(loader, "model") as mock_model,
         patch.object(loader, "predict_proba") as mock_predict,
-        patch.object(loader, "get_client_data") as mock_data,
+        patch.object(loader, "fetch_client_features") as mock_data,
         patch.object(loader, "get_shap_values_cached") as mock_shap,
     ):
 
@@ -41,13 +43,10 @@ def mock_loader_monitoring():
             "AMT_INCOME_TOTAL": [200000.0],
             "DAYS_REGISTRATION": [-500],
         }
-        mock_data.return_value = pd.DataFrame(features_data)
+        mock_data.return_value = ClientFeatures.from_frame(pd.DataFrame(features_data))
 
-        # Mock SHAP
-        shap_mock = MagicMock()
-        shap_mock.values = np.array([[0.1] * 20])
-        shap_mock.base_values = np.array([0.5])
-        mock_shap.return_value = shap_mock
+        # Mock SHAP (explication compacte top-k)
+        mock_shap.return_value = ShapExplanation(np.arange(10), [0.1] * 10, 0.5)
 
         yield loader
 
@@ -69,8 +68,8 @@ def client_monitoring(mock_loader_monitoring):
 
 def test_predict_logs_to_db(client_monitoring, mock_loader_monitoring):
     """Vérifie que l'appel à /predict enregistre bien dans la BDD."""
-    # On désactive le mock automatique de log_prediction pour tester l'appel réel ou simuler
-    with patch("src.api.main.log_prediction") as mock_log:
+    # On désactive le mock automatique du writer pour tester l'appel réel ou simuler
+    with patch("src.api.main.log_writer") as mock_log:
         response = client_monitoring.get("/predict/123")
         assert response.status_code == 200
-        assert mock_log.called
+        assert mock_log.submit.called
@@ -0,0 +1,130 @@
+import asyncio
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from src.api import executors
+from src.api.batching import MicroBatcher
+from src.model.cache import ShapExplanation
+from src.model.client_features import ClientFeatures
+from src.model.loader import ModelLoader
+from tests.conftest import create_client_features
+
+
+@pytest.fixture(autouse=True)
+def shutdown_pools():
+    yield
+    executors.shutdown_executors()
+
+
+def run_concurrently(batcher, items):
+    async def scenario():
+        return await asyncio.gather(*(batcher.submit(i) for i in items))
+
+    return asyncio.run(scenario())
+
+
+def test_concurrent_submits_are_coalesced():
+    """Les requêtes arrivées dans la fenêtre partagent un seul appel batch."""
+    calls = []
+
+    def batch_fn(items):
+        calls.append(list(items))
+        return [i * 10 for i in items]
+
+    batcher = MicroBatcher(batch_fn, window_ms=20, max_batch_size=32)
+    assert run_concurrently(batcher, [1, 2, 3, 4]) == [10, 20, 30, 40]
+    assert calls == [[1, 2, 3, 4]]
+
+    stats = batcher.stats()
+    assert stats["batches"] == 1
+    assert stats["batch_size_histogram"] == {"4": 1}
+
+
+def test_max_batch_size_splits_batches():
+    """Un lot plein est envoyé sans attendre la fin de la fenêtre."""
+    sizes = []
+
+    def batch_fn(items):
+        sizes.append(len(items))
+        return items
+
+    batcher = MicroBatcher(batch_fn, window_ms=1000, max_batch_size=2)
+    assert run_concurrently(batcher, [1, 2, 3, 4]) == [1, 2, 3, 4]
+    assert sizes == [2, 2]
+    assert batcher.stats()["avg_batch_size"] == 2.0
+
+
+def test_batch_error_propagates_to_all_callers():
+    def batch_fn(items):
+        raise RuntimeError("boom")
+
+    batcher = MicroBatcher(batch_fn, window_ms=5)
+    with pytest.raises(RuntimeError):
+        run_concurrently(batcher, [1, 2])
+    # Tâche du lot terminée et libérée
+    assert not batcher._tasks
+
+
+def test_disabled_by_default_window():
+    assert not MicroBatcher(lambda items: items, window_ms=0).enabled
+
+
+def test_score_and_explain_batch_single_model_call():
+    """Un lot de clients ne déclenche qu'un appel modèle et un appel SHAP."""
+    loader = ModelLoader()
+    clients = [
+        ClientFeatures(i, np.array([float(i)], dtype=np.float32), ["F"]) for i in (1, 2)
+    ]
+    shap_values = (np.array([[0.1], [0.2]]), np.array([0.5, 0.5]))
+
+    with (
+        patch.object(
+            loader, "predict_proba_batch", return_value=np.array([0.3, 0.6])
+        ) as mock_score,
+        patch.object(loader, "get_shap_values_batch", return_value=shap_values),
+    ):
+        results = loader.score_and_explain_batch(clients)
+
+    assert mock_score.call_count == 1
+    assert [r[0] for r in results] == [0.3, 0.6]
+    assert results[1][1].values[0] == pytest.approx(0.2)
+    assert results[1][1].base_value == 0.5
+
+
+def test_score_and_explain_batch_uses_cache():
+    """Les clients déjà en cache ne sont pas recalculés."""
+    loader = ModelLoader()
+    clients = [
+        ClientFeatures(i, np.array([float(i)], dtype=np.float32), ["F"]) for i in (1, 2)
+    ]
+    shap_values = (np.array([[0.1], [0.2]]), np.array([0.5, 0.5]))
+
+    with (
+        patch.object(
+            loader, "predict_proba_batch", return_value=np.array([0.3, 0.6])
+        ) as mock_score,
+        patch.object(loader, "get_shap_values_batch", return_value=shap_values),
+    ):
+        first = loader.score_and_explain_batch(clients)
+        second = loader.score_and_explain_batch(clients)
+
+    assert mock_score.call_count == 1
+    assert [r[0] for r in second] == [r[0] for r in first]
+
+
+def test_predict_uses_micro_batcher(client, mock_loader):
+    """Micro-batching actif : /predict passe par score_and_explain_batch."""
+    mock_loader.get_client_data.return_value = create_client_features()
+    mock_loader.score_and_explain_batch.return_value = [
+        (0.7, ShapExplanation([0, 1], [0.02, 0.01], 0.4))
+    ]
+
+    with patch("src.api.main.micro_batcher.window", 0.001):
+        response = client.get("/predict/123")
+
+    assert response.status_code == 200
+    assert response.json()["score"] == 0.7
+    assert response.json()["base_value"] == 0.4
+    assert not mock_loader.predict_proba.called
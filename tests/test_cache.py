@@ -0,0 +1,140 @@
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+
+from src.model.cache import (
+    PredictionCache,
+    ShapExplanation,
+    top_k_indices,
+    top_k_rows,
+    top_k_shap,
+)
+from src.model.client_features import ClientFeatures
+from src.model.loader import ModelLoader
+
+
+def test_cache_hit_and_miss_counters():
+    cache = PredictionCache(max_entries=10, max_bytes=10**6, ttl=0)
+    key = ("score", 1, "v1", "d1")
+    assert cache.get(key) is None
+    cache.set(key, 0.42)
+    assert cache.get(key) == 0.42
+
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+    assert stats["by_kind"] == {"score": {"hits": 1, "misses": 1}}
+
+
+def test_cache_evicts_least_recently_used():
+    """Limite en nombre d'entrées : l'entrée la moins récente sort."""
+    cache = PredictionCache(max_entries=2, max_bytes=10**6, ttl=0)
+    cache.set(("score", 1), 0.1)
+    cache.set(("score", 2), 0.2)
+    cache.get(("score", 1))
+    cache.set(("score", 3), 0.3)
+
+    assert cache.get(("score", 2)) is None
+    assert cache.get(("score", 1)) == 0.1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_byte_limit():
+    """Limite en octets : la taille des tableaux numpy est prise en compte."""
+    explanation = ShapExplanation(np.arange(100), np.zeros(100), 0.0)
+    entry_size = explanation.nbytes + 200
+    cache = PredictionCache(max_entries=100, max_bytes=2 * entry_size, ttl=0)
+    for i in range(5):
+        cache.set(("shap", i), explanation)
+
+    assert len(cache) == 2
+    assert cache.stats()["bytes"] <= 2 * entry_size
+
+
+def test_cache_ttl_expiration():
+    cache = PredictionCache(max_entries=10, max_bytes=10**6, ttl=10)
+    with patch("src.model.cache.time.monotonic", return_value=100.0):
+        cache.set(("score", 1), 0.5)
+    with patch("src.model.cache.time.monotonic", return_value=105.0):
+        assert cache.get(("score", 1)) == 0.5
+    with patch("src.model.cache.time.monotonic", return_value=111.0):
+        assert cache.get(("score", 1)) is None
+    assert cache.stats()["expirations"] == 1
+    assert len(cache) == 0
+
+
+def test_top_k_shap_orders_by_absolute_value():
+    explanation = top_k_shap(np.array([0.1, -0.5, 0.3, 0.0]), 0.2, 2)
+    assert explanation.as_dict(["a", "b", "c", "d"]) == {
+        "b": -0.5,
+        "c": np.float32(0.3),
+    }
+    assert explanation.base_value == 0.2
+
+
+def test_top_k_indices_matches_full_sort():
+    """argpartition + tri des k candidats = tri complet tronqué."""
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=(50, 808))
+    expected = np.argsort(-np.abs(values), axis=1, kind="stable")
+    for k in (1, 15, 807, 808, 1000):
+        np.testing.assert_array_equal(
+            top_k_indices(values, k), expected[:, : min(k, 808)]
+        )
+    np.testing.assert_array_equal(top_k_indices(values[0], 15), expected[0, :15])
+
+
+def test_top_k_rows_values_and_names():
+    values = np.array([[0.1, -0.5, 0.3], [0.0, 0.2, -0.1]])
+    indices, top_values = top_k_rows(values, 2)
+    assert indices.dtype == np.int32
+    np.testing.assert_array_equal(indices, [[1, 2], [1, 2]])
+    np.testing.assert_array_equal(top_values, [[-0.5, 0.3], [0.2, -0.1]])
+    names = np.array(["a", "b", "c"], dtype=object)
+    explanation = ShapExplanation(indices[0], top_values[0], 0.0)
+    assert list(explanation.as_dict(names)) == ["b", "c"]
+
+
+def test_cache_key_includes_model_and_data_version():
+    """Un changement de modèle ou de ligne client invalide l'entrée."""
+    loader = ModelLoader()
+    data = pd.DataFrame({"SK_ID_CURR": [42], "F1": [1.0]})
+    client = ClientFeatures.from_frame(data)
+    changed = ClientFeatures.from_frame(data.assign(F1=2.0))
+
+    with patch.object(loader, "_predict_one", return_value=0.7) as mock_predict:
+        loader.predict_proba(42, client)
+        loader.predict_proba(42, client)
+        assert mock_predict.call_count == 1
+
+        loader.predict_proba(42, changed)
+        assert mock_predict.call_count == 2
+
+        loader.model_version = "other"
+        loader.predict_proba(42, client)
+        assert mock_predict.call_count == 3
+
+
+def test_unavailable_model_is_not_cached():
+    loader = ModelLoader()
+    client = ClientFeatures(1, np.array([1.0], dtype=np.float32), ["F1"])
+    with patch.object(loader, "_predict_one", side_effect=[None, 0.4]):
+        assert loader.predict_proba(1, client) is None
+        assert loader.predict_proba(1, client) == 0.4
+
+
+def test_explain_mode_is_part_of_cache_key():
+    """Explications exacte et approchée sont mises en cache séparément."""
+    loader = ModelLoader()
+    client = ClientFeatures(1, np.array([1.0, 2.0], dtype=np.float32), ["A", "B"])
+    explainer = MagicMock()
+    explainer.explain.return_value = (np.array([[0.1, 0.2]]), np.array([0.0]))
+    loader.explainer = explainer
+    loader.fast_explainer = explainer
+
+    loader.get_shap_values_cached(1, client, mode="exact")
+    loader.get_shap_values_cached(1, client, mode="fast")
+    loader.get_shap_values_cached(1, client, mode="fast")
+    assert explainer.explain.call_count == 2
+    assert loader.get_shap_values_cached(1, client, mode="none") is None
@@ -0,0 +1,109 @@
+from unittest.mock import MagicMock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.model.cascade import CascadeScorer, calibrate
+from src.model.client_features import ClientFeatures
+from src.model.loader import ModelLoader
+from src.model.tree_scorer import TreeScorer
+from tests.conftest import N_TEST_FEATURES, create_client_features, random_rows
+
+
+@pytest.fixture(scope="module")
+def model_and_data(lgbm_model):
+    scorer = TreeScorer.from_classifier(lgbm_model)
+    return lgbm_model, scorer, random_rows(2000, seed=3)
+
+
+def test_tree_slices_sum_to_full_score(model_and_data):
+    model, scorer, X = model_and_data
+    partial = scorer.raw_score(X, stop=30) + scorer.raw_score(X, start=30)
+    np.testing.assert_allclose(partial, model.predict(X, raw_score=True), atol=1e-10)
+
+
+def test_cascade_early_exit_and_completion(model_and_data):
+    """Borne infinie : modèle complet ; borne nulle : arrêt anticipé partout."""
+    model, scorer, X = model_and_data
+    full = model.predict_proba(X)[:, 1]
+
+    scores, early_exit = CascadeScorer(scorer, 20, np.inf).score(X)
+    assert not early_exit.any()
+    np.testing.assert_allclose(scores, full, atol=1e-12)
+
+    cascade = CascadeScorer(scorer, 20, 0.0)
+    scores, early_exit = cascade.score(X)
+    assert early_exit.all()
+    np.testing.assert_allclose(scores, scorer.to_proba(scorer.raw_score(X, stop=20)))
+    stats = cascade.stats()
+    assert stats["early_exit_rate"] == 1.0
+    assert stats["avg_trees_evaluated"] == 20
+
+
+def test_calibration_keeps_decisions(model_and_data, tmp_path):
+    """La cascade calibrée prend les mêmes décisions que le modèle complet."""
+    model, scorer, X = model_and_data
+    best, report = calibrate(scorer, X, stages=(10, 25, 50), target_agreement=0.99)
+
+    assert [s["n_trees"] for s in report] == [10, 25, 50]
+    assert best["agreement"] >= 0.99
+    assert best["avg_trees_evaluated"] < 100
+
+    path = tmp_path / "cascade.json"
+    CascadeScorer(scorer, best["n_trees"], best["bound"], model_version="v1").save(
+        path, report
+    )
+    cascade = CascadeScorer.load(path, scorer)
+    assert (cascade.n_trees, cascade.bound) == (best["n_trees"], best["bound"])
+
+    scores, early_exit = cascade.score(X)
+    assert early_exit.mean() > 0.5
+    agreement = np.mean((scores > 0.5) == (model.predict_proba(X)[:, 1] > 0.5))
+    assert agreement >= 0.99
+
+
+def test_loader_cascade_caches_only_exact_scores(model_and_data, tmp_path):
+    model, scorer, _ = model_and_data
+    rows = np.array([[3.0, 3.0, 0, 0, 0, 0], [0.0, 0.0, 0, 0, 0, 0]])
+    # Borne entre les marges partielles du client net et du client limite
+    bound = np.abs(scorer.raw_score(rows, stop=20)).mean()
+    path = tmp_path / "cascade.json"
+    CascadeScorer(scorer, 20, bound, model_version="v1").save(path)
+
+    loader = ModelLoader()
+    loader.tree_scorer = scorer
+    loader.model_version = "v2"
+    assert loader.load_cascade(path, enabled=True) is None
+    loader.model_version = "v1"
+    assert loader.load_cascade(path, threshold=0.4, enabled=True) is None
+    assert loader.load_cascade(path, enabled=True) is not None
+
+    names = [f"F{i}" for i in range(N_TEST_FEATURES)]
+    clear_cut, borderline = (
+        ClientFeatures.from_frame(
+            pd.DataFrame([[i, *row]], columns=["SK_ID_CURR", *names])
+        )
+        for i, row in enumerate(rows, start=1)
+    )
+    score, early_exit = loader.predict_proba_cascade(1, clear_cut)
+    assert early_exit and score > 0.5
+    score, early_exit = loader.predict_proba_cascade(2, borderline)
+    assert not early_exit
+    assert score == pytest.approx(model.predict_proba(borderline.values)[0, 1])
+    # Seul le score exact est en cache
+    assert loader.cache.stats()["entries"] == 1
+
+
+def test_predict_explain_none_with_cascade(client, mock_loader):
+    """explain=none + cascade : le score vient de la cascade, signalé."""
+    mock_loader.cascade = MagicMock()
+    mock_loader.predict_proba_cascade.return_value = (0.9, True)
+    mock_loader.get_client_data.return_value = create_client_features()
+
+    response = client.get("/predict/123?explain=none")
+
+    assert response.status_code == 200
+    assert response.json()["early_exit"] is True
+    assert response.json()["decision"] == "Refusé"
+    assert not mock_loader.predict_proba.called
@@ -0,0 +1,60 @@
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from src.model.client_features import ClientFeatures
+from src.model.loader import ModelLoader
+from tests.conftest import create_client_features
+
+
+def test_client_features_from_frame():
+    """Les colonnes non-features sont exclues et les valeurs sont en float32."""
+    df = pd.DataFrame({"SK_ID_CURR": [7], "TARGET": [1], "F1": [1.5], "F2": [2]})
+    client = ClientFeatures.from_frame(df)
+
+    assert client.client_id == 7
+    assert client.feature_names == ["F1", "F2"]
+    assert client.values.dtype == np.float32
+    assert client.values.shape == (1, 2)
+    assert client.get("F1") == 1.5
+    assert client.get("UNKNOWN") is None
+    assert list(client.features.columns) == ["F1", "F2"]
+
+
+def test_client_features_from_empty_frame():
+    assert ClientFeatures.from_frame(None) is None
+    assert ClientFeatures.from_frame(pd.DataFrame()) is None
+
+
+def test_client_features_equality_by_client_and_data():
+    """Égalité : même client et mêmes valeurs de features."""
+    a = ClientFeatures.from_frame(create_client_features(), 1)
+    b = ClientFeatures.from_frame(create_client_features(), 1)
+    assert a == b and hash(a) == hash(b)
+    assert a != ClientFeatures.from_frame(create_client_features(), 2)
+    # Même client, données rafraîchies : instantanés distincts
+    updated = create_client_features({"AMT_CREDIT": 500000.0})
+    assert a != ClientFeatures.from_frame(updated, 1)
+
+
+def test_single_fetch_shared_by_score_and_shap():
+    """Une requête ne lit la base qu'une fois pour le score et SHAP."""
+    loader = ModelLoader()
+    data = pd.DataFrame({"SK_ID_CURR": [42], "TARGET": [0], "F1": [1.0]})
+
+    with patch.object(
+        loader,
+        "fetch_client_features",
+        return_value=ClientFeatures.from_frame(data),
+    ) as mock_get:
+        client = loader.fetch_client_features(42)
+        with patch.object(loader, "onnx_session") as session:
+            session.run.return_value = [None, np.array([[0.3, 0.7]])]
+            assert loader.predict_proba(42, client) == 0.7
+        with patch.object(loader, "explainer") as explainer:
+            explainer.explain.return_value = (np.array([[0.5]]), np.array([0.1]))
+            explanation = loader.get_shap_values_cached(42, client)
+            assert explanation.as_dict(client.feature_names) == {"F1": 0.5}
+
+    assert mock_get.call_count == 1
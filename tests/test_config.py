@@ -0,0 +1,29 @@
+import subprocess
+import sys
+
+from src.config import resolve_db_path
+
+
+def test_resolve_db_path_prefers_full_database(tmp_path):
+    (tmp_path / "data").mkdir()
+    assert resolve_db_path(tmp_path).endswith("data/database.sqlite")
+
+    (tmp_path / "data/database_lite.sqlite").touch()
+    assert resolve_db_path(tmp_path).endswith("data/database_lite.sqlite")
+
+    (tmp_path / "data/database.sqlite").touch()
+    assert resolve_db_path(tmp_path).endswith("data/database.sqlite")
+
+
+def test_loader_import_is_lightweight():
+    """Importer le loader ne charge ni la pile ML ni la base (premier usage)."""
+    code = (
+        "import sys\n"
+        "from src.model.loader import loader\n"
+        "heavy = ('pandas', 'joblib', 'onnxruntime', 'shap', 'sklearn')\n"
+        "print([m for m in heavy if m in sys.modules], loader._db_path)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "[] None"
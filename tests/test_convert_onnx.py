@@ -1,33 +1,74 @@
+import numpy as np
+import onnxruntime as ort
 from unittest.mock import patch, MagicMock
-from src.model.convert_onnx import convert_model
+import pytest
+from sklearn.pipeline import Pipeline
+import joblib
+import onnx
+from src.model.convert_onnx import convert_model, get_n_features, sample_rows
+from src.model.loader import positive_class_proba
+from src.model.onnx_sessions import session_feature_names
+from tests.conftest import N_TEST_FEATURES
 
 
-@patch("joblib.load")
-@patch("onnxmltools.convert_lightgbm")
-@patch("src.model.loader.loader.get_client_data")
-@patch("os.path.exists")
-def test_convert_model_success(mock_exists, mock_get_data, mock_convert, mock_load):
-    # Setup
-    mock_exists.return_value = True
+@pytest.fixture(scope="module")
+def pipeline(lgbm_model):
+    return Pipeline([("clf", lgbm_model)])
 
-    mock_df = MagicMock()
-    mock_df.drop.return_value.shape = (1, 10)  # 10 features
-    mock_get_data.return_value = mock_df
 
-    mock_onx = MagicMock()
-    mock_onx.SerializeToString.return_value = b"fake_onnx_data"
-    mock_convert.return_value = mock_onx
+def test_convert_model_success(tmp_path, pipeline):
+    """Export sans ZipMap, lot dynamique, parité vérifiée avant écriture."""
+    model_path = tmp_path / "model.joblib"
+    onnx_path = tmp_path / "model.onnx"
+    joblib.dump(pipeline, model_path)
 
-    # Exécution
-    with patch("builtins.open", MagicMock()):
-        convert_model()
+    result = convert_model(model_path, onnx_path, parity_rows=200, target_opset=15)
 
-    assert mock_load.called
-    assert mock_convert.called
+    assert result["max_abs_diff"] < 1e-5
+    assert set(result["timings"]) == {"onnx", "joblib"}
+    exported = onnx.load(onnx_path)
+    # Opset cible déclaré tel quel (et non l'opset minimal du converter)
+    opsets = {o.domain: o.version for o in exported.opset_import}
+    assert opsets == {"": 15, "ai.onnx.ml": 2}
+    graph = exported.graph
+    assert all(o.type.tensor_type.shape.dim[0].dim_param for o in graph.output)
 
+    session = ort.InferenceSession(str(onnx_path))
+    # Ordre des features lisible sans le modèle Joblib
+    assert session_feature_names(session) == list(pipeline[-1].feature_name_)
+    X = sample_rows(5, N_TEST_FEATURES)
+    outputs = session.run(None, {session.get_inputs()[0].name: X})
+    assert outputs[1].shape == (5, 2)
+    np.testing.assert_allclose(
+        positive_class_proba(outputs), pipeline.predict_proba(X)[:, 1], atol=1e-5
+    )
 
-@patch("os.path.exists")
-def test_convert_model_no_file(mock_exists):
-    mock_exists.return_value = False
+
+def test_convert_model_parity_failure_does_not_write(tmp_path, pipeline):
+    model_path = tmp_path / "model.joblib"
+    onnx_path = tmp_path / "model.onnx"
+    joblib.dump(pipeline, model_path)
+
+    with patch("src.model.convert_onnx.check_parity", return_value=0.1):
+        assert convert_model(model_path, onnx_path, parity_rows=50) is None
+    assert not onnx_path.exists()
+
+
+def test_get_n_features_from_model(pipeline):
+    assert get_n_features(pipeline) == N_TEST_FEATURES
+    assert get_n_features(MagicMock(spec=[])) is None
+
+
+def test_positive_class_proba_zipmap_and_tensor():
+    """Compatibilité avec les anciens exports (ZipMap)."""
+    zipmap = [None, [{0: 0.4, 1: 0.6}, {0: 0.9, 1: 0.1}]]
+    tensor = [None, np.array([[0.4, 0.6], [0.9, 0.1]], dtype=np.float32)]
+    np.testing.assert_allclose(positive_class_proba(zipmap), [0.6, 0.1])
+    np.testing.assert_allclose(positive_class_proba(tensor), [0.6, 0.1])
+
+
+def test_convert_model_no_file(tmp_path):
+    onnx_path = tmp_path / "model.onnx"
     # Ne doit pas crasher
-    convert_model()
+    assert convert_model(tmp_path / "absent.joblib", onnx_path) is None
+    assert not onnx_path.exists()
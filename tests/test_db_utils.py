@@ -1,7 +1,7 @@
 import os
 import sqlite3
 import pytest
-from src.database.db_utils import init_logs_db, log_prediction
+from src.database.db_utils import LOG_FEATURES, init_logs_db, log_prediction
 
 DB_PATH = "test_logs.sqlite"
 
@@ -98,3 +98,29 @@ def test_log_prediction_missing_features(db_connection):
     row = cursor.fetchone()
     conn.close()
     assert row is not None
+
+
+def test_log_stage_latencies(db_connection):
+    """Durées par étape : colonnes latency_<étape>, ajoutées aux bases existantes."""
+    db_connection.execute(
+        "CREATE TABLE prediction_logs (id INTEGER PRIMARY KEY, client_id INTEGER, "
+        "score REAL, decision TEXT, timestamp DATETIME, latency REAL, "
+        + ", ".join(f"{feat} REAL" for feat in LOG_FEATURES)
+        + ")"
+    )
+    db_connection.commit()
+    db_connection.close()
+    init_logs_db(DB_PATH)
+
+    log_prediction(
+        DB_PATH, 300, 0.3, "Accepté", {}, latency=0.02, stages={"fetch": 0.005}
+    )
+    log_prediction(DB_PATH, 301, 0.3, "Accepté", {})
+
+    conn = sqlite3.connect(DB_PATH)
+    rows = conn.execute(
+        "SELECT client_id, latency_fetch, latency_shap FROM prediction_logs "
+        "ORDER BY client_id"
+    ).fetchall()
+    conn.close()
+    assert rows == [(300, 0.005, None), (301, None, None)]
@@ -0,0 +1,96 @@
+from unittest.mock import patch
+
+import numpy as np
+
+from src.model.cache import ShapExplanation
+from src.model.client_features import ClientFeatures
+from src.model.disk_cache import PersistentCache, decode_value, encode_value
+from src.model.loader import ModelLoader
+
+
+def test_encode_decode_roundtrip():
+    assert decode_value(encode_value(0.125)) == 0.125
+    explanation = ShapExplanation([3, 0, 7], [0.5, -0.25, 0.1], -1.5)
+    assert decode_value(encode_value(explanation)) == explanation
+
+
+def test_write_behind_and_read(tmp_path):
+    """Les entrées écrites en arrière-plan sont relues après flush."""
+    cache = PersistentCache(tmp_path / "cache.sqlite", flush_interval_ms=10)
+    cache.start()
+    key = ("score", 1, "v1", "abc")
+    assert cache.get(key) is None
+    assert cache.set(key, 0.3)
+    assert cache.flush()
+    assert cache.get(key) == 0.3
+
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    assert stats["written"] == 1
+    cache.stop()
+
+
+def test_entries_survive_restart(tmp_path):
+    """Un nouveau processus (nouvelle instance) relit les entrées existantes."""
+    path = tmp_path / "cache.sqlite"
+    key = ("shap", 1, "v1", "abc", 15)
+    explanation = ShapExplanation([1], [0.2], 0.1)
+
+    first = PersistentCache(path, flush_interval_ms=10)
+    first.start()
+    first.set(key, explanation)
+    first.stop()
+
+    second = PersistentCache(path)
+    second.start(keep_model_version="v1")
+    assert second.get(key) == explanation
+    second.stop()
+
+
+def test_start_prunes_other_model_versions(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    cache = PersistentCache(path, flush_interval_ms=10)
+    cache.start()
+    cache.set(("score", 1, "old", "abc"), 0.1)
+    cache.set(("score", 1, "new", "abc"), 0.2)
+    cache.stop()
+
+    cache = PersistentCache(path)
+    cache.start(keep_model_version="new")
+    assert cache.get(("score", 1, "old", "abc")) is None
+    assert cache.get(("score", 1, "new", "abc")) == 0.2
+    cache.stop()
+
+
+def test_set_when_not_started_is_ignored(tmp_path):
+    cache = PersistentCache(tmp_path / "cache.sqlite")
+    assert not cache.set(("score", 1, "v1", "abc"), 0.3)
+
+
+def test_loader_falls_back_to_persistent_cache(tmp_path):
+    """Cache mémoire vide (redémarrage) : le score est relu depuis le disque."""
+    loader = ModelLoader()
+    loader.model_version = "v1"
+    client = ClientFeatures(1, np.array([1.0], dtype=np.float32), ["F1"])
+    path = tmp_path / "cache.sqlite"
+
+    with patch.object(loader, "_predict_one", return_value=0.7) as mock_predict:
+        loader.load_persistent_cache(path)
+        assert loader.predict_proba(1, client) == 0.7
+        loader.close_persistent_cache()
+
+        # Redémarrage : nouveau cache mémoire, même fichier
+        loader.cache.clear()
+        loader.load_persistent_cache(path)
+        assert loader.predict_proba(1, client) == 0.7
+        assert mock_predict.call_count == 1
+        assert loader.persistent_cache.stats()["hits"] == 1
+
+        # Promu dans le cache mémoire
+        assert len(loader.cache) == 1
+
+
+def test_loader_persistent_cache_disabled_by_default():
+    loader = ModelLoader()
+    assert loader.load_persistent_cache("") is None
+    assert loader.persistent_cache is None
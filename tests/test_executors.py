@@ -0,0 +1,45 @@
+import asyncio
+import threading
+
+from src.api import executors
+
+
+def test_run_io_and_compute_use_dedicated_pools():
+    """Les appels bloquants s'exécutent dans les pools nommés, hors boucle."""
+
+    async def scenario():
+        io_thread = await executors.run_io(lambda: threading.current_thread().name)
+        compute_thread = await executors.run_compute(
+            lambda x, y=0: (threading.current_thread().name, x + y), 1, y=2
+        )
+        return io_thread, compute_thread
+
+    io_thread, (compute_thread, result) = asyncio.run(scenario())
+    assert io_thread.startswith("db-io")
+    assert compute_thread.startswith("model")
+    assert result == 3
+    executors.shutdown_executors()
+
+
+def test_shutdown_executors_recreates_pools():
+    """Après arrêt, les pools sont recréés au prochain usage."""
+    pool = executors.get_model_executor()
+    executors.shutdown_executors()
+    assert executors.get_model_executor() is not pool
+    executors.shutdown_executors()
+
+
+def test_blocking_call_does_not_stall_event_loop():
+    """Un calcul long n'empêche pas d'autres coroutines de progresser."""
+    release = threading.Event()
+
+    async def scenario():
+        slow = asyncio.ensure_future(executors.run_compute(release.wait, 5))
+        await asyncio.sleep(0.01)
+        # La boucle reste disponible pendant le calcul bloquant
+        assert not slow.done()
+        release.set()
+        return await slow
+
+    assert asyncio.run(scenario()) is True
+    executors.shutdown_executors()
@@ -0,0 +1,60 @@
+from unittest.mock import MagicMock
+
+import joblib
+import numpy as np
+import pytest
+
+from src.model.explain_pool import ExplainerPool
+from src.model.explainers import NativeExplainer, SaabasExplainer
+from src.model.loader import ModelLoader
+from tests.conftest import random_rows
+
+
+@pytest.fixture(scope="module")
+def model_file(tmp_path_factory, lgbm_model):
+    path = tmp_path_factory.mktemp("model") / "model.joblib"
+    joblib.dump(lgbm_model, path)
+    return str(path), lgbm_model, random_rows(20, seed=4)
+
+
+def test_pool_matches_local_explainers(model_file):
+    """Mêmes valeurs qu'en local, lot découpé en segments de `max_rows` lignes."""
+    path, model, X = model_file
+    pool = ExplainerPool(path, 6, workers=2, max_rows=7).start()
+    try:
+        values, base = pool.explain(X)
+        expected, expected_base = NativeExplainer(model).explain(X)
+        np.testing.assert_allclose(values, expected, atol=1e-10)
+        np.testing.assert_allclose(base, expected_base, atol=1e-10)
+
+        values, _ = pool.explain(X[0], mode="fast")
+        np.testing.assert_allclose(
+            values, SaabasExplainer(model).explain(X[:1])[0], atol=1e-10
+        )
+        stats = pool.stats()
+        assert stats["alive"] == 2
+        assert stats["rows"] == 21
+
+        with pytest.raises(ValueError):
+            pool.explain(np.zeros((1, 5)))
+    finally:
+        pool.close()
+    assert not pool.ready
+
+
+def test_pool_start_failure(tmp_path):
+    with pytest.raises(RuntimeError):
+        ExplainerPool(str(tmp_path / "missing.joblib"), 6, workers=1).start()
+
+
+def test_loader_falls_back_to_local_explainer():
+    loader = ModelLoader()
+    loader.explainer = MagicMock()
+    loader.explainer.explain.return_value = ("local", "base")
+    loader.explain_pool = MagicMock(ready=True)
+    loader.explain_pool.explain.return_value = ("pool", "base")
+
+    assert loader.get_shap_values_batch(np.zeros((2, 6))) == ("pool", "base")
+    loader.explain_pool.explain.side_effect = RuntimeError("processus mort")
+    assert loader.get_shap_values_batch(np.zeros((2, 6))) == ("local", "base")
+    loader.explain_pool = None
@@ -0,0 +1,80 @@
+import os
+from unittest.mock import MagicMock
+
+import joblib
+import numpy as np
+import pytest
+import shap
+
+from src.model.explainers import (
+    NativeExplainer,
+    ShapExplainer,
+    make_explainer,
+)
+from tests.conftest import N_TEST_FEATURES, random_rows
+
+MODEL_PATH = "src/model/model.joblib"
+
+
+@pytest.fixture(scope="module")
+def small_model(lgbm_model):
+    return lgbm_model, random_rows(300, missing=0.1).astype(np.float32)
+
+
+def test_native_matches_shap(small_model):
+    """Le backend natif donne les mêmes valeurs que shap.TreeExplainer."""
+    model, X = small_model
+    values, base_values = NativeExplainer(model).explain(X[:50])
+    expected = shap.TreeExplainer(model)(X[:50])
+
+    assert values.shape == (50, N_TEST_FEATURES) and base_values.shape == (50,)
+    np.testing.assert_allclose(values, expected.values, atol=1e-6)
+    np.testing.assert_allclose(base_values, np.ravel(expected.base_values), atol=1e-6)
+
+
+def test_shap_backend_returns_arrays(small_model):
+    model, X = small_model
+    values, base_values = ShapExplainer(model).explain(X[:3])
+    assert isinstance(values, np.ndarray) and values.shape == (3, N_TEST_FEATURES)
+    assert base_values.shape == (3,)
+
+
+def test_contributions_sum_to_raw_score(small_model):
+    """Propriété d'additivité : somme des contributions = score brut (log-odds)."""
+    model, X = small_model
+    values, base_values = NativeExplainer(model).explain(X[:20])
+    raw = model.predict(X[:20], raw_score=True)
+    np.testing.assert_allclose(values.sum(axis=1) + base_values, raw, atol=1e-5)
+
+
+def test_make_explainer_selection(small_model):
+    model, _ = small_model
+    assert make_explainer(model, "native").name == "native"
+    assert make_explainer(model, "shap").name == "shap"
+    with pytest.raises(ValueError):
+        make_explainer(model, "unknown")
+
+
+def test_make_explainer_falls_back_to_shap():
+    """Modèle sans booster LightGBM : retour au backend shap."""
+    classifier = MagicMock(spec=[])
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(shap, "TreeExplainer", MagicMock())
+        assert make_explainer(classifier, "native").name == "shap"
+
+
+@pytest.mark.skipif(not os.path.exists(MODEL_PATH), reason="Modèle non disponible")
+def test_native_parity_on_production_model():
+    """Parité natif / shap sur le modèle livré (échantillon synthétique)."""
+    model = joblib.load(MODEL_PATH)
+    classifier = model.named_steps["clf"] if hasattr(model, "named_steps") else model
+    n_features = classifier.n_features_in_
+    rng = np.random.default_rng(42)
+    X = rng.normal(size=(20, n_features)).astype(np.float32)
+    X[rng.random(X.shape) < 0.2] = np.nan
+
+    values, base_values = NativeExplainer(classifier).explain(X)
+    expected_values, expected_base = ShapExplainer(classifier).explain(X)
+
+    np.testing.assert_allclose(values, expected_values, atol=1e-5)
+    np.testing.assert_allclose(base_values, expected_base, atol=1e-5)
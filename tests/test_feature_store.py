@@ -0,0 +1,100 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.model.feature_store import FeatureStore, build_feature_store
+from src.model.loader import ModelLoader
+
+
+@pytest.fixture
+def clients_db(tmp_path):
+    """Base clients minimale (IDs volontairement non triés)."""
+    db_path = tmp_path / "clients.sqlite"
+    conn = sqlite3.connect(db_path)
+    pd.DataFrame(
+        {
+            "SK_ID_CURR": [30, 10, 20],
+            "TARGET": [0, 1, 0],
+            "F1": [3.0, 1.0, None],
+            "F2": [30.0, 10.0, 20.0],
+        }
+    ).to_sql("clients", conn, index=False)
+    conn.close()
+    return str(db_path)
+
+
+def test_from_sqlite_sorted_lookup(clients_db):
+    """IDs triés, recherche dichotomique et lignes en vues sans copie."""
+    store = FeatureStore.from_sqlite(clients_db)
+
+    assert store.ids.tolist() == [10, 20, 30]
+    assert store.feature_names == ["F1", "F2"]
+    assert store.lookup([20, 99, 5]).tolist() == [1, -1, -1]
+
+    client = store.get(30)
+    assert client.get("F2") == 30.0
+    assert np.shares_memory(client.vector, store.matrix)
+    assert np.isnan(store.get(20).get("F1"))
+    assert store.get(99) is None
+
+
+def test_get_many_skips_unknown(clients_db):
+    store = FeatureStore.from_sqlite(clients_db)
+    clients = store.get_many([30, 99, 10])
+    assert [c.client_id for c in clients] == [30, 10]
+
+
+def test_save_load_mmap_and_footprint(clients_db, tmp_path):
+    """Le store sur disque est rechargé en mmap avec son empreinte mémoire."""
+    build_feature_store(clients_db, tmp_path / "store", ["F2", "F1"])
+    store = FeatureStore.load(tmp_path / "store")
+
+    assert store.feature_names == ["F2", "F1"]
+    assert store.get(10).vector.tolist() == [10.0, 1.0]
+    footprint = store.memory_footprint()
+    assert footprint["mmap"] is True
+    assert footprint["n_clients"] == 3
+    assert footprint["matrix_bytes"] == 3 * 2 * 4
+
+
+def test_reorder_columns(clients_db):
+    store = FeatureStore.from_sqlite(clients_db).reorder(["F2", "F1"])
+    assert store.get(10).vector.tolist() == [10.0, 1.0]
+
+
+def test_loader_uses_store_then_falls_back(clients_db, tmp_path):
+    """Le loader sert les features depuis le store, sinon depuis SQLite."""
+    loader = ModelLoader()
+    loader.db_path = clients_db
+
+    assert loader.load_feature_store(str(tmp_path / "absent")) is None
+    assert loader.fetch_client_features(10).get("F1") == 1.0
+
+    FeatureStore.from_sqlite(clients_db).save(tmp_path / "store")
+    store = loader.load_feature_store(str(tmp_path / "store"))
+    assert store is not None
+
+    client = loader.fetch_client_features(10)
+    assert np.shares_memory(client.vector, store.matrix)
+    assert [c.client_id for c in loader.fetch_clients_features([20, 99])] == [20]
+
+
+def test_loader_store_from_db(clients_db, tmp_path):
+    """Sans fichier, la table peut être chargée en RAM au démarrage."""
+    loader = ModelLoader()
+    loader.db_path = clients_db
+    store = loader.load_feature_store(str(tmp_path / "absent"), from_db=True)
+    assert store.memory_footprint()["mmap"] is False
+    assert loader.fetch_client_features(30).get("F1") == 3.0
+
+
+def test_loader_falls_back_on_corrupt_store(tmp_path):
+    """Store illisible : lecture SQLite par requête, sans lever."""
+    (tmp_path / "features.npy").write_bytes(b"pas un tableau numpy")
+    (tmp_path / "ids.npy").write_bytes(b"")
+    (tmp_path / "columns.json").write_text("[")
+    loader = ModelLoader()
+    assert loader.load_feature_store(str(tmp_path)) is None
+    assert loader.feature_store is None
@@ -0,0 +1,170 @@
+import sqlite3
+import threading
+
+import pytest
+
+from src.database.db_utils import init_logs_db
+from src.database.log_writer import PredictionLogWriter
+
+
+@pytest.fixture
+def logs_db(tmp_path):
+    db_path = str(tmp_path / "logs.sqlite")
+    init_logs_db(db_path)
+    return db_path
+
+
+def count_logs(db_path):
+    conn = sqlite3.connect(db_path)
+    n = conn.execute("SELECT COUNT(*) FROM prediction_logs").fetchone()[0]
+    conn.close()
+    return n
+
+
+def test_writer_batches_and_flushes_on_stop(logs_db):
+    """Les lignes en file sont écrites par lots puis vidées à l'arrêt."""
+    writer = PredictionLogWriter(batch_size=10, flush_interval_ms=50)
+    writer.start(logs_db)
+
+    for i in range(25):
+        assert writer.submit(i, 0.5, "Accepté", {"EXT_SOURCE_1": 0.1})
+    writer.stop()
+
+    assert count_logs(logs_db) == 25
+    stats = writer.stats()
+    assert stats["queued"] == 25
+    assert stats["written"] == 25
+    assert stats["dropped"] == 0
+    assert stats["running"] is False
+
+
+def test_writer_uses_wal(logs_db):
+    """La connexion du writer bascule la base en mode WAL."""
+    writer = PredictionLogWriter(flush_interval_ms=10)
+    writer.start(logs_db)
+    writer.submit(1, 0.5, "Accepté", {})
+    assert writer.flush()
+    writer.stop()
+
+    conn = sqlite3.connect(logs_db)
+    mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+    conn.close()
+    assert mode == "wal"
+
+
+def test_writer_drops_when_queue_full(logs_db):
+    """File pleine : la ligne est abandonnée et comptée, sans bloquer."""
+    writer = PredictionLogWriter(max_queue=1)
+    # Thread simulé comme actif sans consommateur
+    writer._thread = type("T", (), {"is_alive": lambda self: True})()
+
+    assert writer.submit(1, 0.5, "Accepté", {})
+    assert not writer.submit(2, 0.5, "Accepté", {})
+    assert writer.stats()["dropped"] == 1
+
+
+def test_writer_not_started_starts_lazily(logs_db):
+    """Sans start() mais avec une base : le thread démarre à la 1re ligne
+    (scripts, tests), aucune écriture synchrone."""
+    writer = PredictionLogWriter(flush_interval_ms=10)
+    writer.db_path = logs_db
+    writer.submit_many(
+        [{"client_id": 1, "score": 0.2, "decision": "Accepté", "features": {}}]
+    )
+    assert writer.running
+    writer.stop()
+    assert count_logs(logs_db) == 1
+
+
+def test_writer_drops_after_stop(logs_db):
+    """Après stop() (arrêt de l'API), les lignes sont abandonnées et comptées."""
+    writer = PredictionLogWriter(flush_interval_ms=10)
+    writer.start(logs_db)
+    writer.stop()
+
+    assert writer.submit(1, 0.5, "Accepté", {}) is False
+    assert not writer.running
+    assert writer.stats()["dropped"] == 1
+
+
+def test_writer_stop_timeout_keeps_thread(logs_db):
+    """Vidage non terminé dans le délai : le thread est conservé."""
+    writer = PredictionLogWriter(flush_interval_ms=10)
+    writer.start(logs_db)
+    release = threading.Event()
+    write = writer._write
+    writer._write = lambda *args: release.wait() and write(*args)
+    writer.submit(1, 0.5, "Accepté", {})
+
+    assert writer.stop(timeout=0.05) is False
+    assert writer.running
+    release.set()
+    assert writer.stop()
+    assert count_logs(logs_db) == 1
+
+
+def test_writer_counts_failed_rows(tmp_path):
+    """Table absente : les lignes sont comptées en échec, le thread survit."""
+    writer = PredictionLogWriter(flush_interval_ms=10)
+    writer.start(str(tmp_path / "empty.sqlite"))
+    writer.submit(1, 0.5, "Accepté", {})
+    assert writer.flush()
+    assert writer.running
+    writer.stop()
+    assert writer.stats()["failed"] == 1
+
+
+def test_writer_not_started_never_raises(tmp_path):
+    """Sans base configurée ou en erreur, le log est compté mais ne lève pas."""
+    writer = PredictionLogWriter(flush_interval_ms=10)
+    assert writer.submit(1, 0.5, "Accepté", {}) is False
+    assert writer.stats()["dropped"] == 1
+
+    writer.db_path = str(tmp_path / "empty.sqlite")
+    assert writer.submit(1, 0.5, "Accepté", {})
+    assert writer.flush()
+    writer.stop()
+    assert writer.stats()["failed"] == 1
+
+
+def test_writer_unusable_db_counts_rows_and_backs_off(tmp_path):
+    """Base impossible à ouvrir : lignes comptées en échec ou abandonnées,
+    erreur exposée, pas de nouveau thread avant le délai."""
+    writer = PredictionLogWriter(flush_interval_ms=10, retry_interval_s=60)
+    writer.start(str(tmp_path / "absent" / "logs.sqlite"))
+    writer._thread.join(5)
+    assert not writer.running
+
+    for i in range(50):
+        writer.submit(i, 0.5, "Accepté", {})
+
+    stats = writer.stats()
+    assert stats["error"]
+    assert stats["queue_depth"] == 0
+    assert stats["queued"] + stats["dropped"] == 50
+    assert stats["queued"] == stats["failed"]
+    assert stats["written"] == 0
+    assert not writer.running
+
+    # Lignes déjà en file quand la base devient inutilisable : en échec
+    writer._queue.put_nowait(("ligne",))
+    writer._fail(sqlite3.OperationalError("unable to open database file"))
+    assert writer.stats()["failed"] == stats["failed"] + 1
+    assert writer.stats()["queue_depth"] == 0
+
+
+def test_writer_retries_after_interval(tmp_path):
+    """Délai écoulé : le thread est relancé et l'erreur effacée."""
+    db_dir = tmp_path / "logs"
+    writer = PredictionLogWriter(flush_interval_ms=10, retry_interval_s=0)
+    writer.start(str(db_dir / "logs.sqlite"))
+    writer._thread.join(5)
+    assert writer.stats()["error"]
+
+    db_dir.mkdir()
+    init_logs_db(str(db_dir / "logs.sqlite"))
+    assert writer.submit(1, 0.5, "Accepté", {})
+    assert writer.flush()
+    writer.stop()
+    assert writer.stats()["error"] is None
+    assert count_logs(str(db_dir / "logs.sqlite")) == 1
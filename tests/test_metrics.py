@@ -0,0 +1,140 @@
+import os
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.metrics import Collected, Counter, Histogram, Registry, render
+from src.model.client_features import ClientFeatures
+from src.model.loader import SCORING_CALLS, SCORING_FALLBACKS, ModelLoader
+
+
+def sample_value(text, line_prefix):
+    """Valeur de l'échantillon dont la ligne commence par `line_prefix`."""
+    for line in text.splitlines():
+        if line.startswith(line_prefix + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+def test_counter_and_histogram_exposition():
+    registry = Registry()
+    requests_total = registry.register(
+        Counter("demo_requests_total", "Requêtes.", ("route", "status"))
+    )
+    latency = registry.register(
+        Histogram("demo_seconds", "Latence.", ("route",), buckets=(0.01, 0.1))
+    )
+    requests_total.inc("/predict", 200)
+    requests_total.inc("/predict", 200)
+    requests_total.inc("/predict", 404)
+    for value in (0.005, 0.05, 3.0):
+        latency.observe(value, "/predict")
+
+    text = registry.render()
+
+    assert "# TYPE demo_requests_total counter" in text
+    assert 'demo_requests_total{route="/predict",status="200"} 2' in text
+    assert 'demo_seconds_bucket{route="/predict",le="0.01"} 1' in text
+    assert 'demo_seconds_bucket{route="/predict",le="0.1"} 2' in text
+    assert 'demo_seconds_bucket{route="/predict",le="+Inf"} 3' in text
+    assert 'demo_seconds_count{route="/predict"} 3' in text
+    assert sample_value(text, 'demo_seconds_sum{route="/predict"}') == 3.055
+
+
+def test_labels_are_checked_and_escaped():
+    metric = Counter("demo_total", "Aide.", ("path",))
+    with pytest.raises(ValueError):
+        metric.inc()
+    metric.inc('a"b')
+    assert 'demo_total{path="a\\"b"} 1' in render([metric])
+
+
+def test_worker_label_added_to_every_sample():
+    """Un label `worker` (PID) distingue les séries des workers uvicorn."""
+    registry = Registry(worker_label="worker")
+    registry.register(Counter("demo_total", "Aide.", ("route",))).inc("/predict")
+    registry.add_collector(lambda: [Collected("gauge", "demo_rss", "RSS.").add(5)])
+
+    text = registry.render()
+
+    pid = os.getpid()
+    assert f'demo_total{{route="/predict",worker="{pid}"}} 1' in text
+    assert f'demo_rss{{worker="{pid}"}} 5' in text
+
+
+def test_collected_metric_skips_missing_values():
+    gauge = Collected("gauge", "demo_rss_bytes", "RSS.").add(None)
+    assert sample_value(render([gauge]), "demo_rss_bytes") is None
+    gauge.add(12, worker="1")
+    assert 'demo_rss_bytes{worker="1"} 12' in render([gauge])
+
+
+def test_onnx_fallback_is_counted():
+    """Un échec ONNX suivi du repli Joblib est compté (plus seulement loggé)."""
+    loader_instance = ModelLoader()
+    session = MagicMock()
+    session.run.side_effect = Exception("ONNX Crash")
+    loader_instance.onnx_session = session
+    loader_instance.model = MagicMock()
+    loader_instance.model.predict_proba.return_value = np.array([[0.2, 0.8]])
+    client = ClientFeatures.from_frame(
+        pd.DataFrame({"SK_ID_CURR": [123], "FEATURE1": [1.0]})
+    )
+
+    fallbacks = sample_value(
+        render([SCORING_FALLBACKS]),
+        'credit_scoring_fallbacks_total{backend="onnx",mode="single"}',
+    )
+    with patch.object(loader_instance, "fetch_client_features", return_value=client):
+        assert loader_instance.predict_proba(123) == 0.8
+
+    text = render([SCORING_FALLBACKS, SCORING_CALLS])
+    assert (
+        sample_value(
+            text, 'credit_scoring_fallbacks_total{backend="onnx",mode="single"}'
+        )
+        == (fallbacks or 0) + 1
+    )
+    assert (
+        sample_value(text, 'credit_scoring_calls_total{backend="joblib",mode="single"}')
+        >= 1
+    )
+
+
+def test_metrics_endpoint(client, mock_loader, mock_log_writer):
+    mock_loader.cache.stats.return_value = {
+        "by_kind": {"score": {"hits": 3, "misses": 1}}
+    }
+    mock_log_writer.stats.return_value = {
+        "running": True,
+        "queue_depth": 4,
+        "queued": 10,
+        "dropped": 0,
+        "written": 6,
+        "failed": 0,
+    }
+    client.get("/livez")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    worker = f'worker="{os.getpid()}"'
+    assert sample_value(
+        text,
+        f'credit_api_requests_total{{method="GET",route="/livez",status="200",{worker}}}',
+    )
+    assert 'credit_api_request_duration_seconds_bucket{method="GET",route="/livez"' in (
+        text
+    )
+    assert (
+        f'credit_cache_requests_total{{cache="memory",kind="score",result="hit",{worker}}} 3'
+        in text
+    )
+    assert sample_value(text, f"credit_log_writer_queue_depth{{{worker}}}") == 4
+    assert sample_value(text, f"credit_log_writer_running{{{worker}}}") == 1
+    assert "credit_admission_requests_total" in text
+    assert sample_value(text, f"process_resident_memory_bytes{{{worker}}}") > 0
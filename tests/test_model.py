@@ -2,6 +2,7 @@ import pytest
 import sqlite3
 import pandas as pd
 import numpy as np
+from unittest.mock import patch, MagicMock
 from src.model.loader import ModelLoader
 
 
@@ -68,3 +69,55 @@ def test_get_client_data_no_db():
     loader.db_path = "non_existent.sqlite"
     df = loader.get_client_data(1)
     assert df is None
+
+
+def test_fetch_client_features_fast_path(temp_db):
+    """Chemin rapide : vecteur float32 sans TARGET/SK_ID_CURR, texte -> NaN."""
+    loader = ModelLoader()
+    loader.db_path = temp_db
+
+    client = loader.fetch_client_features(3)
+    assert client.feature_names == ["AMT_ANNUITY", "DAYS_BIRTH", "TEXT_COL"]
+    assert client.vector.dtype == np.float32
+    assert client.get("DAYS_BIRTH") == 5000
+    assert np.isnan(client.get("TEXT_COL"))
+
+    assert np.isnan(loader.fetch_client_features(2).get("AMT_ANNUITY"))
+    assert loader.fetch_client_features(999) is None
+
+
+def test_fetch_client_features_model_order(temp_db):
+    """La projection suit l'ordre des features du modèle s'il est connu."""
+    loader = ModelLoader()
+    loader.db_path = temp_db
+    loader.model = MagicMock(named_steps={"clf": MagicMock()})
+    loader.model.named_steps["clf"].feature_name_ = ["DAYS_BIRTH", "AMT_ANNUITY"]
+
+    client = loader.fetch_client_features(1)
+    assert client.feature_names == ["DAYS_BIRTH", "AMT_ANNUITY"]
+    np.testing.assert_array_equal(client.vector, [-10000, 1000])
+
+
+def test_fetch_clients_features_batch(temp_db):
+    """Récupération groupée (clients inconnus ignorés)."""
+    loader = ModelLoader()
+    loader.db_path = temp_db
+    clients = loader.fetch_clients_features([3, 1, 999])
+    assert sorted(c.client_id for c in clients) == [1, 3]
+    assert all(np.isnan(c.get("TEXT_COL")) for c in clients)
+
+
+def test_fetch_clients_features_chunked(temp_db):
+    """Vérifie le découpage des IDs au-delà de la limite de paramètres SQLite."""
+    loader = ModelLoader()
+    loader.db_path = temp_db
+    with patch("src.model.loader.SQLITE_MAX_VARIABLES", 2):
+        clients = loader.fetch_clients_features([1, 2, 3])
+    assert sorted(c.client_id for c in clients) == [1, 2, 3]
+
+
+def test_fetch_clients_features_no_db():
+    loader = ModelLoader()
+    loader.db_path = "non_existent.sqlite"
+    assert loader.fetch_clients_features([1]) is None
+    assert loader.fetch_client_features(1) is None
@@ -1,7 +1,13 @@
-import pandas as pd
+import sqlite3
+
+import joblib
 import numpy as np
+import pandas as pd
 from unittest.mock import patch, MagicMock
-from src.model.loader import ModelLoader
+from src.model.convert_onnx import convert_model
+from src.model.loader import ModelLoader, artifacts_version
+from src.model.client_features import ClientFeatures
+from tests.conftest import random_rows
 
 
 def test_model_loader_singleton():
@@ -73,7 +79,11 @@ def test_predict_proba_onnx_success():
 
     loader_instance.onnx_session = mock_session
 
-    with patch.object(loader_instance, "get_client_data", return_value=mock_data):
+    with patch.object(
+        loader_instance,
+        "fetch_client_features",
+        return_value=ClientFeatures.from_frame(mock_data),
+    ):
         score = loader_instance.predict_proba(123)
         assert score == 0.6
 
@@ -91,7 +101,11 @@ def test_predict_proba_onnx_error_fallback():
     mock_model.predict_proba.return_value = np.array([[0.2, 0.8]])
     loader_instance.model = mock_model
 
-    with patch.object(loader_instance, "get_client_data", return_value=mock_data):
+    with patch.object(
+        loader_instance,
+        "fetch_client_features",
+        return_value=ClientFeatures.from_frame(mock_data),
+    ):
         score = loader_instance.predict_proba(123)
         assert score == 0.8
 
@@ -102,19 +116,28 @@ def test_get_shap_values_cached_success():
     mock_data = pd.DataFrame({"SK_ID_CURR": [123], "FEATURE1": [1.0]})
 
     mock_explainer = MagicMock()
-    mock_explainer.return_value = "fake_shap_values"
+    mock_explainer.explain.return_value = (np.array([[0.25]]), np.array([0.5]))
     loader_instance.explainer = mock_explainer
 
-    with patch.object(loader_instance, "get_client_data", return_value=mock_data):
+    with patch.object(
+        loader_instance,
+        "fetch_client_features",
+        return_value=ClientFeatures.from_frame(mock_data),
+    ):
         # On vide le cache avant le test
-        loader_instance.get_shap_values_cached.cache_clear()
+        loader_instance.cache.clear()
 
         res1 = loader_instance.get_shap_values_cached(123)
-        assert res1 == "fake_shap_values"
+        assert res1.as_dict(["FEATURE1"]) == {"FEATURE1": 0.25}
+        assert res1.base_value == 0.5
 
         res2 = loader_instance.get_shap_values_cached(123)
-        assert res2 == "fake_shap_values"
-        assert mock_explainer.call_count == 1
+        assert res2 == res1
+        assert mock_explainer.explain.call_count == 1
+        assert loader_instance.cache.stats()["by_kind"]["shap"] == {
+            "hits": 1,
+            "misses": 1,
+        }
 
 
 def test_get_shap_values_no_data():
@@ -134,9 +157,174 @@ def test_load_artifacts_joblib_success():
     # Simuler un Pipeline scikit-learn
     mock_model.named_steps = {"clf": MagicMock()}
 
-    with patch("os.path.exists", return_value=True):
-        with patch("joblib.load", return_value=mock_model):
-            with patch("shap.TreeExplainer", return_value=MagicMock()):
-                model = loader_instance.load_artifacts()
-                assert model is not None
-                assert loader_instance.explainer is not None
+    # shap (import paresseux) patché avant os.path.exists : son import ne
+    # doit pas voir des fichiers de configuration fictifs
+    with (
+        patch("shap.TreeExplainer", return_value=MagicMock()),
+        patch("os.path.exists", return_value=True),
+        patch("joblib.load", return_value=mock_model),
+    ):
+        model = loader_instance.load_artifacts()
+        assert model is not None
+        assert loader_instance.explainer is not None
+
+
+def test_predict_proba_batch_onnx_zipmap():
+    """Vérifie l'inférence batch ONNX avec une sortie ZipMap (liste de dict)."""
+    loader_instance = ModelLoader()
+    mock_session = MagicMock()
+    mock_session.run.return_value = [None, [{0: 0.9, 1: 0.1}, {0: 0.3, 1: 0.7}]]
+    loader_instance.onnx_session = mock_session
+
+    features = pd.DataFrame({"FEATURE1": [1.0, 2.0]})
+    scores = loader_instance.predict_proba_batch(features)
+
+    assert mock_session.run.call_count == 1
+    np.testing.assert_allclose(scores, [0.1, 0.7])
+
+
+def test_predict_proba_batch_joblib_fallback():
+    """Vérifie le fallback Joblib en batch."""
+    loader_instance = ModelLoader()
+    mock_model = MagicMock()
+    mock_model.predict_proba.return_value = np.array([[0.6, 0.4], [0.2, 0.8]])
+    loader_instance.model = mock_model
+
+    scores = loader_instance.predict_proba_batch(pd.DataFrame({"F": [1.0, 2.0]}))
+    np.testing.assert_allclose(scores, [0.4, 0.8])
+
+
+def test_get_shap_values_batch():
+    """Vérifie le calcul SHAP batch en un seul appel à l'explainer."""
+    loader_instance = ModelLoader()
+    mock_explainer = MagicMock()
+    mock_explainer.explain.return_value = "batch_shap"
+    loader_instance.explainer = mock_explainer
+
+    assert loader_instance.get_shap_values_batch(pd.DataFrame({"F": [1, 2]})) == (
+        "batch_shap"
+    )
+    assert mock_explainer.explain.call_count == 1
+
+
+def test_load_artifacts_thread_safe():
+    """Des chargements concurrents ne chargent le modèle qu'une fois."""
+    import threading
+    import time
+
+    loader_instance = ModelLoader()
+    calls = []
+
+    def slow_load(path):
+        calls.append(path)
+        time.sleep(0.05)
+        return MagicMock(named_steps={"clf": MagicMock()})
+
+    with (
+        patch("shap.TreeExplainer", return_value=MagicMock()),
+        patch("os.path.exists", side_effect=lambda p: p.endswith(".joblib")),
+        patch("joblib.load", side_effect=slow_load),
+    ):
+        threads = [
+            threading.Thread(target=loader_instance.load_artifacts) for _ in range(4)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    assert len(calls) == 1
+
+
+def test_load_artifacts_score_only_defers_joblib():
+    """Avec ONNX, le démarrage ne charge pas le modèle Joblib ; la version du
+    modèle ne change pas quand il est chargé ensuite."""
+    loader_instance = ModelLoader()
+    pipeline = MagicMock(named_steps={"clf": MagicMock()})
+    session = MagicMock()
+    session.get_modelmeta.return_value.custom_metadata_map = {
+        "feature_names": '["f0", "f1"]'
+    }
+
+    with (
+        patch("os.path.exists", return_value=True),
+        patch("src.model.loader.create_onnx_session", return_value=session),
+        patch("src.model.loader.artifacts_version", return_value="v1"),
+        patch("joblib.load", return_value=pipeline) as mock_load,
+    ):
+        assert loader_instance.load_artifacts(score_only=True) is None
+        assert not mock_load.called
+        assert loader_instance.readiness()["onnx"]
+        assert not loader_instance.readiness()["explainer"]
+
+        assert loader_instance.get_model_feature_names() == ["f0", "f1"]
+
+        assert loader_instance.load_explainer() is not None
+        assert mock_load.call_count == 1
+        assert loader_instance.model_version == "v1"
+
+
+def test_load_artifacts_score_only_without_onnx_feature_names():
+    """Ancien export ONNX sans noms de features : le modèle Joblib est chargé
+    dès le démarrage pour connaître l'ordre d'entrée."""
+    loader_instance = ModelLoader()
+    session = MagicMock()
+    session.get_modelmeta.return_value.custom_metadata_map = {}
+
+    with (
+        patch("os.path.exists", return_value=True),
+        patch("src.model.loader.create_onnx_session", return_value=session),
+        patch("src.model.loader.artifacts_version", return_value="v1"),
+        patch("joblib.load", return_value=MagicMock()) as mock_load,
+    ):
+        loader_instance.load_artifacts(score_only=True)
+
+    assert loader_instance.onnx_feature_names is None
+    assert mock_load.call_count == 1
+
+
+def test_score_only_score_unchanged_after_warmup(tmp_path, lgbm_model):
+    """Même score avant et après le chargement différé du modèle Joblib,
+    les colonnes de la table n'étant pas dans l'ordre du modèle."""
+    model_path = tmp_path / "model.joblib"
+    onnx_path = tmp_path / "model.onnx"
+    joblib.dump(lgbm_model, model_path)
+    assert convert_model(model_path, onnx_path, parity_rows=50, target_opset=15)
+
+    names = list(lgbm_model.feature_name_)
+    columns = ["SK_ID_CURR", *reversed(names)]
+    row = random_rows(1, seed=3)[0]
+    db_path = tmp_path / "clients.sqlite"
+    conn = sqlite3.connect(db_path)
+    conn.execute(f"CREATE TABLE clients ({', '.join(columns)})")
+    conn.execute(
+        f"INSERT INTO clients VALUES ({', '.join('?' * len(columns))})",
+        (100005, *row[::-1]),
+    )
+    conn.commit()
+    conn.close()
+
+    loader_instance = ModelLoader()
+    loader_instance.db_path = str(db_path)
+    loader_instance.load_artifacts(str(model_path), str(onnx_path), score_only=True)
+    assert loader_instance.model is None
+    before = loader_instance.predict_proba(100005)
+
+    # Préchauffage : modèle Joblib chargé, scores recalculés
+    loader_instance.load_artifacts(str(model_path), str(onnx_path))
+    assert loader_instance.model is not None
+    loader_instance.cache.clear()
+    after = loader_instance.predict_proba(100005)
+
+    expected = lgbm_model.predict_proba(row[None, :])[0, 1]
+    np.testing.assert_allclose([before, after], [expected, expected], atol=1e-5)
+
+
+def test_artifacts_version(tmp_path):
+    """La version change avec le contenu des artefacts."""
+    path = tmp_path / "model.onnx"
+    path.write_bytes(b"abc")
+    v1 = artifacts_version([path])
+    assert v1 == artifacts_version([path])
+    path.write_bytes(b"abd")
+    assert artifacts_version([path]) != v1
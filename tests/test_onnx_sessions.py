@@ -0,0 +1,123 @@
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+import onnxruntime as ort
+import pytest
+
+from src.model.onnx_sessions import (
+    SessionPool,
+    artifacts_version,
+    create_onnx_session,
+    make_session_options,
+    session_config,
+)
+
+ONNX_PATH = "src/model/model.onnx"
+requires_model = pytest.mark.skipif(
+    not os.path.exists(ONNX_PATH), reason="model.onnx absent"
+)
+
+
+def test_session_config_overrides_and_validation():
+    config = session_config(intra_op_threads=2, execution_mode="parallel")
+    assert config["intra_op_threads"] == 2
+    options = make_session_options(config)
+    assert options.intra_op_num_threads == 2
+    assert options.execution_mode == ort.ExecutionMode.ORT_PARALLEL
+
+    with pytest.raises(ValueError):
+        session_config(graph_optimization="max")
+    with pytest.raises(ValueError):
+        session_config(threads=2)
+
+
+class SlowSession:
+    """Fausse session : compte les appels simultanés."""
+
+    def __init__(self, state):
+        self.state = state
+
+    def run(self, output_names, input_feed, run_options=None):
+        with self.state["lock"]:
+            self.state["active"] += 1
+            self.state["peak"] = max(self.state["peak"], self.state["active"])
+        time.sleep(0.02)
+        with self.state["lock"]:
+            self.state["active"] -= 1
+        return [input_feed["x"]]
+
+
+def test_session_pool_bounds_concurrency():
+    """Au plus `size` inférences simultanées ; les autres attendent."""
+    state = {"lock": threading.Lock(), "active": 0, "peak": 0}
+    pool = SessionPool([SlowSession(state), SlowSession(state)])
+
+    threads = [
+        threading.Thread(target=pool.run, args=(None, {"x": i})) for i in range(6)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert state["peak"] == 2
+    stats = pool.stats()
+    assert stats["runs"] == 6
+    assert stats["available"] == 2
+    assert stats["waits"] >= 1
+
+
+@requires_model
+def test_pool_matches_single_session():
+    single = create_onnx_session(ONNX_PATH)
+    pool = create_onnx_session(ONNX_PATH, pool_size=2, intra_op_threads=1)
+    assert isinstance(pool, SessionPool)
+
+    x = np.random.default_rng(0).normal(size=(1, 808)).astype(np.float32)
+    name = single.get_inputs()[0].name
+    np.testing.assert_array_equal(
+        single.run(None, {name: x})[1], pool.run(None, {name: x})[1]
+    )
+
+
+@requires_model
+def test_optimized_model_is_serialized_and_reused(tmp_path):
+    optimized = tmp_path / "model.optimized.onnx"
+    create_onnx_session(
+        ONNX_PATH, optimized_model_path=str(optimized), graph_optimization="extended"
+    )
+    assert optimized.exists()
+    mtime = optimized.stat().st_mtime_ns
+
+    # Second chargement : le modèle optimisé est relu, pas réécrit
+    session = create_onnx_session(
+        ONNX_PATH, optimized_model_path=str(optimized), graph_optimization="extended"
+    )
+    assert optimized.stat().st_mtime_ns == mtime
+    assert session.get_inputs()[0].shape[1] == 808
+
+
+@requires_model
+def test_optimized_model_is_keyed_on_source_content(tmp_path):
+    """Cache invalidé par le contenu du modèle source, pas par les dates."""
+    source = tmp_path / "model.onnx"
+    shutil.copy(ONNX_PATH, source)
+    optimized = tmp_path / "model.optimized.onnx"
+    create_onnx_session(str(source), optimized_model_path=str(optimized))
+    key = (tmp_path / "model.optimized.onnx.source").read_text()
+    assert key == f"{artifacts_version([source])}:all"
+
+    # Source plus récente mais identique : modèle optimisé réutilisé
+    os.utime(source, (time.time() + 60, time.time() + 60))
+    mtime = optimized.stat().st_mtime_ns
+    create_onnx_session(str(source), optimized_model_path=str(optimized))
+    assert optimized.stat().st_mtime_ns == mtime
+
+    # Modèle optimisé issu d'une autre source (même date) : régénéré
+    (tmp_path / "model.optimized.onnx.source").write_text("autre:all")
+    os.utime(optimized, (time.time() + 120, time.time() + 120))
+    create_onnx_session(str(source), optimized_model_path=str(optimized))
+    assert (tmp_path / "model.optimized.onnx.source").read_text() == key
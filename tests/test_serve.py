@@ -0,0 +1,53 @@
+import gc
+from unittest.mock import MagicMock, patch
+
+from src.api.main import warmup_steps
+from src.api.serve import preload_artifacts, should_preload
+from src.model.loader import ModelLoader
+
+
+def test_preload_artifacts_without_onnx_session():
+    """Le parent charge les artefacts partageables, jamais de session ONNX."""
+    with patch("src.api.serve.loader") as mock_loader:
+        try:
+            preload_artifacts()
+        finally:
+            gc.unfreeze()
+    mock_loader.load_artifacts.assert_called_once_with(onnx=False)
+    assert mock_loader.load_feature_store.called
+    assert mock_loader.load_cascade.called
+
+
+def test_preload_only_with_several_workers_by_default():
+    """Un worker seul ne précharge rien : chemin de scoring d'abord, reste en
+    arrière-plan (pas de socket muette pendant le chargement)."""
+    assert not should_preload(1, "auto")
+    assert should_preload(4, "auto")
+    assert should_preload(1, "1")
+    assert not should_preload(4, "0")
+    assert should_preload(1, True)
+
+
+def test_warmup_skips_preloaded_artifacts(mock_loader):
+    store = MagicMock()
+    mock_loader.feature_store = store
+    steps = dict(warmup_steps())
+
+    assert steps["feature_store"]() is store
+    assert not mock_loader.load_feature_store.called
+    steps["shap_store"]()
+    assert mock_loader.load_shap_store.called
+
+
+def test_after_fork_keeps_artifacts():
+    """Worker forké : modèle et stores conservés, état par processus recréé."""
+    loader = ModelLoader()
+    loader.model = model = MagicMock()
+    loader.cache.set("key", 0.5)
+    lock = loader._load_lock
+
+    loader.after_fork()
+
+    assert loader.model is model
+    assert loader.cache.get("key") is None
+    assert loader._load_lock is not lock
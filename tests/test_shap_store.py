@@ -0,0 +1,106 @@
+from unittest.mock import MagicMock
+
+import joblib
+import numpy as np
+import pytest
+import shap
+
+from src.model.client_features import ClientFeatures, data_digest
+from src.model.feature_store import FeatureStore
+from src.model.loader import ModelLoader
+from src.model.shap_store import ShapStore, build_shap_store
+from tests.conftest import N_TEST_FEATURES, random_rows
+
+FEATURES = ["F1", "F2", "F3"]
+
+
+def make_store(matrix, model_version="v1"):
+    ids = np.array([10, 20])
+    digests = np.array([data_digest(row) for row in matrix], dtype="S16")
+    return ShapStore(
+        ids,
+        np.array([[1, 0], [2, 1]], dtype=np.int32),
+        np.array([[0.5, -0.1], [0.3, 0.2]], dtype=np.float32),
+        np.array([-1.0, -1.0], dtype=np.float32),
+        digests,
+        FEATURES,
+        model_version=model_version,
+    )
+
+
+@pytest.fixture
+def matrix():
+    return np.array([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]], dtype=np.float32)
+
+
+def test_get_and_roundtrip(tmp_path, matrix):
+    make_store(matrix).save(tmp_path)
+    store = ShapStore.load(tmp_path)
+
+    client = ClientFeatures(20, matrix[1], FEATURES)
+    explanation = store.get(client, 2)
+    assert explanation.as_dict(FEATURES) == {
+        "F3": pytest.approx(0.3),
+        "F2": pytest.approx(0.2),
+    }
+    assert explanation.base_value == -1.0
+    assert store.model_version == "v1"
+
+
+def test_get_misses(matrix):
+    store = make_store(matrix)
+    # Client inconnu
+    assert store.get(ClientFeatures(15, matrix[0], FEATURES), 2) is None
+    # Plus de features demandées que stockées
+    assert store.get(ClientFeatures(10, matrix[0], FEATURES), 3) is None
+    # Ligne modifiée depuis le calcul
+    assert store.get(ClientFeatures(10, matrix[0] + 1, FEATURES), 2) is None
+
+    stats = store.stats()
+    assert stats["misses"] == 2 and stats["stale"] == 1 and stats["hits"] == 0
+
+
+def test_loader_serves_from_store(tmp_path, matrix):
+    """Le store évite l'appel à TreeExplainer pour les clients connus."""
+    make_store(matrix).save(tmp_path)
+    loader = ModelLoader()
+    loader.model_version = "v1"
+    loader.explainer = MagicMock()
+    assert loader.load_shap_store(str(tmp_path)) is not None
+
+    explanation = loader.get_shap_values_cached(
+        10, ClientFeatures(10, matrix[0], FEATURES), 2
+    )
+    assert explanation.indices.tolist() == [1, 0]
+    assert not loader.explainer.called
+
+
+def test_loader_ignores_store_of_other_model(tmp_path, matrix):
+    make_store(matrix, model_version="old").save(tmp_path)
+    loader = ModelLoader()
+    loader.model_version = "new"
+    assert loader.load_shap_store(str(tmp_path)) is None
+    assert loader.shap_store is None
+
+
+def test_build_matches_tree_explainer(tmp_path, lgbm_model):
+    """Le calcul hors ligne (pool de processus) donne les valeurs de SHAP."""
+    model = lgbm_model
+    X = random_rows(200).astype(np.float32)
+    names = [f"F{i}" for i in range(N_TEST_FEATURES)]
+    model_path = tmp_path / "model.joblib"
+    joblib.dump(model, model_path)
+
+    features = FeatureStore(np.arange(200) + 1000, X, names)
+    store = build_shap_store(
+        features, str(model_path), tmp_path / "store", 2, workers=2, chunk_size=64
+    )
+
+    expected = shap.TreeExplainer(model)(X[:5])
+    for i in range(5):
+        row = expected.values[i]
+        top = np.argsort(-np.abs(row), kind="stable")[:2]
+        client = ClientFeatures(1000 + i, X[i], names)
+        explanation = store.get(client, 2)
+        assert explanation.indices.tolist() == top.tolist()
+        np.testing.assert_allclose(explanation.values, row[top], rtol=1e-5)
@@ -0,0 +1,166 @@
+import asyncio
+import time
+
+import pandas as pd
+from httpx import ASGITransport, AsyncClient
+
+from src.api import main
+from src.api.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_computation():
+    """Les appels concurrents pour une même clé attendent le premier calcul."""
+    flight = SingleFlight()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return 0.42
+
+    async def scenario():
+        return await asyncio.gather(
+            *(flight.do((100001, "v1"), compute) for _ in range(5))
+        )
+
+    assert asyncio.run(scenario()) == [0.42] * 5
+    assert len(calls) == 1
+
+    stats = flight.stats()
+    assert stats["calls"] == 5
+    assert stats["executions"] == 1
+    assert stats["coalesced"] == 4
+    assert stats["in_flight"] == 0
+
+
+def test_distinct_keys_are_not_coalesced():
+    """Clients ou versions de modèle différents : calculs séparés."""
+    flight = SingleFlight()
+
+    async def scenario():
+        async def compute(value):
+            await asyncio.sleep(0.01)
+            return value
+
+        return await asyncio.gather(
+            flight.do((1, "v1"), lambda: compute("a")),
+            flight.do((2, "v1"), lambda: compute("b")),
+            flight.do((1, "v2"), lambda: compute("c")),
+        )
+
+    assert asyncio.run(scenario()) == ["a", "b", "c"]
+    assert flight.stats()["coalesced"] == 0
+
+
+def test_sequential_calls_recompute():
+    """Un calcul terminé n'est pas conservé (ce n'est pas un cache)."""
+    flight = SingleFlight()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return len(calls)
+
+    async def scenario():
+        first = await flight.do("k", compute)
+        second = await flight.do("k", compute)
+        return first, second
+
+    assert asyncio.run(scenario()) == (1, 2)
+    assert flight.stats()["executions"] == 2
+
+
+def test_error_is_propagated_to_all_waiters():
+    """Une erreur du calcul est remontée à tous les appelants en attente."""
+    flight = SingleFlight()
+
+    async def compute():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def scenario():
+        return await asyncio.gather(
+            *(flight.do("k", compute) for _ in range(3)), return_exceptions=True
+        )
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(r, ValueError) for r in results)
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_leader_cancellation_does_not_cancel_followers():
+    """Premier appelant annulé (client déconnecté) : les suiveurs obtiennent
+    quand même le résultat du calcul partagé."""
+    flight = SingleFlight()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return 0.42
+
+    async def scenario():
+        leader = asyncio.ensure_future(flight.do("k", compute))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("k", compute))
+        await asyncio.sleep(0)
+        leader.cancel()
+        result = await follower
+        return leader.cancelled(), result
+
+    assert asyncio.run(scenario()) == (True, 0.42)
+    assert len(calls) == 1
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_computation_cancelled_without_waiters():
+    """Tous les appelants annulés : le calcul partagé est abandonné."""
+    flight = SingleFlight()
+    started = []
+
+    async def compute():
+        started.append(1)
+        await asyncio.sleep(10)
+
+    async def scenario():
+        callers = [asyncio.ensure_future(flight.do("k", compute)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        task = flight._inflight["k"].task
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.sleep(0)
+        return task.cancelled()
+
+    assert asyncio.run(scenario())
+    assert started == [1]
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_predict_coalesces_concurrent_requests(mock_loader, monkeypatch):
+    """/predict : deux requêtes simultanées pour un client => un seul scoring."""
+    flight = SingleFlight()
+    monkeypatch.setattr(main, "single_flight", flight)
+
+    def slow_predict(client_id, client=None):
+        time.sleep(0.05)
+        return 0.3
+
+    mock_loader.get_client_data.return_value = pd.DataFrame(
+        {f"f{i}": [0.1] for i in range(200)}
+    )
+    mock_loader.predict_proba.side_effect = slow_predict
+    mock_loader.model_version = "v1"
+
+    async def scenario():
+        transport = ASGITransport(app=main.app)
+        async with AsyncClient(transport=transport, base_url="http://test") as ac:
+            return await asyncio.gather(
+                ac.get("/predict/100001"), ac.get("/predict/100001")
+            )
+
+    responses = asyncio.run(scenario())
+
+    assert [r.status_code for r in responses] == [200, 200]
+    assert mock_loader.predict_proba.call_count == 1
+    assert flight.stats()["coalesced"] == 1
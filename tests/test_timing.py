@@ -0,0 +1,106 @@
+from unittest.mock import patch
+
+from src.api import main
+from src.api.timing import StageTimer
+from tests.conftest import create_client_features
+
+
+def test_disabled_timer_records_nothing():
+    timer = StageTimer(enabled=False, header=False)
+    assert timer.begin() is None
+    with timer.stage("score"):
+        pass
+    assert timer.current() is None
+    assert timer.stats() == {"enabled": False, "header": False, "routes": {}}
+
+
+def test_stages_are_accumulated_and_aggregated():
+    timer = StageTimer(enabled=True, header=True, buckets_ms=(1, 1000))
+    timings = timer.begin()
+    with timer.stage("score"):
+        pass
+    with timer.stage("shap"):
+        pass
+    with timer.stage("shap"):
+        pass
+    assert set(timer.current()) == {"score", "shap"}
+
+    header = timer.end(timings, "/predict/{client_id}")
+    assert [metric.split(";")[0] for metric in header.split(", ")] == [
+        "score",
+        "shap",
+        "total",
+    ]
+    assert all(";dur=" in metric for metric in header.split(", "))
+    # Hors requête : plus de mesures en cours
+    assert timer.current() is None
+
+    snapshot = timer.snapshot()
+    stat = snapshot[("/predict/{client_id}", "shap")]
+    assert stat["count"] == 1
+    assert stat["buckets"] == [1, 0, 0]
+    assert timer.stats()["routes"]["/predict/{client_id}"]["total"]["count"] == 1
+
+
+def test_predict_server_timing_header(client, mock_loader, mock_log_writer):
+    """SERVER_TIMING=1 : étapes de /predict dans l'en-tête et dans /health."""
+    mock_loader.predict_proba.return_value = 0.3
+    mock_loader.get_client_data.return_value = create_client_features()
+    timer = StageTimer(enabled=True, header=True)
+
+    with (
+        patch.object(main, "stage_timer", timer),
+        patch.object(main, "SERVER_TIMING_LOG", True),
+    ):
+        response = client.get("/predict/123")
+        health = client.get("/health").json()
+
+    stages = [m.split(";")[0] for m in response.headers["Server-Timing"].split(", ")]
+    assert stages == ["admission", "fetch", "score", "shap", "format", "log", "total"]
+    # Durées transmises au writer pour les colonnes latency_<étape>
+    logged = mock_log_writer.submit.call_args.kwargs["stages"]
+    assert {"fetch", "score", "shap", "format"} <= set(logged)
+    assert "fetch" in health["stage_timing"]["routes"]["/predict/{client_id}"]
+
+
+def test_server_timing_disabled_by_default(client, mock_loader):
+    """Sans SERVER_TIMING : pas d'en-tête, mais les étapes sont agrégées
+    (histogrammes de /metrics)."""
+    mock_loader.predict_proba.return_value = 0.3
+    mock_loader.get_client_data.return_value = create_client_features()
+    timer = StageTimer(enabled=True, header=False)
+
+    with patch.object(main, "stage_timer", timer):
+        response = client.get("/predict/123")
+
+    assert response.status_code == 200
+    assert "Server-Timing" not in response.headers
+    assert timer.snapshot()[("/predict/{client_id}", "score")]["count"] == 1
+
+
+def test_micro_batch_timings_split_into_score_and_shap(
+    client, mock_loader, mock_log_writer
+):
+    """Micro-batching : durées du lot imputées aux étapes score et shap
+    (colonnes latency_score / latency_shap renseignées)."""
+    mock_loader.get_client_data.return_value = create_client_features()
+
+    def score_and_explain_batch(clients, top_k, mode, durations):
+        durations.update(score=0.002, shap=0.008)
+        return [(0.7, None) for _ in clients]
+
+    mock_loader.score_and_explain_batch.side_effect = score_and_explain_batch
+    timer = StageTimer(enabled=True, header=True)
+
+    with (
+        patch.object(main, "stage_timer", timer),
+        patch.object(main, "SERVER_TIMING_LOG", True),
+        patch("src.api.main.micro_batcher.window", 0.001),
+    ):
+        response = client.get("/predict/123")
+
+    assert response.status_code == 200
+    assert "microbatch" not in response.headers["Server-Timing"]
+    logged = mock_log_writer.submit.call_args.kwargs["stages"]
+    assert logged["score"] == 0.002
+    assert logged["shap"] == 0.008
@@ -0,0 +1,94 @@
+import os
+from unittest.mock import MagicMock, patch
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.model.client_features import ClientFeatures
+from src.model.loader import ModelLoader
+from src.model.tree_scorer import TreeScorer
+from tests.conftest import N_TEST_FEATURES, random_rows
+
+MODEL_PATH = "src/model/model.joblib"
+
+
+@pytest.fixture(scope="module")
+def model_and_data(lgbm_model):
+    X_test = random_rows(200, seed=2, missing=0.2)
+    X_test[:10, 1] = 0.0
+    return lgbm_model, X_test
+
+
+def test_compiled_scoring_matches_lightgbm(model_and_data):
+    """Forêt compilée : mêmes probabilités que LightGBM (lot et ligne seule)."""
+    model, X = model_and_data
+    scorer = TreeScorer.from_classifier(model)
+    assert scorer.compiled
+    expected = model.predict_proba(X)[:, 1]
+
+    np.testing.assert_allclose(scorer.predict_proba(X), expected, atol=1e-12)
+    np.testing.assert_allclose(
+        scorer.predict_proba(X[0].astype(np.float32)),
+        model.predict_proba(X[:1].astype(np.float32))[:, 1],
+        atol=1e-12,
+    )
+
+
+def test_numpy_fallback_without_numba(model_and_data):
+    model, X = model_and_data
+    with patch("src.model.tree_scorer._compile_kernel", return_value=None):
+        scorer = TreeScorer.from_classifier(model)
+    assert not scorer.compiled
+    np.testing.assert_allclose(
+        scorer.predict_proba(X), model.predict_proba(X)[:, 1], atol=1e-12
+    )
+
+
+def test_from_classifier_requires_lightgbm():
+    with pytest.raises(TypeError):
+        TreeScorer.from_classifier(MagicMock(spec=[]))
+
+
+@pytest.mark.skipif(not os.path.exists(MODEL_PATH), reason="model.joblib absent")
+def test_compiled_scoring_matches_production_model():
+    classifier = joblib.load(MODEL_PATH).named_steps["clf"]
+    X = np.random.default_rng(0).normal(size=(200, classifier.n_features_in_))
+    X[X > 1.5] = np.nan
+    scorer = TreeScorer.from_classifier(classifier)
+    np.testing.assert_allclose(
+        scorer.predict_proba(X), classifier.predict_proba(X)[:, 1], atol=1e-12
+    )
+
+
+def test_loader_numba_backend(model_and_data):
+    """SCORING_BACKEND=numba : la forêt compilée passe avant ONNX."""
+    model, X = model_and_data
+    loader = ModelLoader()
+    loader.model = model
+    loader.scoring_backend = "numba"
+    loader.onnx_session = MagicMock()
+    assert loader.get_tree_scorer() is not None
+
+    names = [f"F{i}" for i in range(N_TEST_FEATURES)]
+    client = ClientFeatures.from_frame(
+        pd.DataFrame([[7, *np.nan_to_num(X[0])]], columns=["SK_ID_CURR", *names])
+    )
+    expected = model.predict_proba(client.values)[0, 1]
+    assert loader.predict_proba(7, client) == pytest.approx(expected, abs=1e-12)
+    np.testing.assert_allclose(
+        loader.predict_proba_batch(X), model.predict_proba(X)[:, 1], atol=1e-12
+    )
+    assert not loader.onnx_session.run.called
+
+
+def test_loader_joblib_backend_skips_onnx(model_and_data):
+    model, X = model_and_data
+    loader = ModelLoader()
+    loader.model = model
+    loader.scoring_backend = "joblib"
+    loader.onnx_session = MagicMock()
+
+    loader.predict_proba_batch(X)
+    assert not loader.onnx_session.run.called
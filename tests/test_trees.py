@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from src.model.explainers import SaabasExplainer
+from src.model.trees import TreeArrays
+from tests.conftest import N_TEST_FEATURES, random_rows
+
+
+@pytest.fixture(scope="module")
+def model_and_data(lgbm_model):
+    return lgbm_model, random_rows(100, seed=1, missing=0.2)
+
+
+def test_raw_score_matches_lightgbm(model_and_data):
+    """Le parcours NumPy de la forêt donne le score brut de LightGBM."""
+    model, X = model_and_data
+    trees = TreeArrays.from_booster(model.booster_)
+    assert trees.n_trees == model.booster_.num_trees()
+    np.testing.assert_allclose(
+        trees.raw_score(X), model.predict(X, raw_score=True), atol=1e-10
+    )
+
+
+def test_saabas_additivity_and_base_value(model_and_data):
+    """Contributions + valeur de base = score brut ; base identique à TreeSHAP."""
+    model, X = model_and_data
+    values, base_values = SaabasExplainer(model).explain(X)
+    exact = model.predict(X, pred_contrib=True)
+
+    assert values.shape == (100, N_TEST_FEATURES)
+    np.testing.assert_allclose(
+        values.sum(axis=1) + base_values, model.predict(X, raw_score=True), atol=1e-10
+    )
+    np.testing.assert_allclose(base_values, exact[:, -1], atol=1e-10)
+
+
+def test_saabas_is_directionally_close_to_treeshap(model_and_data):
+    """Approximation : la feature dominante est en général la même."""
+    model, X = model_and_data
+    values, _ = SaabasExplainer(model).explain(X)
+    exact = model.predict(X, pred_contrib=True)[:, :-1]
+
+    same_top = np.argmax(np.abs(values), axis=1) == np.argmax(np.abs(exact), axis=1)
+    assert same_top.mean() > 0.8
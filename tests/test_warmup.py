@@ -0,0 +1,38 @@
+import threading
+
+from src.api.warmup import DISABLED, FAILED, PENDING, READY, Warmup
+
+
+def fail():
+    raise RuntimeError("artefact corrompu")
+
+
+def test_warmup_step_statuses():
+    warmup = Warmup()
+    warmup.start(
+        [("model", lambda: "ok"), ("store", lambda: None), ("cascade", fail)],
+        background=False,
+    )
+    assert warmup.done
+    assert warmup.status("model") == READY
+    assert warmup.status("store") == DISABLED
+    assert warmup.status("cascade") == FAILED
+    assert warmup.status("unknown") is None
+    assert "seconds" in warmup.stats()["model"]
+
+
+def test_warmup_runs_in_background_and_stops():
+    """Les étapes tournent dans un thread ; `stop` n'enchaîne plus d'étape."""
+    release = threading.Event()
+    warmup = Warmup()
+    warmup.start([("slow", release.wait), ("next", lambda: True)], background=True)
+
+    assert warmup.running
+    assert warmup.status("next") == PENDING
+    warmup._stop.set()
+    release.set()
+    warmup.stop()
+
+    assert not warmup.running
+    assert warmup.status("slow") == READY
+    assert warmup.status("next") == PENDING